@@ -2,15 +2,28 @@ import argparse
 import asyncio
 import inspect
 import logging
+import multiprocessing
+from dataclasses import replace
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-from . import gui
 from .core.controller import Config, Controller
-from .core.logger import logger
-from .gui import GUIController
-from .utils.zmq_async import Client
+from .core.logger import logger, use_queue_handler
+from .utils.common import DestinationHeuristic, MotionModel
+from .utils.metrics import serve_prometheus
+from .utils.tracing import tracer
 
+# The GUI (Qt) and the transport (ZeroMQ) are imported on demand, so that the headless and simulation paths start fast
+if TYPE_CHECKING:
+    from .utils.zmq_async import Client
+
+
+async def serve(controller: Controller, client: "Client", tg: asyncio.TaskGroup):
+    """
+    Bind a controller to a ZeroMQ client: messages received by the client are dispatched to the controller,
+    and events produced by the controller are sent back through the client.
+    """
 
-async def main(controller: Controller):
     async def input_loop():
         async for msg, _ in client.messages():
             controller.handle_message_task(msg)
@@ -19,44 +32,177 @@ async def main(controller: Controller):
         async for msg in controller.messages():
             await client.send(msg)
 
+    # Announce the client only once its controller is ready to handle messages
+    await controller.start(tg)
+
+    client.start(tg)
+    await client.send(f"Client[{client.identity}] is online")
+
+    tg.create_task(input_loop(), name=f"InputLoop-{client.identity} {__file__}:{inspect.stack()[0].lineno}")
+    tg.create_task(output_loop(), name=f"OutputLoop-{client.identity} {__file__}:{inspect.stack()[0].lineno}")
+
+
+async def main(controllers: dict[str, Controller], server_host: str = "127.0.0.1", port: int = 27132, metrics_port: int | None = None, trace_path: str | None = None):
+    """
+    Host one controller per client identity in this process.
+    All the controllers share the same event loop and the same ZeroMQ context.
+    If `metrics_port` is given, the metrics of all the controllers are exposed there in the Prometheus text format.
+    If `trace_path` is given, the spans of the command lifecycle are recorded and written there on exit.
+    """
+    import zmq.asyncio
+
+    from .utils.zmq_async import Client
+
+    if trace_path is not None:
+        tracer.enable()
+
+    context = zmq.asyncio.Context()
+    for identity, controller in controllers.items():
+        controller.metrics.const_labels["bank"] = identity
+
+    metrics_server = None
     try:
+        if metrics_port is not None:
+            metrics_server = await serve_prometheus(lambda: [c.metrics for c in controllers.values()], port=metrics_port)
+
         async with asyncio.TaskGroup() as tg:
-            identity = "Group3"
-            client = Client(identity=identity)
-            client.start(tg)
+            for identity, controller in controllers.items():
+                client = Client(server_host=server_host, port=port, identity=identity, context=context)
+                await serve(controller, client, tg)
 
-            await client.send(f"Client[{identity}] is online")
+    except asyncio.CancelledError:
+        logging.info("Program cancelled")
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        if trace_path is not None:
+            tracer.dump(trace_path)
 
-            await controller.start(tg)
 
-            tg.create_task(input_loop(), name=f"InputLoop {__file__}:{inspect.stack()[0].lineno}")
-            tg.create_task(output_loop(), name=f"OutputLoop {__file__}:{inspect.stack()[0].lineno}")
+def shard[T](items: list[T], n: int) -> list[list[T]]:
+    """Split the items into at most `n` non-empty shards of balanced size, preserving the order within each shard."""
+    if n < 1:
+        raise ValueError("Number of shards must be at least 1")
+    return [s for s in (items[i::n] for i in range(n)) if s]
 
-    except asyncio.CancelledError:
+
+def run_shard(identities: list[str], cfg: Config, server_host: str, port: int, log_level: int, metrics_port: int | None = None, trace_path: str | None = None, log_queue: bool = False):
+    """Entry point of a worker process hosting the elevator banks of one shard."""
+    logger.setLevel(log_level)
+    if log_queue:
+        use_queue_handler()
+    try:
+        asyncio.run(main({identity: Controller(replace(cfg)) for identity in identities}, server_host, port, metrics_port, trace_path))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_sharded(identities: list[str], cfg: Config, server_host: str, port: int, workers: int, metrics_port: int | None = None, trace_path: str | None = None, log_queue: bool = False):
+    """
+    Spread the elevator banks over several worker processes, so that the throughput of several banks scales with the number of cores.
+    A bank is never split: its cars and its dispatch, which simulates all of them at once, stay on a single event loop, so a single large bank does not scale.
+    The worker `i` exposes its metrics on `metrics_port + i` and writes its trace to `<trace_path stem>.<i><suffix>`.
+    """
+    processes = [
+        multiprocessing.Process(
+            target=run_shard,
+            args=(
+                s,
+                cfg,
+                server_host,
+                port,
+                logger.level,
+                None if metrics_port is None else metrics_port + i,
+                None if trace_path is None else str(Path(trace_path).with_suffix(f".{i}{Path(trace_path).suffix}")),
+                log_queue,
+            ),
+            name=f"ElevatorShard-{i}",
+        )
+        for i, s in enumerate(shard(identities, workers))
+    ]
+    for p in processes:
+        p.start()
+    try:
+        for p in processes:
+            p.join()
+    except KeyboardInterrupt:
         logging.info("Program cancelled")
+    finally:
+        for p in processes:
+            if p.is_alive():
+                p.terminate()
+            p.join()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Elevator System")
     parser.add_argument("--log-level", type=str, default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], help="Set the logging level")
+    parser.add_argument("--log-queue", action="store_true", help="Write log records from a background thread instead of the event loop")
     parser.add_argument("--headless", action="store_true", help="Run in headless mode (no GUI)")
+    parser.add_argument("--identity", type=str, nargs="+", default=["Group3"], help="ZeroMQ identities, one elevator bank is hosted per identity (headless mode only for more than one)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes the elevator banks are sharded across, at most one per identity; the cars of one bank always share a process (headless mode only)")
+    parser.add_argument("--server-host", type=str, default="127.0.0.1", help="Address of the ZeroMQ server")
+    parser.add_argument("--port", type=int, default=27132, help="Port of the ZeroMQ server")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Expose Prometheus metrics over HTTP on this port")
+    parser.add_argument("--metrics-interval", type=float, default=None, help="Period in seconds of the metrics snapshot messages sent to the server")
+    parser.add_argument("--eta-messages", action="store_true", help="Send the arrival estimate of each committed stop to the server when it changes, as up_eta@, down_eta@ or eta@ for a car stop")
+    parser.add_argument("--trace", type=str, default=None, metavar="PATH", help="Record a Chrome/Perfetto trace of the command lifecycle to this JSON file")
     parser.add_argument("--num-elevators", type=int, default=2, help="Number of elevators to simulate")
+    parser.add_argument("--floors", type=str, nargs="+", default=["-1", "1", "2", "3"], help="Floor labels of the building, there is no floor 0")
+    parser.add_argument("--floor-heights", type=float, nargs="+", default=None, help="Height of each floor up to the next one from the lowest floor, in standard floor heights")
     parser.add_argument("--floor-travel-duration", type=float, default=3.0, help="Duration for an elevator to travel between floors in seconds")
+    parser.add_argument("--accelerate-duration", type=float, default=3.0, help="Duration for an elevator to reach its max speed in seconds")
+    parser.add_argument("--motion-model", type=str.upper, choices=[m.name for m in MotionModel], default=MotionModel.CONSTANT.name, help="Travel time model: CONSTANT per floor, or TRAPEZOIDAL runs with acceleration")
+    parser.add_argument("--destination-heuristic", type=str.upper, choices=[h.name for h in DestinationHeuristic], default=DestinationHeuristic.MEAN.name, help="Guess of the destinations of the hall calls for the optimal strategy, LEARNED from the selected floors")
+    parser.add_argument("--reoptimize-delay", type=float, default=None, help="Give hall calls a greedy elevator at once and re-solve the optimal assignment at most once per this many seconds")
     parser.add_argument("--door-move-duration", type=float, default=1.0, help="Duration for an elevator door to open/close in seconds")
     parser.add_argument("--door-stay-duration", type=float, default=3.0, help="Duration for an elevator door to stay open in seconds")
 
     args = parser.parse_args()
     logger.setLevel(getattr(logging, args.log_level.upper()))
 
+    if len(set(args.identity)) != len(args.identity):
+        parser.error("--identity values must be unique")
+    if not args.headless and len(args.identity) > 1:
+        parser.error("hosting more than one elevator bank requires --headless")
+    if args.floor_heights is not None and len(args.floor_heights) != len(args.floors):
+        parser.error("--floor-heights needs one height per floor")
+    if args.reoptimize_delay is not None and args.reoptimize_delay < 0:
+        parser.error("--reoptimize-delay must not be negative")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > len(args.identity):
+        parser.error("--workers cannot exceed the number of --identity values, a bank is never split across processes")
+    if not args.headless and args.workers > 1:
+        parser.error("running several worker processes requires --headless")
+
     cfg = Config(
         elevator_count=args.num_elevators,
+        floors=tuple(args.floors),
+        floor_heights=None if args.floor_heights is None else tuple(args.floor_heights),
         floor_travel_duration=args.floor_travel_duration,
+        accelerate_duration=args.accelerate_duration,
+        motion_model=MotionModel[args.motion_model],
+        destination_heuristic=DestinationHeuristic[args.destination_heuristic],
+        reoptimize_delay=args.reoptimize_delay,
         door_move_duration=args.door_move_duration,
         door_stay_duration=args.door_stay_duration,
+        eta_messages=args.eta_messages,
+        metrics_interval=args.metrics_interval,
     )
 
+    # Worker processes set up their own log queue, the listener thread would not survive the fork
+    if args.log_queue and args.workers == 1:
+        use_queue_handler()
+
     # Run in headless mode or with GUI
-    if args.headless:
-        asyncio.run(main(Controller()))
+    if args.headless and args.workers > 1:
+        run_sharded(args.identity, cfg, args.server_host, args.port, args.workers, args.metrics_port, args.trace, args.log_queue)
+    elif args.headless:
+        # Each bank gets its own copy of the configuration, so that runtime changes stay local to it
+        asyncio.run(main({identity: Controller(replace(cfg)) for identity in args.identity}, args.server_host, args.port, args.metrics_port, args.trace))
     else:
-        gui.run(main(GUIController()))
+        from . import gui
+        from .gui import GUIController
+
+        gui.run(main({args.identity[0]: GUIController(cfg)}, args.server_host, args.port, args.metrics_port, args.trace))
@@ -1,20 +1,26 @@
 import asyncio
 import inspect
+import logging
+import time
 from dataclasses import dataclass, field
 from typing import AsyncGenerator, overload
 
 from ..utils.common import (
+    Building,
     DestinationHeuristic,
     Direction,
     DoorDirection,
     ElevatorId,
     Event,
-    Floor,
     FloorAction,
     FloorLike,
+    MotionModel,
     Strategy,
 )
 from ..utils.event_bus import event_bus
+from ..utils.metrics import COUNT_BUCKETS, DWELL_BUCKETS, Metrics, publish_periodically
+from ..utils.tracing import NULL_SPAN, tracer
+from .destinations import DestinationModel
 from .elevator import Elevator, Elevators, logger
 
 
@@ -22,12 +28,18 @@ from .elevator import Elevator, Elevators, logger
 class Config:
     floor_travel_duration: float = 3.0  # Time for elevator to travel between floors when running at max speed
     accelerate_duration: float = 3.0  # Time for elevator to accelerate (seconds)
+    motion_model: MotionModel = MotionModel.CONSTANT  # TRAPEZOIDAL to account for the acceleration of every run
     door_move_duration: float = 1.0  # Time for elevator door to move (seconds)
     door_stay_duration: float = 3.0  # Time elevator door remains open (seconds)
     floors: tuple[str, ...] = ("-1", "1", "2", "3")  # Floors in the building
-    default_floor: Floor = Floor(1)  # Default floor to start from
+    floor_heights: tuple[float, ...] | None = None  # Height of each floor up to the next one, in standard floor heights, from the lowest floor; None for equal floors
+    default_floor: FloorLike = "1"  # Default floor to start from
     elevator_count: int = 2  # Number of elevators in the building
     strategy: Strategy = Strategy.OPTIMAL
+    destination_heuristic: DestinationHeuristic = DestinationHeuristic.MEAN  # Guess of the destinations of the hall calls, for the OPTIMAL strategy
+    reoptimize_delay: float | None = None  # With the OPTIMAL strategy, give hall calls a greedy elevator at once and re-solve the assignment at most once per this many seconds; None to re-solve on every event
+    eta_messages: bool = False  # Send `[up_|down_]eta@<floor>#<eid>:<seconds>` messages when the arrival estimate of a committed stop changes
+    metrics_interval: float | None = None  # Period (seconds) of the `metrics@<json>` snapshot messages, None to disable them
 
 
 @dataclass
@@ -37,8 +49,14 @@ class Controller:
     message_tasks: dict[str, asyncio.Task] = field(default_factory=dict)  # Tasks for handling messages, each task should handle asyncio.CancelledError in its implementation
     _started: bool = False  # Flag to indicate if the controller has been started
     start_event: asyncio.Event = field(default_factory=asyncio.Event)  # Event to signal that the controller has started
+    metrics: Metrics = field(default_factory=Metrics)  # Dispatch, event loop and elevator state instrumentation
+    metrics_task: asyncio.Task | None = field(default=None, init=False)  # Publishes the `metrics@` snapshots, only with `Config.metrics_interval`
+    destination_model: DestinationModel = field(default_factory=DestinationModel)  # Learned from the floors selected after each hall call, kept across resets
+    _reoptimize_handle: asyncio.TimerHandle | None = None  # Pending re-optimization, see `reoptimize`
 
     def __post_init__(self):
+        self.building = Building.from_config(self.config)  # floors of this controller, shared with its elevators and its destination model
+        self.destination_model.set_building(self.building)
         self.elevators = Elevators(
             count=self.config.elevator_count,
             queue=self.queue,
@@ -46,9 +64,45 @@ class Controller:
             accelerate_duration=self.config.accelerate_duration,
             door_move_duration=self.config.door_move_duration,
             door_stay_duration=self.config.door_stay_duration,
+            metrics=self.metrics,
+            motion_model=self.config.motion_model,
+            eta_messages=self.config.eta_messages,
+            destination_model=self.destination_model,
+            building=self.building,
         )
 
+        self.metrics.describe("dispatch_seconds", "Time spent choosing an elevator for a hall call")
+        self.metrics.describe("dispatch_candidates", "Number of elevators or assignments scored by one dispatch", COUNT_BUCKETS)
+        self.metrics.describe("reassign_seconds", "Time spent searching the optimal assignment of all requests")
+        self.metrics.describe("reassign_candidates", "Number of assignments scored by one optimal reassignment", COUNT_BUCKETS)
+        self.metrics.describe("event_loop_lag_seconds", "Delay between the scheduled and the actual wakeup of the elevator loops")
+        self.metrics.describe("elevator_state_dwell_seconds", "Time spent by an elevator in a state before leaving it", DWELL_BUCKETS)
+        self.metrics.describe("controller_queue_depth", "Number of events waiting to be sent")
+        self.metrics.describe("message_tasks", "Number of messages being handled")
+        self.metrics.describe("pending_requests", "Number of hall calls waiting for an elevator")
+        self.metrics.describe("door_action_queue_depth", "Number of door actions waiting to be processed")
+        self.metrics.describe("committed_stops", "Number of stops committed to an elevator")
+        self.metrics.describe("elevator_position", "Position of an elevator, in floor indices from the lowest floor")
+        self.metrics.describe("elevator_door_ratio", "Opening ratio of the door of an elevator, from 0 (closed) to 1 (open)")
+        self.metrics.add_collector(self._collect_metrics)
+
+    def _collect_metrics(self, metrics: Metrics):
+        metrics.set_gauge("controller_queue_depth", self.queue.qsize())
+        metrics.set_gauge("message_tasks", len(self.message_tasks))
+        metrics.set_gauge("pending_requests", len(self.elevators.request2eid))
+        for eid, e in self.elevators.items():
+            metrics.set_gauge("door_action_queue_depth", e.door_action_queue.qsize(), elevator=eid)
+            metrics.set_gauge("committed_stops", len(e.target_floor_arrived), elevator=eid)
+        if self._started:
+            for eid, (position, door_ratio) in self.elevators.positions().items():
+                metrics.set_gauge("elevator_position", position, elevator=eid)
+                metrics.set_gauge("elevator_door_ratio", door_ratio, elevator=eid)
+
     def set_config(self, **kwargs):
+        rebuild_building = False  # the floors and their heights may change together
+        if any(key in ("floors", "floor_heights") and getattr(self.config, key) != value for key, value in kwargs.items()):
+            if any(e.target_floor_arrived or e._run is not None for e in self.elevators.values()):
+                raise ValueError("Controller: Floors cannot change while elevators have committed stops")
         for key, value in kwargs.items():
             # Special handling for elevator count
             if key == "elevator_count":
@@ -60,12 +114,20 @@ class Controller:
                 if getattr(self.config, key) == value:
                     continue
                 setattr(self.config, key, value)
+                if key in ("floors", "floor_heights"):
+                    rebuild_building = True
                 if hasattr(Elevator, key):
                     for elevator in self.elevators.values():
                         setattr(elevator, key, value)
             else:
                 raise ValueError(f"Controller: Invalid configuration key '{key}'")
 
+        if rebuild_building:
+            self.building = Building.from_config(self.config)
+            for elevator in self.elevators.values():
+                elevator.set_building(self.building)
+            self.destination_model.set_building(self.building)
+
     async def set_elevator_count(self, count: int):
         if count < 1:
             raise ValueError("Controller: Elevator count must be at least 1")
@@ -84,7 +146,7 @@ class Controller:
                 await e.stop()
 
             # Reassign lost requests to remaining elevators
-            logger.debug(f"Controller: Reassigning lost requests: {lost_requests}")
+            logger.debug("Controller: Reassigning lost requests: %s", lost_requests)
             for request, event in lost_requests.items():
                 eid = self.assign_elevators(request)
                 self.elevators.commit_floor(eid, request, event=event)
@@ -99,12 +161,17 @@ class Controller:
                     accelerate_duration=self.config.accelerate_duration,
                     door_move_duration=self.config.door_move_duration,
                     door_stay_duration=self.config.door_stay_duration,
+                    motion_model=self.config.motion_model,
+                    eta_messages=self.config.eta_messages,
+                    metrics=self.metrics,
+                    destination_model=self.destination_model,
+                    building=self.building,
                 )
                 if self._started:
                     await self.elevators[i].start()
 
                 if self.config.strategy == Strategy.OPTIMAL:
-                    self.optimal_reassign()
+                    self.reoptimize()
 
         self.config.elevator_count = count
 
@@ -147,6 +214,12 @@ class Controller:
         for e in self.elevators.values():
             await e.start(tg)
 
+        if self.config.metrics_interval is not None:
+            self.metrics_task = (tg if tg else self.event_loop).create_task(
+                publish_periodically(self.metrics, self.queue, self.config.metrics_interval),
+                name=f"MetricsPublisher {__file__}:{inspect.stack()[0].lineno}",
+            )
+
         self._started = True
 
     async def stop(self):
@@ -160,6 +233,16 @@ class Controller:
         for t in tasks:
             t.cancel()
 
+        if self._reoptimize_handle is not None:
+            self._reoptimize_handle.cancel()
+            self._reoptimize_handle = None
+
+        if self.metrics_task is not None:
+            if not self.metrics_task.done():
+                self.metrics_task.cancel()
+                tasks.append(self.metrics_task)
+            self.metrics_task = None
+
         await asyncio.wait(tasks + [asyncio.create_task(e.stop()) for e in self.elevators.values()])
 
         assert len(self.elevators.requests) == 0
@@ -170,25 +253,30 @@ class Controller:
 
     def handle_message_task(self, message: str) -> asyncio.Task:
         if message in self.message_tasks:
-            logger.debug(f"Controller: Message task for '{message}' already exists, reusing it")
+            logger.debug("Controller: Message task for '%s' already exists, reusing it", message)
             return self.message_tasks[message]
 
-        logger.debug(f"Controller: Existing tasks: {list(self.message_tasks)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Controller: Existing tasks: %s", list(self.message_tasks))
 
         async def wrapper():
             task = asyncio.current_task()
             assert task is not None
+            if tracer.enabled:
+                tracer.begin("message", message)
             try:
                 await self.handle_message(message)
             except asyncio.CancelledError as e:
-                logger.debug(f"Controller: Message task for '{message}' cancelled")
+                logger.debug("Controller: Message task for '%s' cancelled", message)
                 if task.uncancel() > 0:
                     raise asyncio.CancelledError from e
             except Exception as e:
-                logger.error(f"Controller: Error while handling message '{message}': {e}")
+                logger.error("Controller: Error while handling message '%s': %s", message, e)
                 raise e
             finally:
                 self.message_tasks.pop(message)
+                if tracer.enabled:
+                    tracer.end("message", message)
 
         self.message_tasks[message] = self.event_loop.create_task(wrapper(), name=f"HandleMessage-{message} {__file__}:{inspect.stack()[0].lineno}")
         return self.message_tasks[message]
@@ -199,12 +287,12 @@ class Controller:
 
         elif message.startswith("call_up@") or message.startswith("call_down@"):
             direction = Direction.UP if message.startswith("call_up") else Direction.DOWN
-            floor = Floor(message.split("@")[1])
+            floor = self.building.parse(message.split("@")[1])
             await self.call_elevator(floor, direction)
 
         elif message.startswith("select_floor@"):
             parts = message.split("@")[1].split("#")
-            floor = Floor(parts[0])
+            floor = self.building.parse(parts[0])
             elevator_id = int(parts[1])
             await self.select_floor(floor, elevator_id)
 
@@ -220,52 +308,67 @@ class Controller:
 
         elif message.startswith("deselect_floor@"):
             parts = message.split("@")[1].split("#")
-            floor = Floor(parts[0])
+            floor = self.building.parse(parts[0])
             elevator_id = int(parts[1])
             await self.deselect_floor(floor, elevator_id)
 
         elif message.startswith("cancel_call_up@") or message.startswith("cancel_call_down@"):
             direction = Direction.UP if message.startswith("cancel_call_up") else Direction.DOWN
-            floor = Floor(message.split("@")[1])
+            floor = self.building.parse(message.split("@")[1])
             await self.cancel_call(floor, direction)
 
         else:
-            logger.warning(f"Controller: Unrecognized message '{message}'")
+            logger.warning("Controller: Unrecognized message '%s'", message)
 
     async def get_event_message(self) -> str:
         return await self.queue.get()
 
     async def messages(self) -> AsyncGenerator[str, None]:
         while True:
-            yield await self.get_event_message()
+            message = await self.get_event_message()
+            if tracer.enabled:
+                tracer.instant("output", message=message)
+            yield message
 
     @overload
-    def optimal_reassign(self, *, destination_heuristic: DestinationHeuristic = DestinationHeuristic.MEAN) -> None:
+    def optimal_reassign(self, *, destination_heuristic: DestinationHeuristic | None = None) -> int:
         """
         Reassign elevators calls to optimize total travel time.
+        Returns the number of assignments scored.
         """
         ...
 
     @overload
-    def optimal_reassign(self, request: FloorAction, *, destination_heuristic: DestinationHeuristic = DestinationHeuristic.MEAN) -> ElevatorId:
+    def optimal_reassign(self, request: FloorAction, *, destination_heuristic: DestinationHeuristic | None = None) -> tuple[ElevatorId, int]:
         """
         Find the optimal assignment of elevators to floor requests.
         Uses a combinatorial approach to evaluate different assignments.
 
         Args:
             directed_target: The new floor request to be considered
+
+        Returns:
+            tuple[ElevatorId, int]: the elevator the request is assigned to and the number of assignments scored.
         """
         ...
 
-    def optimal_reassign(self, request: FloorAction | None = None, *, destination_heuristic: DestinationHeuristic = DestinationHeuristic.MEAN):
+    def optimal_reassign(self, request: FloorAction | None = None, *, destination_heuristic: DestinationHeuristic | None = None):
+        start = time.perf_counter()
+        if destination_heuristic is None:
+            destination_heuristic = self.config.destination_heuristic
+        bucket = self.destination_model.bucket() if destination_heuristic == DestinationHeuristic.LEARNED else None  # one clock read for all the candidates
+
         # Create a copy of elevators for simulation
         elevators = self.elevators.copy()
 
+        candidates = 0
         best_estimation_result, _, best_assignment = min(
             (
                 (
-                    elevators.reassign(assignment).estimate_total_duration(request, destination_heuristic=destination_heuristic) if request else elevators.reassign(assignment).estimate_total_duration(destination_heuristic=destination_heuristic),
-                    i,  # in case the duration is the same, we will use the former assignment
+                    elevators.reassign(assignment).estimate_total_duration(request, destination_heuristic=destination_heuristic, bucket=bucket)
+                    if request
+                    else elevators.reassign(assignment).estimate_total_duration(destination_heuristic=destination_heuristic, bucket=bucket),
+                    candidates := i + 1,  # in case the duration is the same, we will use the former assignment
                     assignment,
                 )
                 for i, assignment in enumerate(self.elevators.most_possible_assignments)
@@ -278,38 +381,79 @@ class Controller:
         else:
             # Apply changes to real elevators
             self.elevators.reassign(best_assignment, strict=True)
-            logger.debug(f"Controller: Optimized elevator assignments: {best_assignment}")
+            logger.debug("Controller: Optimized elevator assignments: %s", best_assignment)
+
+        self.metrics.observe("reassign_seconds", time.perf_counter() - start)
+        self.metrics.observe("reassign_candidates", candidates)
 
         if request is None:
-            return
+            return candidates
 
         assert isinstance(best_estimation_result, tuple)
         _, best_elevator_id = best_estimation_result
-        return best_elevator_id
+        return best_elevator_id, candidates
+
+    def reoptimize(self) -> None:
+        """
+        Re-solve the assignment of all requests, at once or, with `Config.reoptimize_delay`, once the delay has passed
+        The events of a burst are coalesced into one search, and the changes are applied by `optimal_reassign`
+        """
+        if self.config.reoptimize_delay is None:
+            self.optimal_reassign()
+        elif self._reoptimize_handle is None:
+            self._reoptimize_handle = self.event_loop.call_later(self.config.reoptimize_delay, self._run_reoptimize)
+
+    def _run_reoptimize(self) -> None:
+        self._reoptimize_handle = None
+        if self._started and self.config.strategy == Strategy.OPTIMAL:
+            with tracer.span("reoptimize", requests=len(self.elevators.requests)) if tracer.enabled else NULL_SPAN:
+                self.optimal_reassign()
 
     def assign_elevators(self, request: FloorAction) -> ElevatorId:
+        with tracer.span("assign_elevators", request=request, strategy=self.config.strategy.name) if tracer.enabled else NULL_SPAN:
+            return self._assign_elevators(request)
+
+    def _assign_elevators(self, request: FloorAction) -> ElevatorId:
+        start = time.perf_counter()
         match self.config.strategy:
             case Strategy.GREEDY:
-                return min(self.elevators, key=lambda i: self.elevators[i].estimate_total_duration(request))
+                eid = min(self.elevators, key=lambda i: self.elevators[i].estimate_total_duration(request))
+                candidates = len(self.elevators)
+            case Strategy.OPTIMAL if self.config.reoptimize_delay is not None:
+                # provisional greedy choice, the coming re-optimization may move the request
+                eid = min(self.elevators, key=lambda i: self.elevators[i].estimate_total_duration(request))
+                candidates = len(self.elevators)
+                self.reoptimize()
             case Strategy.OPTIMAL:
-                return self.optimal_reassign(request)
+                eid, candidates = self.optimal_reassign(request)
             case _:
                 raise ValueError(f"Controller: Invalid strategy {self.config.strategy}")
+        self.metrics.observe("dispatch_seconds", time.perf_counter() - start, strategy=self.config.strategy.name)
+        self.metrics.observe("dispatch_candidates", candidates, strategy=self.config.strategy.name)
+        return eid
+
+    def eta(self, floor: FloorLike, direction: Direction = Direction.IDLE) -> float | None:
+        """Seconds until a committed stop is served, by the soonest elevator it is committed to; None if it is not committed"""
+        action = FloorAction(self.building.parse(floor), direction)
+        etas = [e.target_floor_eta[action] for e in self.elevators.values() if e.target_floor_eta and action in e.target_floor_eta]
+        if not etas:
+            return None
+        return max(min(etas) - self.event_loop.time(), 0.0)
 
     async def call_elevator(self, call_floor: FloorLike, call_direction: Direction):
-        call_floor = Floor(call_floor)
+        call_floor = self.building.parse(call_floor)
         assert call_direction in (Direction.UP, Direction.DOWN)
         directed_target = FloorAction(call_floor, call_direction)
 
         # Check if the call direction is already requested
         if (call_floor, call_direction) in self.elevators.requests:
-            logger.info(f"Controller: Floor {call_floor} already requested {call_direction.name.lower()}")
+            logger.info("Controller: Floor %s already requested %s", call_floor, call_direction.name.lower())
             return
 
-        logger.info(f"Controller: Calling elevator: Floor {call_floor}, Direction {call_direction.name.lower()}")
+        logger.info("Controller: Calling elevator: Floor %s, Direction %s", call_floor, call_direction.name.lower())
 
         eid = self.assign_elevators(directed_target)
-        logger.info(f"Controller: Elevator {eid} selected for call at Floor {call_floor} going {call_direction.name.lower()}")
+        logger.info("Controller: Elevator %s selected for call at Floor %s going %s", eid, call_floor, call_direction.name.lower())
 
         try:
             await self.elevators.commit_floor(eid, directed_target).wait()
@@ -321,7 +465,7 @@ class Controller:
             self.elevators.cancel_commit(directed_target)
 
     async def cancel_call(self, call_floor: FloorLike, call_direction: Direction):
-        call_floor = Floor(call_floor)
+        call_floor = self.building.parse(call_floor)
         assert call_direction in (Direction.UP, Direction.DOWN)
 
         directed_target_floor = FloorAction(call_floor, call_direction)
@@ -336,23 +480,28 @@ class Controller:
         assert directed_target_floor not in self.elevators.requests
 
     async def select_floor(self, floor: FloorLike, elevator_id: ElevatorId):
-        floor = Floor(floor)
+        floor = self.building.parse(floor)
 
         elevator = self.elevators[elevator_id]
         if elevator.is_started is False:
-            logger.warning(f"Controller: Elevator {elevator_id} is not enabled, cannot select floor {floor}")
+            logger.warning("Controller: Elevator %s is not enabled, cannot select floor %s", elevator_id, floor)
             return
 
         # Check if the floor is already selected
         if floor in elevator.selected_floors:
-            logger.info(f"Controller: Floor {floor} already selected for elevator {elevator_id}")
+            logger.info("Controller: Floor %s already selected for elevator %s", floor, elevator_id)
             return
 
+        # A floor selected where the last hall call was served is a destination of that call
+        call = elevator.last_call
+        if call is not None and call.floor == elevator.current_floor:
+            self.destination_model.observe(call.floor, call.direction, floor)
+
         try:
             elevator.selected_floors.add(floor)
             event = elevator.commit_floor(floor, Direction.IDLE)
             if self.config.strategy == Strategy.OPTIMAL:
-                self.optimal_reassign()
+                self.reoptimize()
             await event.wait()
             event_bus.publish(Event.FLOOR_ARRIVED, floor, elevator_id)
         except asyncio.CancelledError as e:
@@ -363,7 +512,7 @@ class Controller:
             elevator.cancel_commit(floor, Direction.IDLE)
 
     async def deselect_floor(self, floor: FloorLike, elevator_id: ElevatorId):
-        floor = Floor(floor)
+        floor = self.building.parse(floor)
 
         elevator = self.elevators[elevator_id]
 
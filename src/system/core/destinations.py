@@ -0,0 +1,85 @@
+import time
+
+from ..utils.common import Building, Direction, Floor, FloorLike
+
+type DestinationKey = tuple[Floor, Direction, int]
+
+
+class DestinationModel:
+    """
+    Online estimate of where the passengers of a hall call go, learned from the floors selected after each call
+    Destinations are counted per origin floor, call direction and time-of-day bucket
+    Memory is bounded by the number of floors, directions and buckets, and an observation costs O(1) amortized
+    Floor labels are parsed in `building`, the floors of the controller learning the model
+    """
+
+    MIN_SAMPLES = 5  # Observations of a key before its counts replace the prior
+    MAX_SAMPLES = 1000  # Counts of a key are halved when they reach it, so that recent patterns weigh more
+
+    def __init__(self, bucket_seconds: float = 3600.0, building: Building | None = None):
+        if not 0 < bucket_seconds <= 86400:
+            raise ValueError("DestinationModel: bucket_seconds must be in (0, 86400]")
+        self.bucket_seconds = bucket_seconds
+        self.building = building or Building.default
+        self._counts: dict[DestinationKey, dict[Floor, float]] = {}
+        self._totals: dict[DestinationKey, float] = {}
+
+    def bucket(self, timestamp: float | None = None) -> int:
+        """Time-of-day bucket of a wall clock timestamp, now by default"""
+        t = time.localtime(timestamp)
+        return int((t.tm_hour * 3600 + t.tm_min * 60 + t.tm_sec) // self.bucket_seconds)
+
+    def observe(self, origin: FloorLike, direction: Direction, destination: FloorLike, timestamp: float | None = None) -> bool:
+        """Count a floor selected by a passenger of a hall call; return False if it is not in the direction of the call"""
+        origin, destination = self.building.parse(origin), self.building.parse(destination)
+        if not origin.is_of(direction, destination):
+            return False
+        key = (origin, direction, self.bucket(timestamp))
+        counts = self._counts.setdefault(key, {})
+        counts[destination] = counts.get(destination, 0.0) + 1.0
+        total = self._totals.get(key, 0.0) + 1.0
+        if total >= self.MAX_SAMPLES:
+            for floor in counts:
+                counts[floor] /= 2
+            total /= 2
+        self._totals[key] = total
+        return True
+
+    def distribution(self, origin: Floor, direction: Direction, bucket: int) -> dict[Floor, float]:
+        """
+        Probability of each destination of a hall call
+        Until the key has enough observations, the prior is an even chance of the nearest and the furthest floor in the call direction
+        """
+        key = (origin, direction, bucket)
+        total = self._totals.get(key, 0.0)
+        if total >= self.MIN_SAMPLES:
+            return {floor: count / total for floor, count in self._counts[key].items()}
+
+        nearest = origin + direction
+        furthest = origin.building.highest if direction == Direction.UP else origin.building.lowest
+        if nearest == furthest:
+            return {nearest: 1.0}
+        return {nearest: 0.5, furthest: 0.5}
+
+    def samples(self, origin: FloorLike, direction: Direction, bucket: int) -> float:
+        """Weight of the observations of a key, after halving"""
+        return self._totals.get((self.building.parse(origin), direction, bucket), 0.0)
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self._totals.clear()
+
+    def set_building(self, building: Building) -> None:
+        """
+        Learn on the floors of `building`
+        The observations are kept, on the floors of `building`, if it has the same floor labels, and forgotten otherwise
+        """
+        if building is self.building:
+            return
+        if building.labels == self.building.labels:
+            floor = building.floor
+            self._counts = {(floor(int(origin)), direction, bucket): {floor(int(f)): c for f, c in counts.items()} for (origin, direction, bucket), counts in self._counts.items()}
+            self._totals = {(floor(int(origin)), direction, bucket): total for (origin, direction, bucket), total in self._totals.items()}
+        else:
+            self.clear()
+        self.building = building
@@ -1,12 +1,16 @@
 import asyncio
 import bisect
 import inspect
+import math
+import time
+from array import array
 from copy import copy
 from dataclasses import dataclass, field
-from itertools import chain, combinations_with_replacement, pairwise
-from typing import Generator, Iterator, Self, SupportsIndex, overload
+from itertools import chain, combinations_with_replacement
+from typing import Callable, Generator, Iterable, Iterator, Self, SupportsIndex, overload
 
 from ..utils.common import (
+    Building,
     Direction,
     DoorDirection,
     DoorState,
@@ -17,9 +21,13 @@ from ..utils.common import (
     Floor,
     FloorAction,
     FloorLike,
+    MotionModel,
     cancel,
 )
 from ..utils.event_bus import event_bus
+from ..utils.metrics import Metrics
+from ..utils.tracing import NULL_SPAN, tracer
+from .destinations import DestinationModel
 from .logger import logger
 
 
@@ -30,19 +38,113 @@ class TargetFloors(list[FloorAction]):
     The list is sorted based on the direction and floor number.
     """
 
-    def __init__(self, direction: Direction):
+    def __init__(self, direction: Direction, building: Building | None = None):
         super().__init__()
+        self.building = building or Building.default
         self.direction = direction
         self.nonemptyEvent = asyncio.Event()
+        self.prefix: list[float] = []  # Floors traveled from the first action to each action, kept in step with the list
 
     def add(self, floor: FloorLike, direction: Direction):
         assert direction in (Direction.IDLE, self.direction), f"Direction of requested action {direction.name} does not match the chain direction {self.direction.name}"
-        bisect.insort(self, FloorAction(floor, direction), key=self.key)
+        action = FloorAction(self.building.parse(floor), direction)
+        index = bisect.bisect_right(self, action if self.key is None else self.key(action), key=self.key)
+        self.insert(index, action)
+        self._shift_prefix(index, inserted=True)
         if not self.is_empty():
             self.nonemptyEvent.set()
 
+    def _shift_prefix(self, index: int, inserted: bool):
+        """Update the prefix sums after an action is inserted at, or removed from, `index`"""
+        prefix = self.prefix
+        distance = self.building.distance
+        if not inserted:
+            prefix.pop(index)
+        else:
+            prefix.insert(index, 0.0 if index == 0 else prefix[index - 1] + distance(self[index - 1].floor, self[index].floor))
+            index += 1
+        if index >= len(self):
+            return
+        # the link to the action after `index` changed, shift the sums of the rest of the chain
+        head = 0.0 if index == 0 else prefix[index - 1] + distance(self[index - 1].floor, self[index].floor)
+        delta = head - prefix[index]
+        if delta:
+            for i in range(index, len(prefix)):
+                prefix[i] += delta
+
+    @property
+    def span(self) -> float:
+        """Floors traveled from the first action to the last"""
+        return self.prefix[-1] if self.prefix else 0.0
+
+    def guess_destinations(self, destination_heuristic: DestinationHeuristic) -> tuple[Floor, float, int]:
+        """
+        Extend the chain with a guessed destination for each of its hall calls, without adding them.
+        A guessed destination is an IDLE stop one floor past the call (NEAREST) or at the end of the building (FURTHEST),
+        merged with the IDLE stops already planned. The chain is sorted, so the extra travel only depends on its last floor.
+
+        Returns:
+            tuple[Floor, float, int]: the last floor of the extended chain, the floors traveled through it and the number of stops added.
+        """
+        last = self[-1].floor
+        calls = [a for a in self if a.direction != Direction.IDLE]
+        if not calls:
+            return last, self.span, 0
+        match destination_heuristic:
+            case DestinationHeuristic.NEAREST:
+                guesses = {a.floor + a.direction for a in calls}
+            case DestinationHeuristic.FURTHEST:
+                guesses = {self.building.highest if self.direction == Direction.UP else self.building.lowest}
+            case _:
+                raise ValueError(f"Invalid destination heuristic {destination_heuristic}")
+        guesses.difference_update(a.floor for a in self if a.direction == Direction.IDLE)
+        if not guesses:
+            return last, self.span, 0
+        end = max(guesses) if self.direction == Direction.UP else min(guesses)
+        if (int(end) - int(last)) * self.direction > 0:
+            return end, self.span + self.building.distance(last, end), len(guesses)
+        return last, self.span, len(guesses)
+
+    def expect_destinations(self, destination_model: DestinationModel, bucket: int) -> tuple[dict[Floor, float], float, float]:
+        """
+        Extend the chain with the destinations of its hall calls drawn from `destination_model`, without adding them.
+        Destinations of different calls are independent: a floor is an extra stop unless no passenger goes there,
+        and the chain ends at the furthest of its last stop and the destinations.
+
+        Returns:
+            tuple[dict[Floor, float], float, float]: the probability of each last floor of the extended chain, the expected floors traveled through it and the expected number of stops added.
+        """
+        last = self[-1].floor
+        distributions = [destination_model.distribution(a.floor, a.direction, bucket) for a in self if a.direction != Direction.IDLE]
+        if not distributions:
+            return {last: 1.0}, self.span, 0.0
+        planned = {a.floor for a in self if a.direction == Direction.IDLE}
+        floors = sorted(set(chain.from_iterable(distributions)) | {last}, key=lambda f: int(f) * self.direction)
+
+        distance = self.building.distance
+        ends: dict[Floor, float] = {}
+        span = self.span
+        added = 0.0
+        cumulative = [0.0] * len(distributions)  # probability that each destination is at or before the floor
+        reached = 0.0  # probability that the chain ends at or before the floor
+        for floor in floors:
+            missed = 1.0
+            for i, d in enumerate(distributions):
+                p = d.get(floor, 0.0)
+                cumulative[i] += p
+                missed *= 1.0 - p
+            if floor not in planned:
+                added += 1.0 - missed
+            if (int(floor) - int(last)) * self.direction >= 0:
+                p_end = math.prod(cumulative) - reached
+                if p_end > 0.0:
+                    ends[floor] = p_end
+                    span += p_end * distance(last, floor)
+                reached += p_end
+        return ends, span, added
+
     def add_unique(self, floor: FloorLike, direction: Direction):
-        action = FloorAction(floor, direction)
+        action = FloorAction(self.building.parse(floor), direction)
         if action not in self:
             self.add(floor, direction)
 
@@ -53,22 +155,27 @@ class TargetFloors(list[FloorAction]):
         return self[-1]
 
     def remove(self, action: FloorAction):
-        super().remove(action)
-        if len(self) == 0:
-            self.nonemptyEvent.clear()
+        self.pop(self.index(action))
 
     def pop(self, index: SupportsIndex = -1) -> FloorAction:
+        index = range(len(self))[index]
         action = super().pop(index)
+        self._shift_prefix(index, inserted=False)
         if len(self) == 0:
             self.nonemptyEvent.clear()
         return action
 
+    def clear(self):
+        super().clear()
+        self.prefix.clear()
+
     def is_empty(self) -> bool:
         return len(self) == 0
 
     def copy(self) -> Self:
-        new_copy = self.__class__(self.direction)
+        new_copy = self.__class__(self.direction, self.building)
         new_copy.extend(self)
+        new_copy.prefix = self.prefix.copy()
         new_copy.nonemptyEvent = asyncio.Event()
         if not self.is_empty():
             new_copy.nonemptyEvent.set()
@@ -84,14 +191,18 @@ class TargetFloors(list[FloorAction]):
             return
         assert all(d == Direction.IDLE for _, d in self)
         self._direction = new_direction
+        self.key = self.sort_key(new_direction)
 
-        match new_direction:
+    @staticmethod
+    def sort_key(direction: Direction) -> Callable[[FloorAction], tuple[int, int]] | None:
+        """Order of the actions in a chain going in `direction`"""
+        match direction:
             case Direction.UP:
-                self.key = lambda x: (x[0], x[1])
+                return lambda x: (x[0], x[1])
             case Direction.DOWN:
-                self.key = lambda x: (-x[0], -x[1])
+                return lambda x: (-x[0], -x[1])
             case Direction.IDLE:
-                self.key = None
+                return None
 
 
 class TargetFloorChains:
@@ -99,10 +210,12 @@ class TargetFloorChains:
         self,
         event_loop: asyncio.AbstractEventLoop | asyncio.TaskGroup | None = None,
         exit_event: asyncio.Event | None = None,
+        building: Building | None = None,
     ):
-        self.current_chain = TargetFloors(Direction.IDLE)
-        self.next_chain = TargetFloors(Direction.IDLE)
-        self.future_chain = TargetFloors(Direction.IDLE)
+        self.building = building or Building.default
+        self.current_chain = TargetFloors(Direction.IDLE, self.building)
+        self.next_chain = TargetFloors(Direction.IDLE, self.building)
+        self.future_chain = TargetFloors(Direction.IDLE, self.building)
         self.swap_event = asyncio.Event()
         if event_loop is None:
             self.event_loop = asyncio.get_event_loop()
@@ -129,13 +242,20 @@ class TargetFloorChains:
     def nonemptyEvent(self) -> asyncio.Event:
         return self.current_chain.nonemptyEvent
 
+    def set_building(self, building: Building) -> None:
+        """Plan in another building, the chains must be empty"""
+        assert self.is_empty(), "Cannot change the building of chains with actions"
+        self.building = building
+        for target_chain in self.chains:
+            target_chain.building = building
+
     def _swap_chains(self):
         """
         Swap the current chain with the next chain and the next chain with the future chain.
         This is used when the current chain is empty and we need to move to the next chain.
         """
         self.swap_event.set()
-        self.current_chain, self.next_chain, self.future_chain = self.next_chain, self.future_chain, TargetFloors(-self.future_chain.direction)
+        self.current_chain, self.next_chain, self.future_chain = self.next_chain, self.future_chain, TargetFloors(-self.future_chain.direction, self.building)
 
     def pop(self) -> FloorAction:
         try:
@@ -267,7 +387,7 @@ class TargetFloorChains:
         self.direction = Direction.IDLE
 
     def __copy__(self) -> Self:
-        c = self.__class__(event_loop=self.event_loop)
+        c = self.__class__(event_loop=self.event_loop, building=self.building)
         c.current_chain = self.current_chain.copy()
         c.next_chain = self.next_chain.copy()
         c.future_chain = self.future_chain.copy()
@@ -298,41 +418,91 @@ class TargetFloorChains:
     def __repr__(self) -> str:
         return f"ElevatorActionChains(direction={self.direction.name}, current_chain={self.current_chain}, next_chain={self.next_chain}, future_chain={self.future_chain})"
 
-    def select_chain(self, requested_direction: Direction, target_direction: Direction) -> TargetFloors:
+    def _chain_index(self, requested_direction: Direction, target_direction: Direction) -> tuple[int, Direction]:
         """
-        Select the appropriate target-floor chain for adding a new action.
-        Sets elevator direction if chains are idle.
+        Index of the chain a new action goes to, and the direction of the chains once it is added.
+        Does not change the chains, see `select_chain`.
         """
-        # If idle, initialize the chains' direction
-        if self.direction == Direction.IDLE:
+        direction = self.direction
+        # If idle, the new action sets the chains' direction
+        if direction == Direction.IDLE:
             if requested_direction != Direction.IDLE:
                 # the target is current floor
                 if target_direction in (Direction.IDLE, requested_direction):
-                    self.direction = requested_direction
-                    return self.current_chain
+                    return 0, requested_direction
                 # the target opposite to requested direction
-                else:
-                    assert target_direction != requested_direction
-                    self.direction = target_direction
-                    return self.next_chain
-
-            elif target_direction != Direction.IDLE:
-                self.direction = target_direction
-            return self.current_chain
+                return 1, target_direction
+            return 0, target_direction
         # Internal call: no requested direction
         if requested_direction == Direction.IDLE:
-            if target_direction in (self.direction, Direction.IDLE):
-                return self.current_chain
-            else:
-                return self.next_chain
+            return (0 if target_direction in (direction, Direction.IDLE) else 1), direction
         # External request in current direction
-        if requested_direction == self.direction:
-            if target_direction in (self.direction, Direction.IDLE):
-                return self.current_chain
-            else:
-                return self.future_chain
+        if requested_direction == direction:
+            return (0 if target_direction in (direction, Direction.IDLE) else 2), direction
         # External request in opposite direction
-        return self.next_chain
+        return 1, direction
+
+    def select_chain(self, requested_direction: Direction, target_direction: Direction) -> TargetFloors:
+        """
+        Select the appropriate target-floor chain for adding a new action.
+        Sets elevator direction if chains are idle.
+        """
+        index, direction = self._chain_index(requested_direction, target_direction)
+        if self.direction == Direction.IDLE and direction != Direction.IDLE:
+            self.direction = direction
+        return self.chains[index]
+
+    def probe(self, directed_floor: FloorAction, *, target_direction: Direction, start_pos: float) -> tuple[int, float, int]:
+        """
+        Where `directed_floor` would land if it were added, without adding it.
+        An action equal to one already planned lands on it.
+
+        Returns:
+            tuple[int, float, int]: its index in the plan, the floors traveled from `start_pos` to reach it and the number of stops before it.
+        """
+        index, direction = self._chain_index(directed_floor.direction, target_direction)
+        target_chain = self.chains[index]
+        key = TargetFloors.sort_key(-direction if index == 1 else direction)
+        position = sum(len(c) for c in self.chains[:index])
+        position += bisect.bisect_left(target_chain, directed_floor if key is None else key(directed_floor), key=key)
+
+        n_floors, current_pos = self._travel(start_pos, position)
+        return position, n_floors + self.building.distance(current_pos, directed_floor.floor), position
+
+    def _travel(self, start_pos: float, n_actions: int | None = None) -> tuple[float, float]:
+        """
+        Floors traveled from `start_pos` through the first `n_actions` actions of the plan (all of them by default), from the prefix sums of the chains.
+        Returns the floors traveled and the position reached.
+        """
+        distance = self.building.distance
+        remaining = len(self) if n_actions is None else n_actions
+        n_floors = 0.0
+        position = start_pos
+        for target_chain in self.chains:
+            if remaining <= 0:
+                break
+            if not target_chain:
+                continue
+            last = min(remaining, len(target_chain)) - 1
+            n_floors += distance(position, target_chain[0].floor) + target_chain.prefix[last]
+            position = target_chain[last].floor
+            remaining -= last + 1
+        return n_floors, position
+
+    def get_metric_with(self, directed_floor: FloorAction, *, target_direction: Direction, start_pos: float) -> tuple[float, float]:
+        """
+        Floors traveled and stops of the whole plan once `directed_floor` is added, without adding it.
+        Same as adding it to a copy and calling `get_metric(start_pos)`.
+        """
+        index, _, _ = self.probe(directed_floor, target_direction=target_direction, start_pos=start_pos)
+        n_floors, _ = self._travel(start_pos)
+        distance = self.building.distance
+        previous = self[index - 1].floor if index > 0 else start_pos
+        n_floors += distance(previous, directed_floor.floor)
+        if index < len(self):
+            following = self[index].floor
+            n_floors += distance(directed_floor.floor, following) - distance(previous, following)
+        return n_floors, len(self) + 1
 
     def add(self, directed_floor: FloorAction, *, target_direction: Direction):
         floor, requested_direction = directed_floor
@@ -344,45 +514,118 @@ class TargetFloorChains:
     def chains(self) -> tuple[TargetFloors, TargetFloors, TargetFloors]:
         return self.current_chain, self.next_chain, self.future_chain
 
-    def get_metric(self, start_pos: float, destination_heuristic: DestinationHeuristic = DestinationHeuristic.NONE) -> tuple[float, float]:
+    def get_metric(
+        self, start_pos: float, destination_heuristic: DestinationHeuristic = DestinationHeuristic.NONE, destination_model: DestinationModel | None = None, bucket: int | None = None
+    ) -> tuple[float, float]:
         """
         Estimate the number of floors traveled and stops needed to reach the target floor.
         This is used for calculating the travel time.
+        The LEARNED heuristic uses `destination_model`, or only its prior if there is none, in the time-of-day `bucket`, the current one by default.
         """
         match destination_heuristic:
             case DestinationHeuristic.NONE:
-                n_floors = sum(abs(f1 - f2) for f1, f2 in pairwise((start_pos,) + tuple(a.floor for a in self)))
+                n_floors, _ = self._travel(start_pos)
+                return n_floors, len(self)
+            case DestinationHeuristic.NEAREST | DestinationHeuristic.FURTHEST:
+                # every hall call also stops at a guessed destination in its chain, see `TargetFloors.guess_destinations`
+                distance = self.building.distance
+                n_floors = 0.0
                 n_stops = len(self)
+                position = start_pos
+                for target_chain in self.chains:
+                    if not target_chain:
+                        continue
+                    last, span, added = target_chain.guess_destinations(destination_heuristic)
+                    n_floors += distance(position, target_chain[0].floor) + span
+                    n_stops += added
+                    position = last
                 return n_floors, n_stops
-            case DestinationHeuristic.NEAREST | DestinationHeuristic.FURTHEST:
-                clone = copy(self)
-                for chain, clone_chain in zip(self.chains, clone.chains):
-                    for action in chain:
-                        match action.direction:
-                            case Direction.IDLE:
-                                continue
-                            case Direction.UP:
-                                match destination_heuristic:
-                                    case DestinationHeuristic.NEAREST:
-                                        clone_chain.add_unique(action.floor + 1, Direction.IDLE)
-                                    case DestinationHeuristic.FURTHEST:
-                                        clone_chain.add_unique(Floor.max, Direction.IDLE)
-                            case Direction.DOWN:
-                                match destination_heuristic:
-                                    case DestinationHeuristic.NEAREST:
-                                        clone_chain.add_unique(action.floor - 1, Direction.IDLE)
-                                    case DestinationHeuristic.FURTHEST:
-                                        clone_chain.add_unique(Floor.min, Direction.IDLE)
-                return clone.get_metric(start_pos)
             case DestinationHeuristic.MEAN:
                 # the mean of the nearest and furthest destinations
                 nearest = self.get_metric(start_pos, DestinationHeuristic.NEAREST)
                 furthest = self.get_metric(start_pos, DestinationHeuristic.FURTHEST)
                 return ((nearest[0] + furthest[0]) / 2, (nearest[1] + furthest[1]) / 2)
+            case DestinationHeuristic.LEARNED:
+                # expected metric, the position between two chains is a distribution over floors
+                if destination_model is None:
+                    destination_model = DestinationModel()
+                if bucket is None:
+                    bucket = destination_model.bucket()
+                distance = self.building.distance
+                n_floors = 0.0
+                n_stops = float(len(self))
+                positions: dict[float, float] = {start_pos: 1.0}
+                for target_chain in self.chains:
+                    if not target_chain:
+                        continue
+                    first = target_chain[0].floor
+                    ends, span, added = target_chain.expect_destinations(destination_model, bucket)
+                    n_floors += sum(p * distance(position, first) for position, p in positions.items()) + span
+                    n_stops += added
+                    positions = ends
+                return n_floors, n_stops
+            case _:
+                raise ValueError(f"Invalid destination heuristic {destination_heuristic}")
+
+
+class ElevatorStateTable:
+    """
+    Array-of-structs holding the hot numeric state of a fleet of elevators, one row of doubles per elevator:
+    floor index, state, moving timestamp, moving speed and door timestamp
+    Unset timestamps and speeds are stored as NaN
+    Rows are addressed by their offset in `data`, freed rows are reused by the next allocation
+    """
+
+    FLOOR, STATE, MOVING_TIMESTAMP, MOVING_SPEED, DOOR_TIMESTAMP = range(5)
+    STRIDE = 5
+
+    __slots__ = ("data", "_free")
+
+    def __init__(self):
+        self.data = array("d")
+        self._free: list[int] = []
 
+    def __len__(self) -> int:
+        return len(self.data) // self.STRIDE - len(self._free)
+
+    def allocate(self, row: Iterable[float] | None = None, building: Building | None = None) -> int:
+        """Store a row and return its offset, by default an elevator at rest on the ground floor of `building`"""
+        if row is None:
+            row = ((building or Building.default).ground, ElevatorState.STOPPED_DOOR_CLOSED, math.nan, math.nan, math.nan)
+        if self._free:
+            offset = self._free.pop()
+            self.data[offset : offset + self.STRIDE] = array("d", row)
+        else:
+            offset = len(self.data)
+            self.data.extend(row)
+        return offset
+
+    def release(self, offset: int) -> None:
+        self._free.append(offset)
+
+    def row(self, offset: int) -> array:
+        return self.data[offset : offset + self.STRIDE]
+
+    def copy(self) -> Self:
+        c = self.__class__()
+        c.data = array("d", self.data)
+        c._free = self._free.copy()
+        return c
+
+
+_ELEVATOR_STATES = {s.value: s for s in ElevatorState}
+_ETA_PREFIXES = {Direction.UP: "up_eta", Direction.DOWN: "down_eta", Direction.IDLE: "eta"}  # a floor may have a stop of each direction, like `floor_arrived@`
+
+
+def _resolve(future: asyncio.Future, value: bool) -> None:
+    if not future.done():
+        future.set_result(value)
 
-@dataclass
+
+@dataclass(slots=True)
 class Elevator:
+    ETA_RESOLUTION = 0.1  # Smallest change of an arrival estimate worth an `eta@` message (seconds)
+
     # Attributes
     id: ElevatorId  # Using int for ID
 
@@ -390,6 +633,9 @@ class Elevator:
     accelerate_duration: float = 1.0
     door_move_duration: float = 1.0
     door_stay_duration: float = 3.0
+    motion_model: MotionModel = MotionModel.CONSTANT
+    eta_messages: bool = False  # Send `[up_|down_]eta@<floor>#<id>:<seconds>` when the arrival estimate of a committed stop is new or changes
+    building: Building = field(default=Building.default, repr=False)  # Geometry of the building, floors are read and parsed with it
 
     @property
     def accelerate_distance(self) -> float:
@@ -404,10 +650,7 @@ class Elevator:
         return self.max_speed / self.accelerate_duration
 
     queue: asyncio.Queue = field(default_factory=asyncio.Queue)  # the queue to put events in
-    door_idle_event: asyncio.Event = field(default_factory=asyncio.Event)  # exclusive lock for move and door
 
-    _current_floor: Floor = Floor(1)  # Initial floor
-    _state: ElevatorState = ElevatorState.STOPPED_DOOR_CLOSED
     selected_floors: set[Floor] = field(default_factory=set)  # Internal button target floors
 
     # Internal state
@@ -420,34 +663,180 @@ class Elevator:
     # e.g. []
     target_floor_arrived: dict[FloorAction, asyncio.Event] = field(default_factory=dict)
 
-    _moving_timestamp: float | None = None  # Timestamp when movement starts
-    _moving_speed: float | None = None  # Speed of the elevator during movement, None if not moving
-    _door_last_state_change_time: float | None = None  # Timestamp when door movement starts
-
-    door_loop_started: asyncio.Event = field(default_factory=asyncio.Event)  # Event to indicate that the door loop has started
-    move_loop_started: asyncio.Event = field(default_factory=asyncio.Event)  # Event to indicate that the move loop has started
-
-    door_action_queue: asyncio.Queue = field(default_factory=asyncio.Queue)  # Queue for actions to be executed
-    door_action_processed: asyncio.Event = field(default_factory=asyncio.Event)
+    # Asyncio primitives, created on first use only
+    _door_idle_event: asyncio.Event | None = field(default=None, repr=False)  # exclusive lock for move and door
+    _door_loop_started: asyncio.Event | None = field(default=None, repr=False)  # Event to indicate that the door loop has started
+    _move_loop_started: asyncio.Event | None = field(default=None, repr=False)  # Event to indicate that the move loop has started
+    _door_action_queue: asyncio.Queue | None = field(default=None, repr=False)  # Queue for actions to be executed
+    _door_action_processed: asyncio.Event | None = field(default=None, repr=False)
+
+    # Estimated arrival time (event loop clock) of every committed stop, updated when the plan changes; None for simulation copies
+    target_floor_eta: dict[FloorAction, float] | None = field(default_factory=dict)
+
+    # Current run, see `_run_to`: start time of its profile, origin floor, direction, distance, and distance traveled and speed when the profile starts,
+    # then the passing time of each floor, and number of floors passed so far
+    _run: tuple[float, Floor, Direction, float, float, float] | None = field(default=None, repr=False)
+    _passes: list[float] = field(default_factory=list, repr=False)
+    _passed: int = field(default=0, repr=False)
+    _run_waiter: asyncio.Future | None = field(default=None, repr=False)  # Resolved by the end of the run, or by a change of the targets
+    _pass_timer: asyncio.TimerHandle | None = field(default=None, repr=False)  # Wakes up at the next floor pass while floor changes are observed
+
+    metrics: Metrics | None = None  # Registry to report event loop lag and state dwell times to
+    destination_model: DestinationModel | None = field(default=None, repr=False)  # Destinations of the hall calls, for the LEARNED heuristic
+    last_call: FloorAction | None = field(default=None, repr=False)  # Hall call served at the current stop until the doors close, the floors selected meanwhile are its destinations
+    _state_entered_time: float = field(default_factory=time.monotonic)  # Timestamp when the current state was entered
+
+    # Hot numeric state, stored in a row of a table shared by the fleet (see `Elevators`), or of a private table
+    _states: ElevatorStateTable = field(default_factory=ElevatorStateTable, repr=False)
+    _offset: int = field(init=False, repr=False)
+
+    # Set by `start`
+    event_loop: asyncio.AbstractEventLoop = field(init=False, repr=False)
+    exit_event: asyncio.Event = field(init=False, repr=False)
+    target_floor_chains: TargetFloorChains = field(init=False, repr=False)
+    door_loop_task: asyncio.Task = field(init=False, repr=False)
+    move_loop_task: asyncio.Task = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._offset = self._states.allocate(building=self.building)
+
+    def set_building(self, building: Building) -> None:
+        """
+        Serve another geometry of the building, staying at the floor with the same label, or going back to the ground floor if there is none
+        The elevator must not move nor have committed stops, the floors and actions of the previous building are not valid in the new one
+        """
+        if self.target_floor_arrived or self._run is not None:
+            raise ValueError(f"Elevator {self.id}: cannot change the building with committed stops")
+        label = str(self.current_floor)
+        self.building = building
+        try:
+            self._current_floor = building.parse(label)
+        except ValueError:
+            self._current_floor = building.ground
+        self.last_call = None
+        if self.is_started:
+            self.target_floor_chains.set_building(building)
+
+    def attach(self, states: ElevatorStateTable) -> None:
+        """Move the hot state of the elevator to a row of `states`"""
+        if states is self._states:
+            return
+        offset = states.allocate(self._states.row(self._offset))
+        self._states.release(self._offset)
+        self._states, self._offset = states, offset
 
-    # Update fields for time estimation
-    _total_travel_time: float = 0.0  # Total travel time for all planned stops
+    def detach(self) -> None:
+        """Move the hot state of the elevator back to a private table"""
+        self.attach(ElevatorStateTable())
 
-    def copy(self) -> Self:
+    def copy(self, states: ElevatorStateTable | None = None) -> Self:
+        """
+        Copy of the elevator for simulation
+        The copy reads its hot state from `states` at the same offset, which must be a copy of the current table, or from a private snapshot
+        The arrival events are shared, a simulation never sets them
+        """
+        if self._run is not None:
+            self._advance()
         c = copy(self)
+        c._run = None  # the copy stays on the segment being traveled
+        c._run_waiter = None
+        c._pass_timer = None
+        if states is None:
+            c._states = ElevatorStateTable()
+            c._offset = c._states.allocate(self._states.row(self._offset))
+        else:
+            c._states = states
         c.target_floor_chains = copy(self.target_floor_chains)
-        c.target_floor_arrived = {k: asyncio.Event() for k in self.target_floor_arrived}
-        for k, v in self.target_floor_arrived.items():
-            if v.is_set():
-                c.target_floor_arrived[k].set()
-        c.door_action_queue = asyncio.Queue()
-        c.door_action_processed = asyncio.Event()
+        c.target_floor_arrived = self.target_floor_arrived.copy()
+        c.target_floor_eta = None  # simulations do not need the estimates
+        c._door_action_queue = None
+        c._door_action_processed = None
         c.queue = asyncio.Queue()
         return c
 
+    @property
+    def door_idle_event(self) -> asyncio.Event:
+        if self._door_idle_event is None:
+            self._door_idle_event = asyncio.Event()
+        return self._door_idle_event
+
+    @property
+    def door_loop_started(self) -> asyncio.Event:
+        if self._door_loop_started is None:
+            self._door_loop_started = asyncio.Event()
+        return self._door_loop_started
+
+    @property
+    def move_loop_started(self) -> asyncio.Event:
+        if self._move_loop_started is None:
+            self._move_loop_started = asyncio.Event()
+        return self._move_loop_started
+
+    @property
+    def door_action_queue(self) -> asyncio.Queue:
+        if self._door_action_queue is None:
+            self._door_action_queue = asyncio.Queue()
+        return self._door_action_queue
+
+    @property
+    def door_action_processed(self) -> asyncio.Event:
+        if self._door_action_processed is None:
+            self._door_action_processed = asyncio.Event()
+        return self._door_action_processed
+
+    def _get_timestamp(self, index: int) -> float | None:
+        value = self._states.data[self._offset + index]
+        return None if math.isnan(value) else value
+
+    def _set_timestamp(self, index: int, value: float | None) -> None:
+        self._states.data[self._offset + index] = math.nan if value is None else value
+
+    @property
+    def _current_floor(self) -> Floor:
+        return self.building.floor(int(self._states.data[self._offset + ElevatorStateTable.FLOOR]))
+
+    @_current_floor.setter
+    def _current_floor(self, floor: Floor) -> None:
+        self._states.data[self._offset + ElevatorStateTable.FLOOR] = floor
+
+    @property
+    def _state(self) -> ElevatorState:
+        return _ELEVATOR_STATES[int(self._states.data[self._offset + ElevatorStateTable.STATE])]
+
+    @_state.setter
+    def _state(self, state: ElevatorState) -> None:
+        self._states.data[self._offset + ElevatorStateTable.STATE] = state
+
+    @property
+    def _moving_timestamp(self) -> float | None:
+        """Timestamp when movement starts"""
+        return self._get_timestamp(ElevatorStateTable.MOVING_TIMESTAMP)
+
+    @_moving_timestamp.setter
+    def _moving_timestamp(self, value: float | None) -> None:
+        self._set_timestamp(ElevatorStateTable.MOVING_TIMESTAMP, value)
+
+    @property
+    def _moving_speed(self) -> float | None:
+        """Speed of the elevator during movement, None if not moving"""
+        return self._get_timestamp(ElevatorStateTable.MOVING_SPEED)
+
+    @_moving_speed.setter
+    def _moving_speed(self, value: float | None) -> None:
+        self._set_timestamp(ElevatorStateTable.MOVING_SPEED, value)
+
+    @property
+    def _door_last_state_change_time(self) -> float | None:
+        """Timestamp when door movement starts"""
+        return self._get_timestamp(ElevatorStateTable.DOOR_TIMESTAMP)
+
+    @_door_last_state_change_time.setter
+    def _door_last_state_change_time(self, value: float | None) -> None:
+        self._set_timestamp(ElevatorStateTable.DOOR_TIMESTAMP, value)
+
     async def commit_door(self, door_state: DoorDirection):
         if not self.door_loop_started.is_set():
-            logger.warning(f"door_loop of elevator {self.id} was not started yet.")
+            logger.warning("door_loop of elevator %s was not started yet.", self.id)
         self.door_action_queue.put_nowait(door_state)  # the queue is consumed at door_loop
         self.door_action_processed.clear()
         await self.door_action_processed.wait()
@@ -459,16 +848,16 @@ class Elevator:
         This method not only adds the floor to the appropriate chain but also maintains
         an estimate of the total travel time for each committed floor.
         """
-        floor = Floor(floor)
+        floor = self.building.parse(floor)
 
         if not self.move_loop_started.is_set():
-            logger.warning(f"move_loop of elevator {self.id} was not started yet.")
+            logger.warning("move_loop of elevator %s was not started yet.", self.id)
 
-        logger.debug(f"Elevator {self.id}: Committing floor {floor} with direction {requested_direction.name}")
+        logger.debug("Elevator %s: Committing floor %s with direction %s", self.id, floor, requested_direction.name)
 
         directed_floor = FloorAction(floor, requested_direction)
         if directed_floor in self.target_floor_chains:
-            logger.debug(f"Elevator {self.id}: Floor {floor} with direction {requested_direction.name} already in the action chain")
+            logger.debug("Elevator %s: Floor %s with direction %s already in the action chain", self.id, floor, requested_direction.name)
             return self.target_floor_arrived[directed_floor]
 
         assert isinstance(requested_direction, Direction)
@@ -476,25 +865,67 @@ class Elevator:
         # Determine which chain to add the action to based on current direction and request
         # This is the core of the elevator scheduling algorithm
         self.target_floor_chains.add(directed_floor, target_direction=self.direction_to(floor))
+        if self._run_waiter is not None:
+            _resolve(self._run_waiter, False)
 
         # Create and store the event that will be triggered when floor is reached
         self.target_floor_arrived[directed_floor] = asyncio.Event() if event is None else event
+        self._update_eta()
         return self.target_floor_arrived[directed_floor]
 
     def cancel_commit(self, floor: FloorLike, requested_direction: Direction = Direction.IDLE) -> asyncio.Event | None:
-        floor = Floor(floor)
+        floor = self.building.parse(floor)
         directed_floor = FloorAction(floor, requested_direction)
 
         # Remove the action from the chain
-        logger.debug(f"Elevator {self.id}: Cancelling floor {floor} with direction {requested_direction.name}")
-        logger.debug(f"Elevator {self.id}: {self.target_floor_chains}")
+        logger.debug("Elevator %s: Cancelling floor %s with direction %s", self.id, floor, requested_direction.name)
+        logger.debug("Elevator %s: %s", self.id, self.target_floor_chains)
 
         if directed_floor in self.target_floor_chains:
             self.target_floor_chains.remove(directed_floor)
+            if self._run_waiter is not None:
+                _resolve(self._run_waiter, False)
 
             assert directed_floor in self.target_floor_arrived
+            self._update_eta()
             return self.target_floor_arrived.pop(directed_floor)  # .set()
 
+    def _update_eta(self) -> None:
+        """
+        Recompute the arrival time of every committed stop, walking the plan from the current position
+        Legs take the run time of the motion model, the leg being traveled ends at its planned time, and every stop adds a door cycle
+        """
+        previous = self.target_floor_eta
+        if previous is None:
+            return
+        now = self.event_loop.time()
+        building = self.building
+        door_cycle = 2 * self.door_move_duration + self.door_stay_duration
+
+        eta: dict[FloorAction, float] = {}
+        clock = now
+        position: float = self.current_position
+        run_end: Floor | None = None
+        if self._run is None:
+            clock += self.estimate_door_close_time()
+        else:
+            _, origin, step, *_ = self._run
+            run_end = origin + len(self._passes) * step
+        for action in self.target_floor_chains:
+            if not eta and action.floor == run_end:
+                clock = max(self._passes[-1], now)
+            else:
+                clock += self.run_time(building.distance(position, action.floor))
+            eta[action] = clock
+            clock += door_cycle
+            position = action.floor
+        self.target_floor_eta = eta
+
+        if self.eta_messages:
+            for action, arrival in eta.items():
+                if action not in previous or abs(previous[action] - arrival) >= self.ETA_RESOLUTION:
+                    self.queue.put_nowait(f"{_ETA_PREFIXES[action.direction]}@{action.floor}#{self.id}:{arrival - now:.1f}")
+
     def estimate_door_close_time(self) -> float:
         """
         Estimate the time until the door finally closes.
@@ -535,64 +966,213 @@ class Elevator:
             case ElevatorState.STOPPED_DOOR_CLOSED:
                 duration = self.door_move_duration
             case _:
-                logger.error(f"Invalid elevator state {self.state.name} for estimating door open time")
+                logger.error("Invalid elevator state %s for estimating door open time", self.state.name)
                 raise ValueError(f"Invalid elevator state {self.state.name} for estimating door open time")
         if duration < 0:
             duration = 0.0
         return duration
 
-    def calculate_duration(self, n_floors: float, n_stops: int | float) -> float:
+    def _profile(self, distance: float, speed: float) -> tuple[float, float, float]:
+        """Peak speed of a trapezoidal run of `distance` floors to a stop, entered at `speed`, and the distances to reach it and to brake from it"""
+        acceleration = self.acceleration
+        peak = min(self.max_speed, math.sqrt(acceleration * distance + speed * speed / 2))
+        return peak, (peak * peak - speed * speed) / (2 * acceleration), peak * peak / (2 * acceleration)
+
+    def run_time(self, distance: float, traveled: float | None = None, speed: float = 0.0) -> float:
+        """
+        Time after the start of a run of `distance` floors to a stop, entered at `speed` (from a stop by default), at which `traveled` floors are passed (the whole run by default)
+        Closed form of the motion model: with the trapezoidal one, the car accelerates up to max speed, or up to the speed it can still brake from, cruises, then decelerates
+        """
+        if traveled is None:
+            traveled = distance
+        if self.motion_model == MotionModel.CONSTANT or self.accelerate_duration <= 0:
+            return traveled * self.floor_travel_duration
+        acceleration = self.acceleration
+        peak, ramp, brake = self._profile(distance, speed)
+        if traveled <= ramp:
+            return (math.sqrt(speed * speed + 2 * acceleration * traveled) - speed) / acceleration
+        ramp_time = (peak - speed) / acceleration
+        total = ramp_time + max(distance - ramp - brake, 0.0) / self.max_speed + peak / acceleration
+        if traveled >= distance - brake:
+            return total - math.sqrt(2 * max(distance - traveled, 0.0) / acceleration)
+        return ramp_time + (traveled - ramp) / self.max_speed
+
+    def _run_state(self, elapsed: float, distance: float, speed: float = 0.0) -> tuple[float, float]:
+        """Floors traveled and speed `elapsed` seconds after the start of a run of `distance` floors entered at `speed`, the inverse of `run_time`"""
+        if self.motion_model == MotionModel.CONSTANT or self.accelerate_duration <= 0:
+            return min(elapsed / self.floor_travel_duration, distance), self.max_speed
+        acceleration = self.acceleration
+        peak, ramp, brake = self._profile(distance, speed)
+        ramp_time = (peak - speed) / acceleration
+        if elapsed <= ramp_time:
+            return speed * elapsed + acceleration * elapsed * elapsed / 2, speed + acceleration * elapsed
+        cruise_time = max(distance - ramp - brake, 0.0) / self.max_speed
+        if elapsed <= ramp_time + cruise_time:
+            return ramp + (elapsed - ramp_time) * self.max_speed, peak
+        remaining = max(ramp_time + cruise_time + peak / acceleration - elapsed, 0.0)
+        return distance - acceleration * remaining * remaining / 2, acceleration * remaining
+
+    def calculate_duration(self, n_floors: float, n_stops: int | float, n_runs: int | float | None = None) -> float:
         """
         Calculate travel duration based on floors and stops.
+        With the trapezoidal motion model, the floors are split evenly into `n_runs` runs, by default the runs to the `n_stops` stops and to the target;
+        this is exact when every run reaches max speed, and an upper bound otherwise
         """
-        return n_floors * self.floor_travel_duration + n_stops * (self.door_move_duration * 2 + self.door_stay_duration)
+        doors = n_stops * (self.door_move_duration * 2 + self.door_stay_duration)
+        if self.motion_model == MotionModel.CONSTANT:
+            return n_floors * self.floor_travel_duration + doors
+        if n_runs is None:
+            n_runs = n_stops + 1
+        if n_floors <= 0 or n_runs <= 0:
+            return doors
+        return n_runs * self.run_time(n_floors / n_runs) + doors
+
+    def _braking_distance(self, distance: float, speed: float = 0.0) -> float:
+        """Distance a run of `distance` floors entered at `speed` needs to stop from its peak speed"""
+        if self.motion_model == MotionModel.CONSTANT or self.accelerate_duration <= 0:
+            return 0.0
+        return self._profile(distance, speed)[2]
+
+    def _plan_run(self, start: float, origin: Floor, target: Floor, offset: float = 0.0, speed: float = 0.0) -> None:
+        """
+        Compute the time at which a run from `origin` to `target` passes each of the floors it has not passed yet,
+        for a profile starting at `start`, `offset` floors from `origin`, at `speed`
+        """
+        building = self.building
+        step = origin.direction_to(target)
+        base = building.elevation(origin)
+        distance = abs(building.elevation(target) - base)
+        self._run = (start, origin, step, distance, offset, speed)
+        del self._passes[self._passed :]
+        self._passes.extend(
+            start + self.run_time(distance - offset, abs(building.elevation(origin + k * step) - base) - offset, speed) for k in range(self._passed + 1, abs(target - origin) + 1)
+        )
+
+    def _advance(self, now: float | None = None) -> None:
+        """
+        Account for the floors the current run has passed by `now`: move the current floor through each of them in order, publishing every floor change
+        with the moving timestamp set to its planned passing time, and the moving speed to the segment that follows it
+        Called at the sync points of the run (its end, a change of the targets, the next floor pass while floor changes are observed) and by the readers of the position
+        """
+        passes = self._passes
+        if now is None:
+            now = self.event_loop.time()
+        passed = bisect.bisect_right(passes, now, lo=self._passed)
+        _, origin, step, *_ = self._run
+        while self._passed < passed:  # a subscriber may read the position, and advance the run, while a floor change is published
+            k = self._passed = self._passed + 1
+            self._moving_timestamp = passes[k - 1]
+            self._moving_speed = 1.0 / max(passes[k] - passes[k - 1], 1e-6) if k < len(passes) else 0.0
+            self.current_floor = origin + k * step
+
+    def _schedule_pass(self) -> None:
+        """
+        Wake up at the next floor pass of the run if floor changes have subscribers, so that they see every floor when it is passed
+        The end of the run has its own timer, and without subscribers the passes are only accounted for at the sync points (see `_advance`)
+        """
+        if self._pass_timer is not None:
+            self._pass_timer.cancel()
+            self._pass_timer = None
+        if self._run is not None and self._passed < len(self._passes) - 1 and event_bus.has_handlers(Event.ELEVATOR_FLOOR_CHANGED):
+            self._pass_timer = self.event_loop.call_at(self._passes[self._passed], self._pass_floor)
+
+    def _pass_floor(self) -> None:
+        self._pass_timer = None
+        self._advance()  # a timer may fire slightly early, the pass is then rescheduled, a moving timestamp is never in the future
+        self._schedule_pass()
+
+    def _replan(self, now: float) -> None:
+        """
+        Follow a change of the next target during a run
+        The run keeps its profile if the new target is beyond the next floor and the car does not brake yet for the nearer of both targets,
+        otherwise the car brakes from where it is and ends the run at the first floor it can stop at, from which the next run starts
+        """
+        start, origin, step, distance, offset, speed = self._run
+        self._advance(now)
+        if self._passed == len(self._passes):
+            return  # arrived, the timer is about to fire
+        next_floor = origin + (self._passed + 1) * step
+        end = origin + len(self._passes) * step
+        target = None if self.target_floor_chains.is_empty() else self.target_floor_chains.top().floor
+        if target == end:
+            return
+        building = self.building
+        base = building.elevation(origin)
+        if target is not None and (target - next_floor) * step >= 0:
+            shorter = min(distance, abs(building.elevation(target) - base)) - offset
+            if now <= start + self.run_time(shorter, shorter - self._braking_distance(shorter, speed), speed):
+                self._plan_run(start, origin, target, offset, speed)
+                self._moving_speed = 1.0 / max(self._passes[self._passed] - self._moving_timestamp, 1e-6)
+                return
+
+        # Brake now: the car comes to rest `rest` floors from the origin, the run ends at the first floor at or past it
+        traveled, velocity = self._run_state(now - start, distance - offset, speed)
+        position = offset + traveled
+        rest = position
+        if self.motion_model == MotionModel.TRAPEZOIDAL and self.accelerate_duration > 0:
+            rest += velocity * velocity / (2 * self.acceleration)
+        stop = self._passed + 1
+        while stop < len(self._passes) and abs(building.elevation(origin + stop * step) - base) < rest - 1e-9:
+            stop += 1
+        if stop == len(self._passes):
+            return  # already braking for the end of the run
+        self._plan_run(now, origin, origin + stop * step, position, velocity)
+        self._moving_speed = 1.0 / max(self._passes[self._passed] - self._moving_timestamp, 1e-6)
+
+    async def _run_to(self, target_floor: Floor) -> None:
+        """
+        Move to `target_floor` in one run, with a single timer for its end, which is rescheduled only when the next target changes (see `_replan`)
+        """
+        loop = self.event_loop
+        start = loop.time()
+        self._passed = 0
+        self._plan_run(start, self.current_floor, target_floor)
+        self._moving_timestamp = start
+        self._moving_speed = 1.0 / max(self._passes[0] - start, 1e-6)
+        _, origin, step, *_ = self._run
+        self.state = ElevatorState.MOVING_UP if step == Direction.UP else ElevatorState.MOVING_DOWN
+        try:
+            with tracer.span("move", elevator=self.id, floor=origin, target=target_floor) if tracer.enabled else NULL_SPAN:
+                while True:
+                    self._schedule_pass()
+                    end = self._passes[-1]
+                    waiter = self._run_waiter = loop.create_future()
+                    handle = loop.call_at(end, _resolve, waiter, True)
+                    try:
+                        arrived = await waiter
+                    finally:
+                        handle.cancel()
+                        self._run_waiter = None
+                    if arrived:
+                        if self.metrics is not None:
+                            self.metrics.observe("event_loop_lag_seconds", loop.time() - end, loop="move")
+                        self._advance(max(loop.time(), end))
+                        break
+                    self._replan(loop.time())
+                    self._update_eta()
+        finally:
+            self._advance()
+            self._run = None
+            self._schedule_pass()
 
     def _calculate_travel_parameters(self, target_floor: FloorLike, requested_direction: Direction) -> tuple[float, int]:
         """
         Calculate floors traveled and stops needed to reach target floor.
         """
-        target_floor = Floor(target_floor)
-        current_pos = self.current_position
-
-        # Create a simulated plan by copying chains and adding target floor
-        chains_copy = copy(self.target_floor_chains)
-        target_direction = self.direction_to(target_floor)
-
-        # Determine which chain to add the target floor to
-        if chains_copy.direction == Direction.IDLE:
-            chain = chains_copy.current_chain
-            chains_copy.direction = requested_direction if requested_direction != Direction.IDLE else target_direction
-        else:
-            if requested_direction == Direction.IDLE:
-                if target_direction in (chains_copy.direction, Direction.IDLE):
-                    chain = chains_copy.current_chain
-                else:
-                    chain = chains_copy.next_chain
-            else:
-                if requested_direction == chains_copy.direction:
-                    if target_direction in (chains_copy.direction, Direction.IDLE):
-                        chain = chains_copy.current_chain
-                    else:
-                        chain = chains_copy.future_chain
-                else:
-                    chain = chains_copy.next_chain
-
-        # Add target floor to simulated chain
-        chain.add(target_floor, requested_direction)
-
-        # Calculate travel parameters
-        n_floors = 0.0
-        n_stops = 0
-
-        for action in chains_copy:
-            n_floors += abs(action.floor - current_pos)
-            if action.floor == target_floor and action.direction in (requested_direction, Direction.IDLE):
-                break
-            n_stops += 1
-            current_pos = action.floor
-
+        target_floor = self.building.parse(target_floor)
+        directed_floor = FloorAction(target_floor, requested_direction)
+        _, n_floors, n_stops = self.target_floor_chains.probe(directed_floor, target_direction=self.direction_to(target_floor), start_pos=self.current_position)
         return n_floors, n_stops
 
+    async def _sleep(self, duration: float, loop: str):
+        """Sleep for `duration` seconds, and report how late the wakeup fires."""
+        if self.metrics is None:
+            await asyncio.sleep(duration)
+            return
+        wakeup_time = self.event_loop.time() + duration
+        await asyncio.sleep(duration)
+        self.metrics.observe("event_loop_lag_seconds", self.event_loop.time() - wakeup_time, loop=loop)
+
     def pop_target(self) -> FloorAction:
         """
         Pop the next action from the elevator's list of target floors.
@@ -601,12 +1181,16 @@ class Elevator:
         if self.target_floor_chains.is_empty():
             raise IndexError("No actions in the current chain")
 
-        directed_floor = self.target_floor_chains.pop()
+        with tracer.span("pop_target", elevator=self.id) if tracer.enabled else NULL_SPAN:
+            directed_floor = self.target_floor_chains.pop()
 
-        event = self.target_floor_arrived.pop(directed_floor)
-        event.set()
-        logger.debug(f"Elevator {self.id}: Action popped: {directed_floor}")
-        logger.debug(f"Elevator {self.id}: {self.target_floor_chains}")
+            event = self.target_floor_arrived.pop(directed_floor)
+            event.set()
+            self._update_eta()
+            if directed_floor.direction != Direction.IDLE:
+                self.last_call = directed_floor
+        logger.debug("Elevator %s: Action popped: %s", self.id, directed_floor)
+        logger.debug("Elevator %s: %s", self.id, self.target_floor_chains)
         return directed_floor
 
     async def _move_loop(self):
@@ -620,9 +1204,9 @@ class Elevator:
             self.move_loop_started.set()
             while True:
                 # Get the target floor from the plan
-                logger.debug(f"Elevator {self.id}: Waiting for target floor")
+                logger.debug("Elevator %s: Waiting for target floor", self.id)
                 target_floor, direction = directed_floor = await self.target_floor_chains.get()
-                logger.debug(f"Elevator {self.id}: Target floor received: {target_floor} with direction {direction.name}")
+                logger.debug("Elevator %s: Target floor received: %s with direction %s", self.id, target_floor, direction.name)
 
                 if not self.door_idle_event.is_set():
                     # Got target floor while door is not idle, waiting for door to close or may interrupt door closing
@@ -641,7 +1225,7 @@ class Elevator:
 
                 # Wait for the door not open or moving
                 if not self.door_idle_event.is_set():
-                    logger.debug(f"Elevator {self.id}: Waiting for door to close before moving")
+                    logger.debug("Elevator %s: Waiting for door to close before moving", self.id)
                     await self.door_idle_event.wait()
 
                     if not self.target_floor_chains.is_empty() and directed_floor != self.target_floor_chains.top():
@@ -650,21 +1234,9 @@ class Elevator:
 
                 # Start the elevator movement (move from current floor to target floor)
                 self._moving_timestamp = self.event_loop.time()
-                self._moving_speed = self.max_speed
-
-                if self.current_floor < target_floor:
-                    self.state = ElevatorState.MOVING_UP
-                    await asyncio.sleep(self.floor_travel_duration)
-                    self.current_floor += 1
-
-                    if self.target_floor_chains.is_empty():
-                        # target floor deselected
-                        self.state = ElevatorState.STOPPED_DOOR_CLOSED
 
-                elif self.current_floor > target_floor:
-                    self.state = ElevatorState.MOVING_DOWN
-                    await asyncio.sleep(self.floor_travel_duration)
-                    self.current_floor -= 1
+                if self.current_floor != target_floor:
+                    await self._run_to(target_floor)
 
                     if self.target_floor_chains.is_empty():
                         # target floor deselected
@@ -705,7 +1277,7 @@ class Elevator:
                                             self.queue.put_nowait(f"down_{msg}")
                                     break  # we are going to the opposite direction, so we can stop here
                                 # otherwise, we can continue to the next target floor
-                                logger.info(f"Target floor {next_target_floor} is the same as current floor {self.current_floor}, skipping")
+                                logger.info("Target floor %s is the same as current floor %s, skipping", next_target_floor, self.current_floor)
                                 continue
 
                             elif next_target_floor > self.current_floor:
@@ -721,15 +1293,15 @@ class Elevator:
 
                 # Signal that the floor as arrived
         except asyncio.CancelledError as e:
-            logger.debug(f"Elevator {self.id}: Move loop cancelled")
+            logger.debug("Elevator %s: Move loop cancelled", self.id)
             if str(e) != "exit":
                 raise e
         except RuntimeError:
             # current running loop was stopped, e.g. by the program exit
-            logger.warning(f"Elevator {self.id}: Move loop cancelled due to RuntimeError")
+            logger.warning("Elevator %s: Move loop cancelled due to RuntimeError", self.id)
             pass
         except Exception as e:
-            logger.error(f"Elevator {self.id}: Move loop encountered an error: {type(e).__name__}: {e}")
+            logger.error("Elevator %s: Move loop encountered an error: %s: %s", self.id, type(e).__name__, e)
             raise e
         finally:
             self.move_loop_started.clear()
@@ -744,12 +1316,12 @@ class Elevator:
 
                 self.state = ElevatorState.OPENING_DOOR
                 self._door_last_state_change_time = self.event_loop.time() - (self.door_move_duration - duration)
-                await asyncio.sleep(duration)
+                await self._sleep(duration, "door")
                 self.state = ElevatorState.STOPPED_DOOR_OPENED
                 self._door_last_state_change_time = self.event_loop.time()
                 self.queue.put_nowait(f"door_opened#{self.id}")
 
-                await asyncio.sleep(self.door_stay_duration)
+                await self._sleep(self.door_stay_duration, "door")
                 await close_door()
 
             except asyncio.CancelledError as e:
@@ -758,9 +1330,9 @@ class Elevator:
                     raise asyncio.CancelledError from e
                 match self.state:
                     case ElevatorState.OPENING_DOOR:
-                        logger.debug(f"Elevator {self.id}: Door opening cancelled")
+                        logger.debug("Elevator %s: Door opening cancelled", self.id)
                     case ElevatorState.STOPPED_DOOR_OPENED:
-                        logger.debug(f"Elevator {self.id}: Door stay cancelled")
+                        logger.debug("Elevator %s: Door stay cancelled", self.id)
 
         async def close_door(duration: float | None = None):
             if duration is None:
@@ -772,30 +1344,31 @@ class Elevator:
                 self.state = ElevatorState.CLOSING_DOOR
                 self._door_last_state_change_time = self.event_loop.time()
 
-                await asyncio.sleep(duration)
+                await self._sleep(duration, "door")
 
                 self.state = ElevatorState.STOPPED_DOOR_CLOSED
                 self.queue.put_nowait(f"door_closed#{self.id}")
+                self.last_call = None  # the passengers of the call are aboard, the floors selected from now on are not its destinations
 
                 # notify the move_loop
                 self.door_idle_event.set()
                 if self.target_floor_chains.is_empty():
-                    logger.debug(f"Elevator {self.id}: No target floors, setting direction to IDLE")
+                    logger.debug("Elevator %s: No target floors, setting direction to IDLE", self.id)
                     self.committed_direction = Direction.IDLE
 
             except asyncio.CancelledError as e:
                 if len(e.args) == 0:
                     raise e
-                logger.debug(f"Elevator {self.id}: Door closing cancelled")
+                logger.debug("Elevator %s: Door closing cancelled", self.id)
 
         task: asyncio.Task | None = None
 
         try:
             self.door_loop_started.set()
             while True:
-                logger.debug(f"Elevator {self.id}: Wait for door action queue")
+                logger.debug("Elevator %s: Wait for door action queue", self.id)
                 action = await self.door_action_queue.get()
-                logger.debug(f"Elevator {self.id}: Door action received: {action.name}")
+                logger.debug("Elevator %s: Door action received: %s", self.id, action.name)
                 match self.state:
                     case ElevatorState.MOVING_UP | ElevatorState.MOVING_DOWN:
                         logger.info("Cannot commit door state while the elevator is moving or opening")
@@ -814,7 +1387,7 @@ class Elevator:
                             await task
                             assert task.done()
                             duration = self.event_loop.time() - self._door_last_state_change_time
-                            logger.info(f"Door closing is interrupted after {duration}")
+                            logger.info("Door closing is interrupted after %s", duration)
 
                             self.door_idle_event.clear()
                             task = self.event_loop.create_task(open_door(duration), name=f"open_door_{__file__}:{inspect.stack()[0].lineno}")
@@ -831,7 +1404,7 @@ class Elevator:
                 self.door_action_processed.set()
 
         except asyncio.CancelledError:
-            logger.debug(f"Elevator {self.id}: Door loop cancelled")
+            logger.debug("Elevator %s: Door loop cancelled", self.id)
             pass
         finally:
             if task is not None and not task.done():
@@ -842,7 +1415,7 @@ class Elevator:
 
     @property
     def is_started(self) -> bool:
-        return self.move_loop_started.is_set() or self.door_loop_started.is_set()
+        return (self._move_loop_started is not None and self._move_loop_started.is_set()) or (self._door_loop_started is not None and self._door_loop_started.is_set())
 
     async def start(self, tg: asyncio.AbstractEventLoop | asyncio.TaskGroup | None = None):
         if tg is None:
@@ -856,7 +1429,7 @@ class Elevator:
             self.event_loop = asyncio.get_event_loop()
 
         self.exit_event = asyncio.Event()
-        self.target_floor_chains = TargetFloorChains(event_loop=self.event_loop, exit_event=self.exit_event)
+        self.target_floor_chains = TargetFloorChains(event_loop=self.event_loop, exit_event=self.exit_event, building=self.building)
         self.door_idle_event.set()
         if not self.is_started:
             self.door_loop_task = tg.create_task(self._door_loop(), name=f"door_loop_elevator_{self.id} {__file__}:{inspect.stack()[0].lineno}")
@@ -883,7 +1456,7 @@ class Elevator:
 
     @property
     def state(self) -> ElevatorState:
-        return self._state
+        return _ELEVATOR_STATES[int(self._states.data[self._offset + ElevatorStateTable.STATE])]
 
     @property
     def next_target(self) -> FloorAction | None:
@@ -901,36 +1474,43 @@ class Elevator:
 
         # Publish event for state change
         if old_state != new_state:
+            now = time.monotonic()
+            if self.metrics is not None:
+                self.metrics.observe("elevator_state_dwell_seconds", now - self._state_entered_time, elevator=self.id, state=old_state.name)
+            self._state_entered_time = now
             event_bus.publish(Event.ELEVATOR_STATE_CHANGED, self.id, self.current_floor, self.door_state, self.moving_direction)
 
     @property
     def current_floor(self) -> Floor:
+        if self._run is not None:
+            self._advance()
         return self._current_floor
 
     @current_floor.setter
     def current_floor(self, new_floor: FloorLike):
-        new_floor = Floor(new_floor)
+        new_floor = self.building.parse(new_floor)
         if self._current_floor != new_floor:
             self._current_floor = new_floor
 
             # Log floor change
-            logger.debug(f"Elevator {self.id}: floor changed to {new_floor}")
+            logger.debug("Elevator %s: floor changed to %s", self.id, new_floor)
 
             # Publish event for floor change
-            event_bus.publish(Event.ELEVATOR_FLOOR_CHANGED, self.id, self.current_floor, self.door_state, self.moving_direction)
+            event_bus.publish(Event.ELEVATOR_FLOOR_CHANGED, self.id, new_floor, self.door_state, self.moving_direction)
 
     @property
     def current_position(self) -> float:
+        floor = self.current_floor
         match self.moving_direction:
             case Direction.UP:
-                return self._current_floor + self.position_percentage
+                return floor + self.position_percentage
             case Direction.DOWN:
-                return self._current_floor - self.position_percentage
+                return floor - self.position_percentage
 
-        return self._current_floor
+        return floor
 
     def direction_to(self, target_floor: FloorLike) -> Direction:
-        target_floor = Floor(target_floor)
+        target_floor = self.building.parse(target_floor)
         if target_floor > self.current_position:
             return Direction.UP
         elif target_floor < self.current_position:
@@ -987,7 +1567,7 @@ class Elevator:
     def directed_floor(self) -> FloorAction:
         return FloorAction(self.current_floor, self.committed_direction)
 
-    def estimate_total_duration(self, directed_request: FloorAction | None = None, *, destination_heuristic: DestinationHeuristic = DestinationHeuristic.NONE) -> float:
+    def estimate_total_duration(self, directed_request: FloorAction | None = None, *, destination_heuristic: DestinationHeuristic = DestinationHeuristic.NONE, bucket: int | None = None) -> float:
         """
         Estimate the total duration to reach the target floor, including door operations and travel time.
         If `directed_request` is None, it estimates the duration for the current target floor chain.
@@ -996,6 +1576,7 @@ class Elevator:
         Args:
             directed_request (FloorAction | None): The floor action to estimate duration for, or None for current target.
             destination_heuristic (DestinationHeuristic): Heuristic to use for estimating the target floor chain.
+            bucket (int | None): Time-of-day bucket of the destination model for the LEARNED heuristic, the current one by default.
         Returns:
             float: Estimated duration in seconds.
         """
@@ -1005,8 +1586,8 @@ class Elevator:
             if not self.state.is_moving():
                 duration += self.estimate_door_close_time()
 
-            n_floors, n_stops = self.target_floor_chains.get_metric(self.current_position, destination_heuristic)
-            duration += self.calculate_duration(n_floors, n_stops)
+            n_floors, n_stops = self.target_floor_chains.get_metric(self.current_position, destination_heuristic, self.destination_model, bucket)
+            duration += self.calculate_duration(n_floors, n_stops, n_runs=n_stops)
             return duration
 
         assert isinstance(directed_request, FloorAction)
@@ -1020,23 +1601,25 @@ class Elevator:
                 # No further actions, just return the door open time
                 return duration
 
-            n_floors, n_stops = self.target_floor_chains.get_metric(self.current_position, destination_heuristic)
-            duration += self.calculate_duration(n_floors, n_stops)
+            n_floors, n_stops = self.target_floor_chains.get_metric(self.current_position, destination_heuristic, self.destination_model, bucket)
+            duration += self.calculate_duration(n_floors, n_stops, n_runs=n_stops)
             return duration
 
         # If not at requested floor, add the target floor to the chain
         target_direction = self.direction_to(target_floor)
-        chain_copy = copy(self.target_floor_chains)
-        chain_copy.add(directed_request, target_direction=target_direction)
+        if destination_heuristic == DestinationHeuristic.NONE:
+            n_floors, n_stops = self.target_floor_chains.get_metric_with(directed_request, target_direction=target_direction, start_pos=self.current_position)
+        else:
+            chain_copy = copy(self.target_floor_chains)
+            chain_copy.add(directed_request, target_direction=target_direction)
+            n_floors, n_stops = chain_copy.get_metric(self.current_position, destination_heuristic, self.destination_model, bucket)
 
         # If not at requested floor, estimate time to reach it
         if not self.state.is_moving():
             duration += self.estimate_door_close_time()
 
-        n_floors, n_stops = chain_copy.get_metric(self.current_position, destination_heuristic)
-
         # Add travel time for all floors and stops
-        duration += self.calculate_duration(n_floors, n_stops)
+        duration += self.calculate_duration(n_floors, n_stops, n_runs=n_stops)
         return duration
 
 
@@ -1054,7 +1637,13 @@ class Elevators(dict[ElevatorId, Elevator]):
         accelerate_duration: float,
         door_move_duration: float,
         door_stay_duration: float,
+        metrics: Metrics | None = None,
+        motion_model: MotionModel = MotionModel.CONSTANT,
+        eta_messages: bool = False,
+        destination_model: DestinationModel | None = None,
+        building: Building | None = None,
     ):
+        self.states = ElevatorStateTable()  # hot state of all the elevators of the fleet
         self.update({
             i: Elevator(
                 id=i,
@@ -1063,9 +1652,16 @@ class Elevators(dict[ElevatorId, Elevator]):
                 accelerate_duration=accelerate_duration,
                 door_move_duration=door_move_duration,
                 door_stay_duration=door_stay_duration,
+                motion_model=motion_model,
+                eta_messages=eta_messages,
+                metrics=metrics,
+                destination_model=destination_model,
+                building=building or Building.default,
             )
             for i in range(1, count + 1)
         })
+        for e in self.values():
+            e.attach(self.states)
         self.eid2request: dict[ElevatorId, set[FloorAction]] = {e.id: set() for e in self.values()}
         self.request2eid: dict[FloorAction, ElevatorId] = {}
         self.request2event: dict[FloorAction, asyncio.Event] = {}
@@ -1100,14 +1696,19 @@ class Elevators(dict[ElevatorId, Elevator]):
 
     def copy(self) -> Self:
         c = self.__new__(self.__class__)
-        c.update({eid: elevator.copy() for eid, elevator in self.items()})
+        for e in self.values():
+            if e._run is not None:
+                e._advance()
+        c.states = self.states.copy()
+        c.update({eid: elevator.copy(c.states) for eid, elevator in self.items()})
         c.eid2request = self.eid2request.copy()
         c.request2eid = self.request2eid.copy()
         c.request2event = self.request2event.copy()
         return c
 
     def commit_floor(self, eid: ElevatorId, request: FloorAction, event: asyncio.Event | None = None) -> asyncio.Event:
-        event = self[eid].commit_floor(*request, event=event)
+        with tracer.span("commit_floor", elevator=eid, request=request) if tracer.enabled else NULL_SPAN:
+            event = self[eid].commit_floor(*request, event=event)
         assert event is not None
         self.request2eid[request] = eid
         self.request2event[request] = event
@@ -1122,6 +1723,44 @@ class Elevators(dict[ElevatorId, Elevator]):
         self[eid].cancel_commit(*request)
         return event
 
+    def positions(self, now: float | None = None) -> dict[ElevatorId, tuple[float, float]]:
+        """
+        Position (in floor indices) and door percentage of every elevator, as `current_position` and `door_position_percentage` would give them.
+        Computed in one pass over the fleet state table with a single clock read, for rendering and telemetry.
+        """
+        if not self:
+            return {}
+        if now is None:
+            now = next(iter(self.values())).event_loop.time()
+
+        data = self.states.data
+        FLOOR, STATE, MOVING_TIMESTAMP, MOVING_SPEED, DOOR_TIMESTAMP = range(ElevatorStateTable.STRIDE)
+        MOVING_UP, MOVING_DOWN = ElevatorState.MOVING_UP, ElevatorState.MOVING_DOWN
+        OPENED, OPENING, CLOSING = ElevatorState.STOPPED_DOOR_OPENED, ElevatorState.OPENING_DOOR, ElevatorState.CLOSING_DOOR
+
+        result = {}
+        for eid, e in self.items():
+            if e._run is not None:
+                e._advance(now)
+            o = e._offset
+            floor, state = data[o + FLOOR], data[o + STATE]
+            position = door = 0.0
+            if state == MOVING_UP or state == MOVING_DOWN:
+                p = (now - data[o + MOVING_TIMESTAMP]) * data[o + MOVING_SPEED]
+                p = 0.0 if not p > 0.0 else 1.0 if p > 1.0 else p  # NaN when the movement has not started yet
+                position = floor + p if state == MOVING_UP else floor - p
+            else:
+                position = floor
+                if state == OPENED:
+                    door = 1.0
+                elif state == OPENING or state == CLOSING:
+                    p = (now - data[o + DOOR_TIMESTAMP]) / e.door_move_duration
+                    if state == CLOSING:
+                        p = 1.0 - p
+                    door = 0.0 if not p > 0.0 else 1.0 if p > 1.0 else p
+            result[eid] = (position, door)
+        return result
+
     @property
     def requests(self) -> set[FloorAction]:
         return set(self.request2eid.keys())
@@ -1149,31 +1788,32 @@ class Elevators(dict[ElevatorId, Elevator]):
             yield assignment
 
     @overload
-    def estimate_total_duration(self, *, destination_heuristic: DestinationHeuristic = DestinationHeuristic.NONE) -> float:
+    def estimate_total_duration(self, *, destination_heuristic: DestinationHeuristic = DestinationHeuristic.NONE, bucket: int | None = None) -> float:
         """
         Estimate the total time for all actions in all elevators.
         """
         ...
 
     @overload
-    def estimate_total_duration(self, directed_request: FloorAction, *, destination_heuristic: DestinationHeuristic = DestinationHeuristic.NONE) -> tuple[float, ElevatorId]:
+    def estimate_total_duration(self, directed_request: FloorAction, *, destination_heuristic: DestinationHeuristic = DestinationHeuristic.NONE, bucket: int | None = None) -> tuple[float, ElevatorId]:
         """
         Estimate the total time for all actions in all elevators after adding a new directed request.
         Returns a tuple of estimated duration and the best elevator ID to handle the request.
         """
         ...
 
-    def estimate_total_duration(self, directed_request: FloorAction | None = None, *, destination_heuristic: DestinationHeuristic = DestinationHeuristic.NONE):
-        durations = {eid: elevator.estimate_total_duration(destination_heuristic=destination_heuristic) for eid, elevator in self.items()}
+    def estimate_total_duration(self, directed_request: FloorAction | None = None, *, destination_heuristic: DestinationHeuristic = DestinationHeuristic.NONE, bucket: int | None = None):
+        durations = {eid: elevator.estimate_total_duration(destination_heuristic=destination_heuristic, bucket=bucket) for eid, elevator in self.items()}
         if directed_request is None:
             return max(durations.values())
-        durations = {target_eid: max(e.estimate_total_duration(directed_request, destination_heuristic=destination_heuristic) if e.id == target_eid else durations[e.id] for e in self.values()) for target_eid in self.eids}
+        durations = {target_eid: max(e.estimate_total_duration(directed_request, destination_heuristic=destination_heuristic, bucket=bucket) if e.id == target_eid else durations[e.id] for e in self.values()) for target_eid in self.eids}
         best_eid = min(durations, key=lambda eid: durations[eid])
         return durations[best_eid], best_eid
 
     def pop(self, eid: ElevatorId, default=None) -> Elevator:
         try:
             e = super().pop(eid)
+            e.detach()
             requests = self.eid2request.pop(e.id)
             for request in requests:
                 del self.request2eid[request]
@@ -1184,6 +1824,7 @@ class Elevators(dict[ElevatorId, Elevator]):
             raise
 
     def __setitem__(self, eid: ElevatorId, value: Elevator):
+        value.attach(self.states)
         super().__setitem__(eid, value)
         self.eid2request[eid] = set()
 
@@ -1,12 +1,57 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class LazyRichHandler(logging.Handler):
+    """
+    Stands for a `rich.logging.RichHandler`, which is only imported and created when the first record is emitted
+    Importing rich takes tens of milliseconds, which a process should not pay at startup before it logs anything
+    """
+
+    def __init__(self, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.handler: logging.Handler | None = None
+
+    def setFormatter(self, fmt: logging.Formatter | None) -> None:
+        super().setFormatter(fmt)
+        if self.handler is not None:
+            self.handler.setFormatter(fmt)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.handler is None:
+            from rich.logging import RichHandler
+
+            self.handler = RichHandler()
+            self.handler.setFormatter(self.formatter)
+        self.handler.emit(record)
 
-from rich.logging import RichHandler
 
 logging.basicConfig(
     format="%(message)s",
     datefmt="[%X]",
-    handlers=[RichHandler()],
+    handlers=[LazyRichHandler()],
 )
 
+# The level is left to the entry point (see `--log-level`), so that disabled debug messages are never formatted
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+
+
+def use_queue_handler() -> QueueListener:
+    """
+    Move the root handlers behind a queue, so that logging from the event loop never blocks on the console
+    Records are formatted and written by a background thread, which is flushed at exit
+    """
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, QueueHandler)]
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+
+    for h in handlers:
+        root.removeHandler(h)
+    root.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -1,13 +1,16 @@
 import asyncio
-import inspect
 import logging
+import math
+import time
 
-from ..core.controller import Config, Controller, Floor
-from ..utils.common import Direction, DoorState, ElevatorId, Event, FloorLike
+from qtpy.QtCore import Qt, QTimer
+from qtpy.QtGui import QGuiApplication
+
+from ..core.controller import Config, Controller
+from ..utils.common import Direction, DoorState, ElevatorId, ElevatorState, Event, FloorLike
 from ..utils.event_bus import event_bus
 from .main_window import MainWindow
 from .visualizer import ElevatorVisualizer
-from ..core.elevator import Elevator
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +21,15 @@ class GUIController(Controller):
     Handles logging of commands to the console
     """
 
+    # States in which the visualizer needs new frames
+    ANIMATED_STATES = (ElevatorState.MOVING_UP, ElevatorState.MOVING_DOWN, ElevatorState.OPENING_DOOR, ElevatorState.CLOSING_DOOR)
+
     def __init__(self, config: Config = Config(), headless: bool = False):
         super().__init__(config)
         self.headless = headless
+        self.animation_timer: QTimer | None = None  # Drives the visualizer frames, only active while an elevator moves or its door moves
+        self.gui_update_timer: QTimer | None = None  # Applies the queued elevator states to the widgets, outside the elevator loops
+        self._pending_gui_updates: dict[ElevatorId, tuple[FloorLike, DoorState, Direction]] = {}
 
     def _setup_event_handlers(self):
         """Set up event handlers for elevator state changes"""
@@ -37,49 +46,96 @@ class GUIController(Controller):
         event_bus.unsubscribe(Event.FLOOR_ARRIVED, self._on_floor_arrived)
 
     def _on_elevator_state_changed(self, elevator_id: ElevatorId, floor: FloorLike, door_state: DoorState, direction: Direction):
-        """Handle elevator state change events"""
+        """
+        Handle elevator state change events
+        The state is queued and applied by the GUI update timer, so that no Qt work runs inside the move or door loops
+        Only the latest state of each elevator is applied
+        """
+        self._pending_gui_updates[elevator_id] = (floor, door_state, direction)
+        if self.gui_update_timer is None:
+            self._flush_gui_updates()
+        elif not self.gui_update_timer.isActive():
+            self.gui_update_timer.start()
+
+    def _setup_gui_update_timer(self):
+        """Create the timer applying the queued states once the current event loop iteration is done"""
+        self.gui_update_timer = QTimer()
+        self.gui_update_timer.setSingleShot(True)
+        self.gui_update_timer.setInterval(0)
+        self.gui_update_timer.timeout.connect(self._flush_gui_updates)
+
+    def _flush_gui_updates(self):
+        """Apply the queued elevator states to the panels and the visualizer"""
+        pending, self._pending_gui_updates = self._pending_gui_updates, {}
         try:
-            self.window.elevator_panels[elevator_id].update_elevator_status(floor, door_state, direction)
-            # Update parent window's visualizer if available
-            if hasattr(self.window, "elevator_visualizer"):
-                self.window.elevator_visualizer.update_elevator_status(elevator_id, floor, door_open=door_state.is_open(), direction=direction)
-
-            logger.debug(f"Updated UI for elevator {elevator_id}: floor={floor}, door={door_state}, direction={direction}")
+            for elevator_id, (floor, door_state, direction) in pending.items():
+                if elevator_id not in self.window.elevator_panels:
+                    continue  # removed since the state was queued
+                self.window.elevator_panels[elevator_id].update_elevator_status(floor, door_state, direction)
+                # Update parent window's visualizer if available
+                if hasattr(self.window, "elevator_visualizer"):
+                    self.window.elevator_visualizer.update_elevator_status(elevator_id, floor, door_open=door_state.is_open(), direction=direction)
+                logger.debug("Updated UI for elevator %s: floor=%s, door=%s, direction=%s", elevator_id, floor, door_state, direction)
+            self._wake_animation()
         except Exception as e:
-            logger.error(f"Error updating elevator UI: {e}")
-            raise e
+            logger.error("Error updating elevator UI: %s", e)
+            raise
 
     def _on_call_completed(self, floor: FloorLike, direction: Direction):
-        floor = Floor(floor)
+        floor = self.building.parse(floor)
         self.window.building_panel.clear_call_button(floor, direction)
 
     def _on_floor_arrived(self, floor: FloorLike, elevator_id: ElevatorId):
-        floor = Floor(floor)
+        floor = self.building.parse(floor)
         self.window.elevator_panels[elevator_id].clear_floor_button(str(floor))
 
-    async def _update_position(self):
+    def _setup_animation_timer(self):
+        """Create the frame timer, paced by the refresh rate of the screen"""
+        screen = QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen is not None and screen.refreshRate() > 0 else 60.0
+        self.frame_interval = 1000.0 / refresh_rate  # milliseconds
+
+        self.animation_timer = QTimer()
+        self.animation_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.animation_timer.setInterval(round(self.frame_interval))
+        self.animation_timer.timeout.connect(self._animate_frame)
+
+    def _wake_animation(self):
+        """Start producing frames, if an elevator has started moving or its door has"""
+        if self.animation_timer is None or self.animation_timer.isActive():
+            return
+        if self._animate_frame():
+            self.animation_timer.start()
+
+    def is_animating(self) -> bool:
+        return any(e.state in self.ANIMATED_STATES for e in self.elevators.values())
+
+    def _animate_frame(self) -> bool:
+        """Render one frame, and stop the timer once the last animated elevator is at rest. Return whether more frames are needed."""
+        start = time.perf_counter()
         v = self.window.elevator_visualizer
-        try:
-            while True:
-                await asyncio.sleep(0.02)
-                for eid, elevator in self.elevators.items():
-                    self._update_elevator_status(v, eid, elevator)
-
-                v.update()
-        except RuntimeError as e:
-            if "no running event loop" in str(e):
-                logger.debug("Position update loop cancelled due to no running event loop")
-        except asyncio.CancelledError:
-            logger.debug("Position update loop cancelled")
-            pass
-
-    def _update_elevator_status(self, visualizer: ElevatorVisualizer, elevator_id: ElevatorId, elevator: Elevator):
+        for eid, (position, door_percentage) in self.elevators.positions().items():
+            self._update_elevator_status(v, eid, position, door_percentage)
+
+        if self.animation_timer is None:
+            return False
+        if not self.is_animating():
+            if self.animation_timer.isActive():
+                self.animation_timer.stop()
+            return False
+
+        # Skip refresh periods rather than queue frames when rendering takes longer than one of them
+        cost = (time.perf_counter() - start) * 1000.0 + v.last_paint_duration * 1000.0
+        frames = max(1, math.ceil(cost / self.frame_interval))
+        self.animation_timer.setInterval(round(frames * self.frame_interval))
+        return True
+
+    def _update_elevator_status(self, visualizer: ElevatorVisualizer, elevator_id: ElevatorId, position: float, door_percentage: float):
         """Helper method to update elevator status in the visualizer."""
         if elevator_id in visualizer.elevator_status:
-            visualizer.elevator_status[elevator_id]["current_position"] = visualizer.FLOOR_HEIGHT * (len(self.config.floors) - elevator.current_position - 1)
-            visualizer.elevator_status[elevator_id]["door_percentage"] = elevator.door_position_percentage
+            visualizer.set_elevator_position(elevator_id, visualizer.FLOOR_HEIGHT * (len(self.building) - position - 1), door_percentage)
         else:
-            logger.warning(f"Elevator {elevator_id} not found in visualizer status")
+            logger.warning("Elevator %s not found in visualizer status", elevator_id)
 
     async def handle_message(self, message: str):
         """
@@ -88,7 +144,7 @@ class GUIController(Controller):
         """
         # Using QCoreApplication.translate for translation
         self.window.console_widget.log_message(f"🡒 {message}")
-        logger.info(f"Processing command: {message}")
+        logger.info("Processing command: %s", message)
 
         # Call parent class handler
         await super().handle_message(message)
@@ -106,16 +162,23 @@ class GUIController(Controller):
         self._setup_event_handlers()
 
         await super().start(tg)
-        self.update_position_task = (tg if tg else asyncio).create_task(self._update_position(), name=f"UpdatePositionLoop {__file__}:{inspect.stack()[0].lineno}")
+
+        if self.animation_timer is None:
+            self._setup_animation_timer()
+        if self.gui_update_timer is None:
+            self._setup_gui_update_timer()
+        self._wake_animation()
 
     async def stop(self):
         """
         Stop the GUI controller and clean up resources
         """
 
-        if hasattr(self, "update_position_task") and not self.update_position_task.done():
-            self.update_position_task.cancel()
-            await self.update_position_task
+        if self.animation_timer is not None:
+            self.animation_timer.stop()
+        if self.gui_update_timer is not None:
+            self.gui_update_timer.stop()
+        self._pending_gui_updates.clear()
         await super().stop()
 
         # Unsubscribe from event handlers to prevent memory leaks
@@ -126,7 +189,7 @@ class GUIController(Controller):
         await super().reset()
 
     async def call_elevator(self, call_floor: FloorLike, call_direction: Direction):
-        call_floor = Floor(call_floor)
+        call_floor = self.building.parse(call_floor)
         match call_direction:
             case Direction.UP:
                 self.window.building_panel.up_buttons[str(call_floor)].setChecked(True)
@@ -138,12 +201,12 @@ class GUIController(Controller):
         return await super().call_elevator(call_floor, call_direction)
 
     async def select_floor(self, floor: FloorLike, elevator_id: ElevatorId):
-        floor = Floor(floor)
+        floor = self.building.parse(floor)
         self.window.elevator_panels[elevator_id].floor_buttons[str(floor)].setChecked(True)
         return await super().select_floor(floor, elevator_id)
 
     async def deselect_floor(self, floor: FloorLike, elevator_id: ElevatorId):
-        floor = Floor(floor)
+        floor = self.building.parse(floor)
         self.window.elevator_panels[elevator_id].floor_buttons[str(floor)].setChecked(False)
         return await super().deselect_floor(floor, elevator_id)
 
@@ -153,6 +216,7 @@ class GUIController(Controller):
 
         self.window.set_elevator_count(count)
         await super().set_elevator_count(count)
+        self._wake_animation()
 
     async def get_event_message(self) -> str:
         msg = await super().get_event_message()
@@ -60,6 +60,8 @@ class TranslationManager:
         self.app = app
         self.translator = QTranslator()
         self.observers = []
+        # Translated strings per (context, source, language), cleared when the language changes
+        self._translations: dict[tuple[str, str, str | None], str] = {}
         if lrelease_path is None:
             lrelease_path = get_lrelease_path()
         self.lrelease_path = lrelease_path
@@ -137,6 +139,7 @@ class TranslationManager:
 
         # Update current language
         self.current_language = language
+        self._translations.clear()
 
         # Clear previous translator
         self.app.removeTranslator(self.translator)
@@ -168,6 +171,14 @@ class TranslationManager:
         # Notify observers
         self.notify_observers()
 
+    def tr(self, context: str, source: str) -> str:
+        """Translate `source` like QCoreApplication.translate, memoized for the current language"""
+        key = (context, source, self.current_language)
+        text = self._translations.get(key)
+        if text is None:
+            text = self._translations[key] = QCoreApplication.translate(context, source)
+        return text
+
     def add_observer(self, observer):
         """Add an observer to be notified when language changes"""
         if observer not in self.observers:
@@ -1,8 +1,11 @@
 import logging
+import math
 import os
+from collections import deque
+from datetime import datetime
 
-from qtpy.QtCore import QCoreApplication, Qt
-from qtpy.QtGui import QIcon, QKeySequence, QShortcut
+from qtpy.QtCore import QCoreApplication, Qt, QTimer
+from qtpy.QtGui import QColor, QIcon, QKeySequence, QShortcut, QTextCharFormat, QTextCursor
 from qtpy.QtWidgets import (
     QCheckBox,
     QComboBox,
@@ -17,17 +20,17 @@ from qtpy.QtWidgets import (
     QLabel,
     QLineEdit,
     QMainWindow,
+    QPlainTextEdit,
     QPushButton,
     QScrollArea,
     QSizePolicy,
     QSpinBox,
-    QTextEdit,
     QVBoxLayout,
     QWidget,
 )
 
 from ..core.controller import Config, Controller
-from ..utils.common import Direction, DoorState, ElevatorId, Floor, FloorLike
+from ..utils.common import Direction, DoorState, ElevatorId, FloorLike
 from .i18n import TranslationManager
 from .theme_manager import ThemeManager
 from .visualizer import ElevatorVisualizer
@@ -38,6 +41,21 @@ theme_manager: ThemeManager
 tr = QCoreApplication.translate
 
 
+def _set_text(label: QLabel, text: str):
+    """Set the text of a label, skipping the relayout and repaint when it is already shown"""
+    if label.text() != text:
+        label.setText(text)
+
+
+def floor_button_grid(labels: tuple[str, ...]) -> dict[str, tuple[int, int]]:
+    """
+    Grid cell (row, column) of the floor buttons of a car, for labels from the lowest floor
+    The grid is about square, each column runs from its lowest floor at the bottom to its highest at the top, like a car operating panel
+    """
+    rows = math.ceil(len(labels) / math.ceil(math.sqrt(len(labels))))
+    return {label: (rows - 1 - i % rows, i // rows) for i, label in enumerate(labels)}
+
+
 class ConfigDialog(QDialog):
     """Configuration dialog for elevator system settings"""
 
@@ -218,7 +236,7 @@ class MainWindow(QMainWindow):
 
         # Add visualizer with correct floor order (from bottom to top) and dynamic elevator count
         self.elevator_visualizer = ElevatorVisualizer(
-            floors=[Floor(s) for s in elevator_controller.config.floors],
+            floors=list(elevator_controller.building.floors),
             elevator_count=elevator_controller.config.elevator_count,
         )
         self.elevators_layout.addWidget(self.elevator_visualizer)
@@ -377,7 +395,7 @@ class MainWindow(QMainWindow):
             panel.reset()
             # Determine initial floor from config, default to "1" if not available
             initial_floor_str = str(self.elevator_controller.config.default_floor)
-            initial_floor = Floor(initial_floor_str)
+            initial_floor = self.elevator_controller.building.parse(initial_floor_str)
             self.elevator_visualizer.update_elevator_status(eid, initial_floor, False, direction=Direction.IDLE)
 
         self.building_panel.reset_buttons()
@@ -494,7 +512,7 @@ class BuildingPanel(QFrame):
         layout.addWidget(self.title)
 
         # Get floor list from config, arranged from top to bottom
-        self.floors_config = self.elevator_controller.config.floors[::-1]
+        self.floors_config = self.elevator_controller.building.labels[::-1]
 
         # Create floor buttons
         self._create_floor_buttons(layout)
@@ -560,7 +578,7 @@ class BuildingPanel(QFrame):
 
     def clear_call_button(self, floor: FloorLike, direction: Direction):
         """Clear call button state for the specified floor and direction"""
-        floor = Floor(floor)
+        floor = self.elevator_controller.building.parse(floor)
         floor_str = str(floor)
         if direction == Direction.UP and floor_str in self.up_buttons:
             self.up_buttons[floor_str].setChecked(False)
@@ -625,8 +643,11 @@ class ElevatorPanel(QFrame):
 
         translation_manager.add_observer(self)
 
-        # Initialize translations
-        self.update_elevator_status()
+        # Initialize status and translations
+        self._last_floor = self.elevator_controller.building.ground
+        self._last_door_state = DoorState.CLOSED
+        self._last_direction = Direction.IDLE
+        self.update_language()
 
     def _create_status_display(self, layout):
         """Create status display area"""
@@ -658,14 +679,12 @@ class ElevatorPanel(QFrame):
         button_layout.setSpacing(4)
         button_layout.setContentsMargins(1, 1, 1, 1)
 
-        floor_positions = {"3": (0, 1), "2": (1, 1), "1": (0, 0), "-1": (1, 0)}
-
-        for floor_str, pos in floor_positions.items():
+        for floor_str, (row, column) in floor_button_grid(self.elevator_controller.building.labels).items():
             button = QPushButton(floor_str)
             button.setProperty("class", "elevator-floor-button")
             button.setCheckable(True)
             button.clicked.connect(lambda checked, f=floor_str: self.elevator_controller.handle_message_task(f"{'' if checked else 'de'}select_floor@{f}#{self.elevator_id}"))
-            button_layout.addWidget(button, pos[0], pos[1])
+            button_layout.addWidget(button, row, column)
             self.floor_buttons[floor_str] = button
 
         button_frame.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Fixed)
@@ -693,7 +712,7 @@ class ElevatorPanel(QFrame):
         """Update elevator status display"""
         # Initialize stored values if they don't exist
         if not hasattr(self, "_last_floor"):
-            self._last_floor = Floor("1")
+            self._last_floor = self.elevator_controller.building.ground
         if not hasattr(self, "_last_door_state"):
             self._last_door_state = DoorState.CLOSED
         if not hasattr(self, "_last_direction"):
@@ -701,7 +720,7 @@ class ElevatorPanel(QFrame):
 
         # Use provided args or fall back to previous values
         if floor is not None:
-            self._last_floor = Floor(floor)
+            self._last_floor = self.elevator_controller.building.parse(floor)
         if door_state is not None:
             assert isinstance(door_state, DoorState), f"Expected DoorState type, got {type(door_state)}"
             self._last_door_state = door_state
@@ -709,8 +728,7 @@ class ElevatorPanel(QFrame):
             assert isinstance(direction, Direction), f"Expected Direction type, got {type(direction)}"
             self._last_direction = direction
 
-        # Update displayed text through update_language
-        self.update_language()
+        self._update_status_labels()
 
     def clear_floor_button(self, floor_str: str):
         """Clear the specified floor button selection state"""
@@ -725,20 +743,27 @@ class ElevatorPanel(QFrame):
     def reset(self):
         """Reset the elevator panel to its initial state"""
         self._reset_internal_buttons()
-        self.update_elevator_status(Floor("1"), DoorState.CLOSED, Direction.IDLE)
+        self.update_elevator_status(self.elevator_controller.building.ground, DoorState.CLOSED, Direction.IDLE)
+
+    def _update_status_labels(self):
+        """Show the stored status, leaving the labels whose text is unchanged untouched"""
+        _set_text(self.floor_label, self._floor_template.format(self._last_floor))
+        _set_text(self.door_label, self._door_texts[self._last_door_state])
+        _set_text(self.direction_label, self._direction_texts[self._last_direction])
+
+    def _update_label_templates(self):
+        """Translate the status label texts once per language, instead of on every status update"""
+        tr = translation_manager.tr
+        self._floor_template = f"📍 {tr('ElevatorPanel', 'Floor')}: {{}}"
+        self._door_texts = {state: f"🚪 {tr('ElevatorPanel', 'Door')}: {tr('ElevatorPanel', state.name.capitalize())}" for state in DoorState}
+        self._direction_texts = {direction: f"🧭 {tr('ElevatorPanel', 'Direction')}: {tr('ElevatorPanel', direction.name.capitalize())}" for direction in Direction}
 
     def update_language(self):
         """Update UI text when language changes"""
+        tr = translation_manager.tr
+        self._update_label_templates()
         self.title.setText(f"{tr('ElevatorPanel', 'Elevator')} #{self.elevator_id}")
-
-        current_floor_str = str(self._last_floor)
-        self.floor_label.setText(f"📍 {tr('ElevatorPanel', 'Floor')}: {current_floor_str}")
-
-        door_text = tr("ElevatorPanel", self._last_door_state.name.capitalize())
-        self.door_label.setText(f"🚪 {tr('ElevatorPanel', 'Door')}: {door_text}")
-
-        direction_text = tr("ElevatorPanel", self._last_direction.name.capitalize())
-        self.direction_label.setText(f"🧭 {tr('ElevatorPanel', 'Direction')}: {direction_text}")
+        self._update_status_labels()
 
         # Update floor button tooltips
         for floor_str, button in self.floor_buttons.items():
@@ -753,13 +778,22 @@ class ConsoleWidget(QFrame):
     """
     Console widget for executing commands and showing output
     Allows direct interaction with the elevator controller
+    Keeps the last MAX_MESSAGES messages, which are appended in batches at most once per FLUSH_INTERVAL milliseconds
     """
 
+    MAX_MESSAGES = 2000
+    FLUSH_INTERVAL = 50
+
     def __init__(self, elevator_controller):
         super().__init__()
         self.elevator_controller = elevator_controller
         self.setProperty("class", "console-widget")
 
+        # Ring buffer of (timestamp, message), replayed when the theme or the filter changes
+        self.messages: deque[tuple[str, str]] = deque(maxlen=self.MAX_MESSAGES)
+        self._pending: list[tuple[str, str]] = []
+        self._filter = ""
+
         self.color_scheme = {
             "light": {
                 "header": "#1a56db",
@@ -778,6 +812,7 @@ class ConsoleWidget(QFrame):
         }
 
         self.current_colors = self.get_theme_colors()
+        self._update_text_formats()
 
         layout = QVBoxLayout(self)
         layout.setSpacing(4)
@@ -788,13 +823,26 @@ class ConsoleWidget(QFrame):
         self.title.setProperty("class", "console-title")
         layout.addWidget(self.title)
 
-        # Console output
-        self.console_output = QTextEdit()
+        # Message filter
+        self.filter_input = QLineEdit()
+        self.filter_input.setProperty("class", "console-input")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.set_filter)
+        layout.addWidget(self.filter_input)
+
+        # Console output, dropping the oldest lines beyond the ring buffer size
+        self.console_output = QPlainTextEdit()
         self.console_output.setReadOnly(True)
+        self.console_output.setMaximumBlockCount(self.MAX_MESSAGES)
         self.console_output.setProperty("class", "console-output")
 
         layout.addWidget(self.console_output)
 
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_INTERVAL)
+        self._flush_timer.timeout.connect(self.flush_messages)
+
         # Input layout
         input_layout = QHBoxLayout()
         input_layout.setSpacing(4)
@@ -826,13 +874,32 @@ class ConsoleWidget(QFrame):
         header_color = self.current_colors["header"]
         system_msg_color = self.current_colors["system_msg"]
 
-        self.console_output.append(f"<span style='color: {header_color}; font-weight: bold;'>╔════════════════════════════════════╗</span>")
-        self.console_output.append(f"<span style='color: {header_color}; font-weight: bold;'>║ -------- ELEVATOR CONTROL -------- ║</span>")
-        self.console_output.append(f"<span style='color: {header_color}; font-weight: bold;'>╚════════════════════════════════════╝</span>")
-        self.console_output.append(f"<span style='color: {system_msg_color};'>{tr('ConsoleWidget', 'System initialized. Ready for commands...')}</span>")
+        self.console_output.appendHtml(f"<span style='color: {header_color}; font-weight: bold;'>╔════════════════════════════════════╗</span>")
+        self.console_output.appendHtml(f"<span style='color: {header_color}; font-weight: bold;'>║ -------- ELEVATOR CONTROL -------- ║</span>")
+        self.console_output.appendHtml(f"<span style='color: {header_color}; font-weight: bold;'>╚════════════════════════════════════╝</span>")
+        self.console_output.appendHtml(f"<span style='color: {system_msg_color};'>{tr('ConsoleWidget', 'System initialized. Ready for commands...')}</span>")
+
+        # Replay the buffered messages matching the filter
+        self._pending = [m for m in self.messages if self._matches(m[1])]
+        self.flush_messages()
 
     def update_theme_colors(self):
         self.current_colors = self.get_theme_colors()
+        self._update_text_formats()
+        self.refresh_welcome_message()
+
+    def _update_text_formats(self):
+        self._timestamp_format = QTextCharFormat()
+        self._timestamp_format.setForeground(QColor(self.current_colors["timestamp"]))
+        self._message_format = QTextCharFormat()
+        self._message_format.setForeground(QColor(self.current_colors["message"]))
+
+    def _matches(self, message: str) -> bool:
+        return self._filter in message.casefold()
+
+    def set_filter(self, text: str):
+        """Only show the messages containing `text`, case insensitive"""
+        self._filter = text.strip().casefold()
         self.refresh_welcome_message()
 
     def execute_command(self):
@@ -845,14 +912,37 @@ class ConsoleWidget(QFrame):
         self.elevator_controller.handle_message_task(command)
 
     def log_message(self, message: str):
-        """Log a message to the console output with enhanced styling"""
-        import datetime
+        """Log a message to the console output, shown with the next batch"""
+        entry = (datetime.now().strftime("%H:%M:%S"), message)
+        self.messages.append(entry)
+        if self._matches(message):
+            self._pending.append(entry)
+            if not self._flush_timer.isActive():
+                self._flush_timer.start()
+
+    def flush_messages(self):
+        """Append the pending messages to the console output in a single edit"""
+        self._flush_timer.stop()
+        pending = self._pending[-self.MAX_MESSAGES :]
+        self._pending = []
+        if not pending:
+            return
+
+        scroll_bar = self.console_output.verticalScrollBar()
+        follow = scroll_bar.value() == scroll_bar.maximum()
 
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        timestamp_color = self.current_colors["timestamp"]
-        message_color = self.current_colors["message"]
+        cursor = QTextCursor(self.console_output.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for timestamp, message in pending:
+            if not self.console_output.document().isEmpty():
+                cursor.insertBlock()
+            cursor.insertText(f"[{timestamp}]", self._timestamp_format)
+            cursor.insertText(f" {message}", self._message_format)
+        cursor.endEditBlock()
 
-        self.console_output.append(f"<span style='color: {timestamp_color};'>[{timestamp}]</span> " + f"<span style='color: {message_color};'>{message}</span>")
+        if follow:
+            scroll_bar.setValue(scroll_bar.maximum())
 
     def update_language(self):
         """Update UI text when language changes"""
@@ -861,3 +951,4 @@ class ConsoleWidget(QFrame):
         self.input_label.setText(f"➜ {tr('ConsoleWidget', 'Command:')}")
         self.console_input.setPlaceholderText(tr("ConsoleWidget", "Enter command, e.g.: call_up@1, select_floor@2#1..."))
         self.console_input.setToolTip(tr("ConsoleWidget", "Type command and press Enter to execute"))
+        self.filter_input.setPlaceholderText(tr("ConsoleWidget", "Filter messages..."))
@@ -29,6 +29,10 @@
         <source>Command:</source>
         <translation>命令:</translation>
     </message>
+    <message>
+        <source>Filter messages...</source>
+        <translation>过滤消息...</translation>
+    </message>
     <message>
         <source>Enter command, e.g.: call_up@1, select_floor@2#1...</source>
         <translation>输入命令，例如: call_up@1, select_floor@2#1...</translation>
@@ -1,8 +1,10 @@
 import logging
+import math
+import time
 from collections import OrderedDict
 
-from qtpy.QtCore import QRectF, Qt
-from qtpy.QtGui import QBrush, QColor, QFont, QPainter, QPen
+from qtpy.QtCore import QPointF, QRect, QRectF, QSize, Qt
+from qtpy.QtGui import QBrush, QColor, QFont, QPainter, QPen, QPixmap
 from qtpy.QtWidgets import QFrame
 
 from ..utils.common import Direction, ElevatorId, Floor, FloorLike
@@ -14,6 +16,8 @@ class ElevatorVisualizer(QFrame):
     2D visualization of elevator movement
     Shows real-time position and status of elevators in the building
     Supports dynamic number of elevators based on configuration
+    Buildings larger than the widget can be scrolled (wheel, drag) and zoomed (Ctrl+wheel, double click to fit);
+    only the visible floors and cars are drawn, and labels and doors are dropped when zoomed out
     """
 
     # Floor heights in pixels
@@ -23,6 +27,12 @@ class ElevatorVisualizer(QFrame):
     ELEVATOR_HEIGHT = 70
     # Horizontal spacing between elevators
     ELEVATOR_SPACING = 40
+    # Margin around the building when it does not fit in the widget
+    MARGIN = 20
+    # Zoom range, and the zoom below which labels and doors are not drawn
+    MIN_ZOOM = 0.01
+    MAX_ZOOM = 2.0
+    DETAIL_ZOOM = 0.5
 
     def __init__(self, floors: list[Floor], elevator_count: int):
         """Initialize the elevator visualizer
@@ -59,7 +69,13 @@ class ElevatorVisualizer(QFrame):
 
         # Cache for drawing calculations
         self._cached_dimensions = None
-        self._last_widget_size = (0, 0)
+        self._last_view = None
+        self.zoom = 1.0
+        # Scroll offset in building units, horizontally from the left and vertically from the bottom
+        self._scroll = QPointF(0, 0)
+        self._drag_origin: QPointF | None = None
+        self.last_paint_duration = 0.0  # Seconds spent in the last paintEvent, used to pace the animation
+        self._static_layer: QPixmap | None = None  # Building drawn once, invalidated on resize, theme change or elevator count change
 
         self.color_themes = {
             "light": {
@@ -109,6 +125,8 @@ class ElevatorVisualizer(QFrame):
                     "door_open": False,
                     "direction": "idle",  # Initial direction
                 }
+        self._static_layer = None
+        self.update()
 
     def _update_theme_colors(self, theme_name=None):
         current_theme = theme_name or main_window.theme_manager.get_current_theme()
@@ -128,8 +146,26 @@ class ElevatorVisualizer(QFrame):
         self.door_color = theme_colors["door"]
         self.door_open_color = theme_colors["door_open"]
 
+        self._build_render_resources()
+        self._static_layer = None
         self.update()
 
+    def _build_render_resources(self):
+        """Create the fonts, pens and brushes once per theme instead of once per car and per paint"""
+        self._floor_label_font = QFont("Arial", 10, QFont.Weight.Bold)
+        self._elevator_label_font = QFont("Arial", 12, QFont.Weight.Bold)
+
+        self._text_pen = QPen(self.text_color)
+        self._shaft_pen = QPen(self.light_color, 1, Qt.PenStyle.DashLine)
+        self._floor_line_pen = QPen(self.light_color, 1, Qt.PenStyle.SolidLine)
+        self._elevator_pen = QPen(self.light_color, 2)
+        self._door_pen = QPen(self.light_color, 1)
+
+        self._direction_brushes = {Direction.UP: QBrush(self.up_color), Direction.DOWN: QBrush(self.down_color)}
+        self._idle_brush = QBrush(self.idle_color)
+        self._door_brush = QBrush(self.door_color)
+        self._door_open_brush = QBrush(self.door_open_color)
+
     def changeEvent(self, event):
         """Called when a window event occurs, including palette changes"""
         if event.type() == event.Type.PaletteChange:
@@ -148,7 +184,7 @@ class ElevatorVisualizer(QFrame):
         return positions
 
     def update_elevator_status(self, elevator_id: ElevatorId, floor: FloorLike, door_open: bool, direction: Direction):
-        floor = Floor(floor)
+        floor = Floor(floor, self.floors[0].building)
         """Update the state of an elevator"""
         if elevator_id not in self.elevator_status:
             logging.warning(f"Invalid elevator ID: {elevator_id}")
@@ -158,6 +194,7 @@ class ElevatorVisualizer(QFrame):
         logging.debug(f"Updating elevator {elevator_id} visualization: floor={floor}, door_open={door_open}, direction={direction}")
 
         # Update elevator state
+        old_position = self.elevator_status[elevator_id]["current_position"]
         self.elevator_status[elevator_id]["current_floor"] = floor
         self.elevator_status[elevator_id]["door_open"] = door_open
         self.elevator_status[elevator_id]["direction"] = direction
@@ -169,19 +206,69 @@ class ElevatorVisualizer(QFrame):
         else:
             logging.warning(f"Floor {floor} not found in floor positions map. Available floors: {list(self.floor_positions.keys())}")
 
-        # Request repaint
-        self.update()
+        # Request repaint of the car only
+        self._update_elevator_region(elevator_id, old_position, self.elevator_status[elevator_id]["current_position"])
+
+    def set_elevator_position(self, elevator_id: ElevatorId, position: float, door_percentage: float):
+        """Move a car during an animation, repainting only the area it leaves and the area it enters"""
+        status = self.elevator_status[elevator_id]
+        old_position = status["current_position"]
+        if old_position == position and status.get("door_percentage", 0.0) == door_percentage:
+            return
+
+        status["current_position"] = position
+        status["door_percentage"] = door_percentage
+        self._update_elevator_region(elevator_id, old_position, position)
+
+    def _elevator_rect(self, elevator_id: ElevatorId, position: float) -> QRect:
+        """Area of the widget covered by a car at `position`, including its outline and its doors sliding out of it"""
+        cache = self.cached_dimensions
+        x = cache["elevator_start_x"] + (elevator_id - 1) * (self.ELEVATOR_WIDTH + self.ELEVATOR_SPACING)
+        y = cache["building_y"] + position
+        margin = self.ELEVATOR_WIDTH / 4 + 2
+        zoom = self.zoom
+        return QRectF((x - margin) * zoom - 1, (y - 2) * zoom - 1, (self.ELEVATOR_WIDTH + 2 * margin) * zoom + 2, (self.ELEVATOR_HEIGHT + 4) * zoom + 2).toAlignedRect()
+
+    def _update_elevator_region(self, elevator_id: ElevatorId, *positions: float):
+        if self._cached_dimensions is None or self._last_view != self._view_key(self.width(), self.height()):
+            # Nothing painted yet for this size, the next paint is a full one anyway
+            self.update()
+            return
+        region = QRect()
+        for position in positions:
+            region = region.united(self._elevator_rect(elevator_id, position))
+        self.update(region)
+
+    def _view_key(self, widget_width, widget_height) -> tuple:
+        return (widget_width, widget_height, self.zoom, self._scroll.x(), self._scroll.y())
+
+    def _clamp_scroll(self, view_width: float, view_height: float):
+        """Keep the scroll offset within the part of the building that does not fit in the view"""
+        max_x = max(0.0, self.BUILDING_WIDTH + 2 * self.MARGIN - view_width)
+        max_y = max(0.0, self.BUILDING_HEIGHT + 2 * self.MARGIN - view_height)
+        self._scroll = QPointF(min(max(self._scroll.x(), 0.0), max_x), min(max(self._scroll.y(), 0.0), max_y))
 
     def _update_drawing_cache(self, widget_width, widget_height):
-        """Update cached drawing calculations when widget size or elevator count changes"""
-        current_size = (widget_width, widget_height)
-        if self._cached_dimensions is None or self._last_widget_size != current_size or len(self.elevator_status) != self._last_elevator_count:
+        """Update cached drawing calculations when widget size, zoom, scroll or elevator count changes"""
+        # Drawing happens in building units, scaled by the zoom
+        view_width = widget_width / self.zoom
+        view_height = widget_height / self.zoom
+        self._clamp_scroll(view_width, view_height)
+
+        current_view = self._view_key(widget_width, widget_height)
+        if self._cached_dimensions is None or self._last_view != current_view or len(self.elevator_status) != self._last_elevator_count:
             building_width = self.BUILDING_WIDTH
             building_height = self.BUILDING_HEIGHT
 
-            # Calculate building position (centered)
-            building_x = (widget_width - building_width) / 2
-            building_y = (widget_height - building_height + self.FLOOR_HEIGHT - self.ELEVATOR_HEIGHT) / 2
+            # Calculate building position (centered when it fits, scrolled otherwise)
+            if building_width + 2 * self.MARGIN <= view_width:
+                building_x = (view_width - building_width) / 2
+            else:
+                building_x = self.MARGIN - self._scroll.x()
+            if building_height + 2 * self.MARGIN <= view_height:
+                building_y = (view_height - building_height + self.FLOOR_HEIGHT - self.ELEVATOR_HEIGHT) / 2
+            else:
+                building_y = view_height - self.MARGIN - building_height + self._scroll.y()
 
             # Calculate elevator positioning
             total_elevator_width = len(self.elevator_status) * self.ELEVATOR_WIDTH + (len(self.elevator_status) - 1) * self.ELEVATOR_SPACING
@@ -202,25 +289,134 @@ class ElevatorVisualizer(QFrame):
                 "total_elevator_width": total_elevator_width,
                 "floor_y_positions": floor_y_positions,
                 "total_height": total_height,
+                "view_width": view_width,
+                "view_height": view_height,
             }
-            self._last_widget_size = current_size
+            self._last_view = current_view
             self._last_elevator_count = len(self.elevator_status)
+            self._static_layer = None
 
     def paintEvent(self, event):
         """Draw the building and elevators"""
+        start = time.perf_counter()
         super().paintEvent(event)
 
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
         # Get widget dimensions and update cache
         width = self.width()
         height = self.height()
         self._update_drawing_cache(width, height)
+        if self._static_layer is None:
+            self._static_layer = self._render_static_layer(width, height)
 
-        # Draw building and elevators using cached values
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        dirty = event.rect()
+        painter.setClipRect(dirty)
+
+        # Draw the cached building, then the cars in the dirty area
+        painter.drawPixmap(0, 0, self._static_layer)
+        painter.scale(self.zoom, self.zoom)
+        self._draw_elevators(painter, dirty)
+        painter.end()
+
+        self.last_paint_duration = time.perf_counter() - start
+
+    def _render_static_layer(self, width: int, height: int) -> QPixmap:
+        """Draw the visible part of the building into a transparent pixmap matching the widget"""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(QSize(width, height) * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(pixmap)
+        # The building is made of straight lines only, antialiasing them is not worth its cost when zoomed out
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, self.detailed)
+        painter.scale(self.zoom, self.zoom)
         self._draw_building(painter, width, height)
-        self._draw_elevators(painter, width, height)
+        painter.end()
+        return pixmap
+
+    def _visible_floor_indices(self) -> range:
+        """Indices in `self.floors` of the floors overlapping the view"""
+        cache = self.cached_dimensions
+        # Floor i spans [bottom - (i + 1) * FLOOR_HEIGHT, bottom - i * FLOOR_HEIGHT]
+        bottom = cache["building_y"] + cache["total_height"]
+        first = math.floor((bottom - cache["view_height"]) / self.FLOOR_HEIGHT) - 1
+        last = math.ceil(bottom / self.FLOOR_HEIGHT)
+        return range(max(first, 0), min(last, len(self.floors)))
+
+    def _visible_elevator_ids(self) -> range:
+        """Ids of the elevators whose shaft overlaps the view, doors included"""
+        cache = self.cached_dimensions
+        pitch = self.ELEVATOR_WIDTH + self.ELEVATOR_SPACING
+        margin = self.ELEVATOR_WIDTH / 4 + 2
+        first = math.ceil((-cache["elevator_start_x"] - self.ELEVATOR_WIDTH - margin) / pitch) + 1
+        last = math.floor((cache["view_width"] - cache["elevator_start_x"] + margin) / pitch) + 1
+        return range(max(first, 1), min(last, len(self.elevator_status)) + 1)
+
+    @property
+    def detailed(self) -> bool:
+        """Whether labels and doors are drawn at the current zoom"""
+        return self.zoom >= self.DETAIL_ZOOM
+
+    def set_zoom(self, zoom: float, anchor: QPointF | None = None):
+        """Zoom the view, keeping the building point under `anchor` (widget coordinates, default center) in place"""
+        zoom = min(max(zoom, self.MIN_ZOOM), self.MAX_ZOOM)
+        if zoom == self.zoom:
+            return
+        if anchor is None:
+            anchor = QPointF(self.width() / 2, self.height() / 2)
+
+        # Offsets of the anchor from the left and bottom edges of the building margins
+        x = anchor.x() / self.zoom + self._scroll.x()
+        y = (self.height() - anchor.y()) / self.zoom + self._scroll.y()
+        self.zoom = zoom
+        self._scroll = QPointF(x - anchor.x() / zoom, y - (self.height() - anchor.y()) / zoom)
+        self.update()
+
+    def scroll_by(self, dx: float, dy: float):
+        """Scroll the view by a distance in widget pixels, positive towards the right and the top floors"""
+        self._scroll = QPointF(self._scroll.x() + dx / self.zoom, self._scroll.y() + dy / self.zoom)
+        self.update()
+
+    def fit_to_view(self):
+        """Zoom so that the whole building fits in the widget"""
+        zoom_x = self.width() / (self.BUILDING_WIDTH + 2 * self.MARGIN)
+        zoom_y = self.height() / (self.BUILDING_HEIGHT + 2 * self.MARGIN)
+        self.set_zoom(min(zoom_x, zoom_y, 1.0))
+
+    def wheelEvent(self, event):
+        """Ctrl+wheel zooms around the cursor, the wheel alone scrolls"""
+        delta = event.angleDelta()
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.set_zoom(self.zoom * 1.25 ** (delta.y() / 120), event.position())
+        else:
+            self.scroll_by(-delta.x() / 120 * self.FLOOR_HEIGHT, delta.y() / 120 * self.FLOOR_HEIGHT)
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag_origin = event.position()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        """Pan the view while dragging"""
+        if self._drag_origin is not None:
+            delta = event.position() - self._drag_origin
+            self._drag_origin = event.position()
+            self.scroll_by(-delta.x(), delta.y())
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        self._drag_origin = None
+        super().mouseReleaseEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        if self.zoom == 1.0:
+            self.fit_to_view()
+        else:
+            self.set_zoom(1.0, event.position())
+        super().mouseDoubleClickEvent(event)
 
     @property
     def cached_dimensions(self) -> dict:
@@ -237,47 +433,52 @@ class ElevatorVisualizer(QFrame):
         return len(self.floors) * self.FLOOR_HEIGHT
 
     def _draw_building(self, painter: QPainter, width, height):
-        """Draw the building structure"""
+        """Draw the visible floors of the building structure"""
         cache = self.cached_dimensions
-
-        # Draw floor labels and shaft lines
-        painter.setPen(self.text_color)
-        painter.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-
-        # Draw floors
-        for i, floor in enumerate(self.floors):
-            y_pos = cache["floor_y_positions"][floor]
-
-            # Draw floor label
-            painter.drawText(int(cache["building_x"]), int(y_pos + self.FLOOR_HEIGHT / 2), f"{floor}F")
-
-        # Draw vertical elevator shafts
-        painter.setPen(QPen(self.light_color, 1, Qt.PenStyle.DashLine))
-        for i, floor in enumerate(self.floors):
-            y_pos = cache["floor_y_positions"][floor]
-
-            # Draw elevator shafts for this floor
-            shaft_top = y_pos
-            shaft_bottom = y_pos + self.ELEVATOR_HEIGHT
-            for elevator_id in self.elevator_status:
+        width = cache["view_width"]
+        floors = [self.floors[i] for i in self._visible_floor_indices()]
+        elevator_ids = self._visible_elevator_ids()
+
+        if self.detailed:
+            # Draw floor labels
+            painter.setPen(self._text_pen)
+            painter.setFont(self._floor_label_font)
+            for floor in floors:
+                y_pos = cache["floor_y_positions"][floor]
+                painter.drawText(int(cache["building_x"]), int(y_pos + self.FLOOR_HEIGHT / 2), f"{floor}F")
+
+        # Draw vertical elevator shafts, dashed per floor, or as one solid line per side when zoomed out
+        if self.detailed:
+            painter.setPen(self._shaft_pen)
+            shafts = [(y_pos, y_pos + self.ELEVATOR_HEIGHT) for y_pos in (cache["floor_y_positions"][floor] for floor in floors)]
+        else:
+            painter.setPen(self._floor_line_pen)
+            shafts = [(cache["floor_y_positions"][floors[-1]], cache["floor_y_positions"][floors[0]] + self.ELEVATOR_HEIGHT)] if floors else []
+        for shaft_top, shaft_bottom in shafts:
+            for elevator_id in elevator_ids:
                 x = cache["elevator_start_x"] + (elevator_id - 1) * (self.ELEVATOR_WIDTH + self.ELEVATOR_SPACING)
                 painter.drawLine(int(x), int(shaft_top), int(x), int(shaft_bottom))
                 painter.drawLine(int(x + self.ELEVATOR_WIDTH), int(shaft_top), int(x + self.ELEVATOR_WIDTH), int(shaft_bottom))
 
         # Draw horizontal floor lines
         padding = 20
-        painter.setPen(QPen(self.light_color, 1, Qt.PenStyle.SolidLine))
-        for i in range(len(self.floors) + 1):
+        painter.setPen(self._floor_line_pen)
+        visible = self._visible_floor_indices()
+        for i in range(visible.start, visible.stop + 1):
             y_pos = cache["building_y"] + cache["total_height"] - (i + 1) * self.FLOOR_HEIGHT
-            painter.drawLine(padding, int(y_pos + self.ELEVATOR_HEIGHT), width - padding, int(y_pos + self.ELEVATOR_HEIGHT))
-            painter.drawLine(padding, int(y_pos + self.FLOOR_HEIGHT), width - padding, int(y_pos + self.FLOOR_HEIGHT))
+            painter.drawLine(padding, int(y_pos + self.ELEVATOR_HEIGHT), int(width - padding), int(y_pos + self.ELEVATOR_HEIGHT))
+            painter.drawLine(padding, int(y_pos + self.FLOOR_HEIGHT), int(width - padding), int(y_pos + self.FLOOR_HEIGHT))
 
-    def _draw_elevators(self, painter, width, height):
-        """Draw all elevators with dynamic positioning based on elevator count"""
+    def _draw_elevators(self, painter, dirty: QRect):
+        """Draw the elevators overlapping the dirty area"""
         cache = self.cached_dimensions
 
-        # Draw each elevator
-        for elevator_id, elevator in self.elevator_status.items():
+        # Draw each visible elevator
+        for elevator_id in self._visible_elevator_ids():
+            elevator = self.elevator_status[elevator_id]
+            if not dirty.intersects(self._elevator_rect(elevator_id, elevator["current_position"])):
+                continue
+
             # Calculate elevator position using cached values
             x = cache["elevator_start_x"] + (elevator_id - 1) * (self.ELEVATOR_WIDTH + self.ELEVATOR_SPACING)
             y = cache["building_y"] + elevator["current_position"]
@@ -286,20 +487,19 @@ class ElevatorVisualizer(QFrame):
 
     def _draw_single_elevator(self, painter, elevator_id, elevator, x, y):
         """Draw a single elevator at the specified position"""
-        # Set elevator color based on direction
-        direction_colors = {"up": self.up_color, "down": self.down_color}
-        color = direction_colors.get(elevator["direction"], self.idle_color)
-
-        # Draw elevator body
-        painter.setPen(QPen(self.light_color, 2))
-        painter.setBrush(QBrush(color))
+        # Draw elevator body, colored by direction
+        painter.setPen(self._elevator_pen)
+        painter.setBrush(self._direction_brushes.get(elevator["direction"], self._idle_brush))
 
         elevator_rect = QRectF(x, y, self.ELEVATOR_WIDTH, self.ELEVATOR_HEIGHT)
         painter.drawRect(elevator_rect)
 
+        if not self.detailed:
+            return
+
         # Draw elevator ID
-        painter.setPen(self.text_color)
-        painter.setFont(QFont("Arial", 12, QFont.Weight.Bold))
+        painter.setPen(self._text_pen)
+        painter.setFont(self._elevator_label_font)
         painter.drawText(elevator_rect, Qt.AlignmentFlag.AlignCenter, f"E{elevator_id}")
 
         # Draw doors if needed
@@ -318,8 +518,8 @@ class ElevatorVisualizer(QFrame):
         left_door_offset = (door_width / 2) * door_percentage
         right_door_offset = (door_width / 2) * door_percentage
 
-        painter.setPen(QPen(self.light_color, 1))
-        painter.setBrush(QBrush(self.door_color))
+        painter.setPen(self._door_pen)
+        painter.setBrush(self._door_brush)
 
         # Left door
         painter.drawRect(QRectF(x + 4 - left_door_offset, y + 4, door_width, door_height))
@@ -331,5 +531,5 @@ class ElevatorVisualizer(QFrame):
         if door_percentage > 0:
             open_width = self.ELEVATOR_WIDTH - 8 - (door_width - left_door_offset) - (door_width - right_door_offset)
             if open_width > 0:
-                painter.setBrush(QBrush(self.door_open_color))
+                painter.setBrush(self._door_open_brush)
                 painter.drawRect(QRectF(x + 4 + door_width - left_door_offset, y + 4, open_width, door_height))
@@ -1,6 +1,10 @@
 import asyncio
 from enum import IntEnum, auto
-from typing import Iterable, Self, overload
+from itertools import accumulate
+from typing import TYPE_CHECKING, ClassVar, Iterable, Self, overload
+
+if TYPE_CHECKING:
+    from ..core.controller import Config
 
 
 class Event(IntEnum):
@@ -78,21 +82,173 @@ type ElevatorId = int
 type FloorLike = Floor | int | str
 
 
-class Floor(int):
-    min = -1
-    max = 3
+def _ordinal(label: int) -> int:
+    """Position of a floor label on a line without 0: -2 -> -2, -1 -> -1, 1 -> 0, 2 -> 1"""
+    return label - 1 if label > 0 else label
+
+
+def _label(ordinal: int) -> int:
+    return ordinal + 1 if ordinal >= 0 else ordinal
+
+
+class Building:
+    """
+    Geometry of the building: the floor labels from the lowest to the highest floor, and the floor-to-floor heights
+    A floor index is the position of the floor from the lowest one, the label <-> index tables and the elevations are computed once
+    Labels skip 0, the floor below "1" is "-1"; floors outside the building extend the lowest and highest ones, one index per label
+    Each controller owns its building, a `Floor` refers to the building that made it and `Building.default` parses the labels given without one
+    The `Floor` and `FloorAction` instances of the floors are preallocated, so that building them from a label, an index or a floor does not allocate
+    """
+
+    default: ClassVar["Building"]  # Floors -1 to 3, set once below
+
+    __slots__ = ("labels", "heights", "elevations", "uniform", "floors", "_numbers", "_index_of", "_floor_of", "_actions", "_outside")
+
+    def __init__(self, labels: Iterable[str | int], heights: Iterable[float] | None = None):
+        """
+        Args:
+            labels: Floor labels, in any order
+            heights: Height of each floor up to the next one, in standard floor heights, from the lowest floor; 1.0 for every floor if None
+        """
+        numbers = sorted(int(label) for label in labels)
+        if not numbers:
+            raise ValueError("Building: at least one floor is required")
+        if 0 in numbers:
+            raise ValueError("Building: floor label 0 is not allowed, the floor below 1 is -1")
+        if len(set(numbers)) != len(numbers):
+            raise ValueError(f"Building: duplicate floor labels in {numbers}")
+        self._numbers = tuple(numbers)
+        self._index_of = {number: index for index, number in enumerate(numbers)}
+        self.labels = tuple(str(number) for number in numbers)
+
+        # Interned floors by index, label and label number, and their actions by index * 3 + direction + 1
+        self.floors = tuple(self._intern(index) for index in range(len(numbers)))
+        self._floor_of: dict[str | int, Floor] = {**dict(zip(self.labels, self.floors)), **dict(zip(numbers, self.floors))}
+        self._actions = tuple(tuple.__new__(FloorAction, (floor, direction)) for floor in self.floors for direction in (Direction.DOWN, Direction.IDLE, Direction.UP))
+        self._outside: dict[int, Floor] = {}  # floors outside the building, interned on first use
+
+        self.heights = (1.0,) * len(numbers) if heights is None else tuple(float(h) for h in heights)
+        if len(self.heights) != len(numbers):
+            raise ValueError(f"Building: {len(self.heights)} floor heights for {len(numbers)} floors")
+        if any(h <= 0 for h in self.heights):
+            raise ValueError("Building: floor heights must be positive")
+        self.elevations = tuple(accumulate(self.heights, initial=0.0))  # elevation of each floor, and of the top of the highest one
+        self.uniform = all(h == self.heights[0] for h in self.heights)
+
+    @classmethod
+    def from_config(cls, config: "Config") -> Self:
+        return cls(config.floors, config.floor_heights)
+
+    def __reduce__(self):
+        return Building, (self.labels, self.heights)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __repr__(self) -> str:
+        return f"Building({', '.join(self.labels)})"
 
-    def __new__(cls, value: FloorLike) -> Self:
-        if isinstance(value, cls):
+    @property
+    def lowest(self) -> "Floor":
+        return self.floors[0]
+
+    @property
+    def highest(self) -> "Floor":
+        return self.floors[-1]
+
+    @property
+    def ground(self) -> "Floor":
+        """Floor "1", or the lowest floor if the building has none"""
+        return self.floors[self._index_of.get(1, 0)]
+
+    def _intern(self, index: int) -> "Floor":
+        floor = int.__new__(Floor, index)
+        floor.building = self
+        return floor
+
+    def floor(self, index: int) -> "Floor":
+        """Interned floor at this index"""
+        if 0 <= index < len(self.floors):
+            return self.floors[index]
+        floor = self._outside.get(index)
+        if floor is None:
+            floor = self._outside[index] = self._intern(index)
+        return floor
+
+    def parse(self, value: "FloorLike") -> "Floor":
+        """Floor with this label, or this floor if it already is one"""
+        if isinstance(value, Floor):
             return value
-        index = int(value)
+        floor = self._floor_of.get(value)
+        if floor is None:
+            floor = self.floor(self.index(int(value)))
+        return floor
+
+    def action(self, floor: "Floor", direction: Direction) -> "FloorAction":
+        """Interned action of a floor, which must be a floor of this building for the lookup to hit the table"""
+        if 0 <= floor < len(self.floors):
+            return self._actions[floor * 3 + direction + 1]
+        return tuple.__new__(FloorAction, (self.floor(floor), Direction(direction)))
+
+    def index(self, label: int) -> int:
+        """Index of the floor with this label"""
+        index = self._index_of.get(label)
+        if index is not None:
+            return index
+        if label > self._numbers[-1]:
+            return len(self._numbers) - 1 + _ordinal(label) - _ordinal(self._numbers[-1])
+        if label < self._numbers[0]:
+            return _ordinal(label) - _ordinal(self._numbers[0])
+        raise ValueError(f"Building: no floor {label}")
+
+    def label(self, index: int) -> str:
+        """Label of the floor at this index"""
+        if 0 <= index < len(self.labels):
+            return self.labels[index]
+        if index < 0:
+            return str(_label(_ordinal(self._numbers[0]) + index))
+        return str(_label(_ordinal(self._numbers[-1]) + index - len(self._numbers) + 1))
+
+    def span(self, index: int) -> float:
+        """Height between the floor at `index` and the one above it"""
         if index < 0:
-            index += 1
-        return super().__new__(cls, index)
+            return self.heights[0]
+        if index >= len(self.heights):
+            return self.heights[-1]
+        return self.heights[index]
+
+    def elevation(self, position: float) -> float:
+        """Elevation of a position in floor indices, in standard floor heights from the lowest floor"""
+        if self.uniform:
+            return position * self.heights[0]
+        index = min(max(int(position // 1), 0), len(self.heights) - 1)
+        return self.elevations[index] + (position - index) * self.heights[index]
+
+    def distance(self, a: float, b: float) -> float:
+        """Travel distance between two positions in floor indices, in standard floor heights"""
+        if self.uniform:
+            return abs(a - b) * self.heights[0]
+        return abs(self.elevation(a) - self.elevation(b))
+
+
+class Floor(int):
+    """Floor index in a `Building`, built from a label and printed as a label; instances are interned by their building"""
+
+    building: Building
+
+    def __new__(cls, value: FloorLike, building: Building | None = None) -> Self:
+        return (building or Building.default).parse(value)
+
+    @classmethod
+    def at(cls, index: int, building: Building | None = None) -> Self:
+        """Floor at an index, rather than with a label"""
+        return (building or Building.default).floor(index)
+
+    def __reduce__(self):
+        return self.building.floor, (int(self),)
 
     def __str__(self) -> str:
-        index = int(self)
-        return str(index if index > 0 else index - 1)
+        return self.building.label(int(self))
 
     def __repr__(self) -> str:
         return f"Floor({str(self)})"
@@ -105,7 +261,7 @@ class Floor(int):
 
     def __add__(self, other):
         if isinstance(other, int):
-            return super().__new__(self.__class__, int(self) + other)
+            return self.building.floor(int(self) + other)
         elif isinstance(other, float):
             return float(self) + other
         else:
@@ -124,7 +280,7 @@ class Floor(int):
         if isinstance(other, self.__class__):
             return int(self) - int(other)
         elif isinstance(other, int):
-            return super().__new__(self.__class__, int(self) - other)
+            return self.building.floor(int(self) - other)
         elif isinstance(other, float):
             return float(self) - other
         else:
@@ -155,8 +311,14 @@ class Floor(int):
 
 
 class FloorAction(tuple[Floor, Direction]):
+    """Floor and direction of a request or a stop, interned by the building"""
+
     def __new__(cls, floor: FloorLike, direction: Direction):
-        return super().__new__(cls, (Floor(floor), direction))
+        floor = Floor(floor)
+        return floor.building.action(floor, direction)
+
+    def __reduce__(self):
+        return FloorAction, tuple(self)
 
     def __repr__(self) -> str:
         return f"({self[0]}, {self[1].name})"
@@ -170,16 +332,25 @@ class FloorAction(tuple[Floor, Direction]):
         return self[1]
 
 
+Building.default = Building(("-1", "1", "2", "3"))
+
+
 class Strategy(IntEnum):
     GREEDY = auto()
     OPTIMAL = auto()
 
 
+class MotionModel(IntEnum):
+    CONSTANT = auto()  # every floor takes `floor_travel_duration`, as if the car started and stopped at max speed
+    TRAPEZOIDAL = auto()  # each run from stop to stop accelerates to max speed, cruises and decelerates
+
+
 class DestinationHeuristic(IntEnum):
     NONE = auto()
     NEAREST = auto()
     FURTHEST = auto()
     MEAN = auto()
+    LEARNED = auto()  # expected destinations under the model learned from the selected floors, see `DestinationModel`
 
 
 async def cancel(tasks: Iterable[asyncio.Task], *, message: str = "exit") -> None:
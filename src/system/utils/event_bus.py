@@ -41,6 +41,15 @@ class EventBus:
             self._handlers[event].remove(handler)
             logger.debug(f"Unsubscribed from event '{event}'")
 
+    def has_handlers(self, event: Hashable) -> bool:
+        """
+        Whether an event has subscribers
+
+        Args:
+            event: The event to check
+        """
+        return bool(self._handlers.get(event))
+
     def publish(self, event: Hashable, *args, **kwargs) -> None:
         """
         Publish a synchronous event
@@ -0,0 +1,201 @@
+import asyncio
+import bisect
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+type Labels = tuple[tuple[str, str], ...]
+
+# Upper bounds (seconds) suited for dispatch computations and event loop wakeup delays
+DURATION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# Upper bounds for the number of candidates scored by one dispatch
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+# Upper bounds (seconds) for the time an elevator stays in one state
+DWELL_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket upper bounds, as exposed by Prometheus
+    Observing a value costs one bisection and three additions
+    """
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # the last slot is the +Inf bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> list[int]:
+        result = []
+        total = 0
+        for c in self.counts:
+            total += c
+            result.append(total)
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.cumulative_counts())),
+        }
+
+
+class Metrics:
+    """
+    Registry of histograms and gauges for one controller
+    Gauges are sampled lazily by the registered collectors, only when the metrics are exported
+    """
+
+    def __init__(self, **const_labels: str):
+        self.const_labels: dict[str, str] = dict(const_labels)
+        self.histograms: dict[str, dict[Labels, Histogram]] = {}
+        self.gauges: dict[str, dict[Labels, float]] = {}
+        self.descriptions: dict[str, str] = {}
+        self._buckets: dict[str, tuple[float, ...]] = {}
+        self._collectors: list[Callable[["Metrics"], None]] = []
+
+    def describe(self, name: str, description: str, buckets: Iterable[float] | None = None) -> None:
+        self.descriptions[name] = description
+        if buckets is not None:
+            self._buckets[name] = tuple(buckets)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        family = self.histograms.setdefault(name, {})
+        h = family.get(key)
+        if h is None:
+            h = family[key] = Histogram(self._buckets.get(name, DURATION_BUCKETS))
+        return h
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        self.histogram(name, **labels).observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the wall time spent in the block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        self.gauges.setdefault(name, {})[key] = value
+
+    def add_collector(self, collector: Callable[["Metrics"], None]) -> None:
+        """Register a callback that refreshes gauges right before each export"""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def collect(self) -> None:
+        self.gauges.clear()
+        for collector in self._collectors:
+            collector(self)
+
+    def snapshot(self) -> dict:
+        """JSON-serializable view of all metrics"""
+        self.collect()
+
+        def fmt(labels: Labels) -> str:
+            return ",".join(f"{k}={v}" for k, v in labels)
+
+        return {
+            "labels": self.const_labels,
+            "histograms": {name: {fmt(labels): h.snapshot() for labels, h in family.items()} for name, family in self.histograms.items()},
+            "gauges": {name: {fmt(labels): v for labels, v in family.items()} for name, family in self.gauges.items()},
+        }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def to_prometheus(*registries: Metrics) -> str:
+    """
+    Render the registries in the Prometheus text exposition format
+    Families with the same name in different registries are merged, and told apart by their constant labels
+    """
+    histograms: dict[str, list[tuple[dict[str, str], Histogram]]] = {}
+    gauges: dict[str, list[tuple[dict[str, str], float]]] = {}
+    descriptions: dict[str, str] = {}
+
+    for registry in registries:
+        registry.collect()
+        descriptions.update(registry.descriptions)
+        for name, family in registry.histograms.items():
+            for labels, h in family.items():
+                histograms.setdefault(name, []).append(({**registry.const_labels, **dict(labels)}, h))
+        for name, family in registry.gauges.items():
+            for labels, v in family.items():
+                gauges.setdefault(name, []).append(({**registry.const_labels, **dict(labels)}, v))
+
+    lines = []
+    for name, samples in histograms.items():
+        if name in descriptions:
+            lines.append(f"# HELP {name} {descriptions[name]}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, h in samples:
+            for bound, count in zip([*map(str, h.buckets), "+Inf"], h.cumulative_counts()):
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {h.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+    for name, samples in gauges.items():
+        if name in descriptions:
+            lines.append(f"# HELP {name} {descriptions[name]}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, v in samples:
+            lines.append(f"{name}{_format_labels(labels)} {v}")
+    return "\n".join(lines) + "\n"
+
+
+async def serve_prometheus(registries: Callable[[], Iterable[Metrics]], host: str = "127.0.0.1", port: int = 9100) -> asyncio.Server:
+    """
+    Start a minimal HTTP endpoint answering every request with the Prometheus text rendering of the registries
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # Consume the request head, the path and the headers are irrelevant
+            while await reader.readline() not in (b"\r\n", b"\n", b""):
+                pass
+            body = to_prometheus(*registries()).encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n")
+            writer.write(f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode())
+            writer.write(body)
+            await writer.drain()
+        except ConnectionError as e:
+            logger.debug("Metrics endpoint: connection error %s", e)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info("Metrics endpoint listening on http://%s:%s/metrics", host, port)
+    return server
+
+
+async def publish_periodically(registry: Metrics, queue: asyncio.Queue, interval: float) -> None:
+    """Put a `metrics@<json>` snapshot message on the queue every `interval` seconds"""
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            queue.put_nowait(f"metrics@{json.dumps(registry.snapshot(), separators=(',', ':'))}")
+    except asyncio.CancelledError:
+        logger.debug("Metrics publisher cancelled")
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from itertools import chain
+from typing import Any, ContextManager, Iterator
+
+logger = logging.getLogger(__name__)
+
+NULL_SPAN = nullcontext()  # stands for a span at call sites guarded by `tracer.enabled`
+
+
+class Tracer:
+    """
+    Span recorder emitting the Chrome trace event format, readable by chrome://tracing and https://ui.perfetto.dev
+    Disabled by default: hot call sites check `tracer.enabled` first, so that a disabled tracer does not even build the span arguments
+    Each asyncio task is shown on its own track, so that the spans of concurrent tasks do not overlap
+    """
+
+    def __init__(self, max_events: int = 1_000_000):
+        self.enabled = False
+        self.events: deque[dict[str, Any]] = deque(maxlen=max_events)  # oldest events are dropped first under load
+        self.metadata: list[dict[str, Any]] = []  # track names, one per track, kept however many events are dropped
+        self._origin = time.perf_counter_ns()
+        self._tids: dict[str, int] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def clear(self) -> None:
+        self.events.clear()
+        self.metadata.clear()
+        self._tids.clear()
+
+    def _now(self) -> float:
+        """Monotonic timestamp in microseconds, as expected by the trace format"""
+        return (time.perf_counter_ns() - self._origin) / 1000
+
+    def _tid(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        track = task.get_name().split(" ")[0] if task is not None else threading.current_thread().name
+        tid = self._tids.get(track)
+        if tid is None:
+            tid = self._tids[track] = len(self._tids) + 1
+            self.metadata.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": track}})
+        return tid
+
+    def span(self, name: str, cat: str = "elevator", **args) -> ContextManager[None]:
+        """Record the duration of the block as a complete event"""
+        if not self.enabled:
+            return NULL_SPAN
+        return self._span(name, cat, args)
+
+    @contextmanager
+    def _span(self, name: str, cat: str, args: dict[str, Any]) -> Iterator[None]:
+        tid = self._tid()
+        start = self._now()
+        try:
+            yield
+        finally:
+            self.events.append({"name": name, "cat": cat, "ph": "X", "ts": start, "dur": self._now() - start, "pid": os.getpid(), "tid": tid, "args": args})
+
+    def instant(self, name: str, cat: str = "elevator", **args) -> None:
+        """Record a point in time on the track of the current task"""
+        if not self.enabled:
+            return
+        self.events.append({"name": name, "cat": cat, "ph": "i", "s": "t", "ts": self._now(), "pid": os.getpid(), "tid": self._tid(), "args": args})
+
+    def begin(self, name: str, id: str, cat: str = "message", **args) -> None:
+        """Open an async span, which may be closed by `end` from any task"""
+        if not self.enabled:
+            return
+        self.events.append({"name": name, "cat": cat, "ph": "b", "id": id, "ts": self._now(), "pid": os.getpid(), "tid": self._tid(), "args": args})
+
+    def end(self, name: str, id: str, cat: str = "message", **args) -> None:
+        if not self.enabled:
+            return
+        self.events.append({"name": name, "cat": cat, "ph": "e", "id": id, "ts": self._now(), "pid": os.getpid(), "tid": self._tid(), "args": args})
+
+    def to_json(self) -> dict[str, Any]:
+        """
+        Trace in the JSON object format
+        Span arguments are recorded as is and only turned into strings here, to keep formatting out of the hot path
+        """
+
+        def fmt(value: Any) -> Any:
+            return value if type(value) in (str, int, float, bool) else str(value)
+
+        return {
+            "traceEvents": [{**e, "args": {k: fmt(v) for k, v in e["args"].items()}} for e in chain(self.metadata, self.events)],
+            "displayTimeUnit": "ms",
+        }
+
+    def dump(self, path: str) -> None:
+        """Write the recorded events to a JSON trace file"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f)
+        logger.info("Trace with %s events written to %s", len(self.events), path)
+
+
+# Global tracer instance
+tracer = Tracer()
@@ -8,20 +8,14 @@ from typing import AsyncGenerator
 
 import zmq
 import zmq.asyncio
-from rich.logging import RichHandler
-
-logging.basicConfig(
-    level="INFO",
-    format="%(message)s",
-    datefmt="[%X]",
-    handlers=[RichHandler()],
-)
+
 logger = logging.getLogger(__name__)
 
 
 class Base(ABC):
-    def __init__(self):
-        self._context = zmq.asyncio.Context()
+    def __init__(self, context: zmq.asyncio.Context | None = None):
+        # Sockets of several clients hosted in one process can share a single context (and its I/O thread)
+        self._context = zmq.asyncio.Context() if context is None else context
         self._socket: zmq.asyncio.Socket | None = None
 
         self._send_queue = asyncio.Queue()
@@ -72,8 +66,8 @@ class Base(ABC):
 
 
 class Client(Base):
-    def __init__(self, server_host="127.0.0.1", port=27132, identity="GroupX"):
-        super().__init__()
+    def __init__(self, server_host="127.0.0.1", port=27132, identity="GroupX", context: zmq.asyncio.Context | None = None):
+        super().__init__(context)
 
         self.socket = self._context.socket(zmq.DEALER)
         self.socket.setsockopt_string(zmq.IDENTITY, identity)
@@ -121,8 +115,8 @@ class Client(Base):
 
 
 class Server(Base):
-    def __init__(self, server_host="127.0.0.1", server_port=27132):
-        super().__init__()
+    def __init__(self, server_host="127.0.0.1", server_port=27132, context: zmq.asyncio.Context | None = None):
+        super().__init__(context)
         self.clients_addr = set()
         self.client_queue = asyncio.Queue(maxsize=100)
 
@@ -177,6 +171,14 @@ class Server(Base):
 
 
 if __name__ == "__main__":
+    from rich.logging import RichHandler
+
+    logging.basicConfig(
+        level="INFO",
+        format="%(message)s",
+        datefmt="[%X]",
+        handlers=[RichHandler()],
+    )
 
     async def main():
         parser = argparse.ArgumentParser(description="ZMQ Async Server/Client")
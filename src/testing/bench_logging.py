@@ -0,0 +1,85 @@
+"""
+Benchmark of the logging cost in the elevator hot paths
+
+Usage: python bench_logging.py [--cycles N]
+
+Compares the commit/pop throughput of an elevator with debug logging disabled (the default now),
+with debug logging enabled (the level previously forced by `core/logger.py`), and with debug logging
+enabled behind a `QueueHandler`. It also compares eager f-string formatting with deferred formatting
+for a disabled debug message embedding `TargetFloorChains.__repr__`.
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import timeit
+
+from common import Direction, Elevator, Floor, TargetFloorChains, logger
+from system.core.logger import use_queue_handler
+
+
+def make_elevator() -> Elevator:
+    """An elevator whose target floors can be committed and popped without running its loops"""
+    e = Elevator(id=1)
+    e.event_loop = asyncio.get_running_loop()
+    e.exit_event = asyncio.Event()
+    e.target_floor_chains = TargetFloorChains(event_loop=e.event_loop, exit_event=e.exit_event)
+    e.move_loop_started.set()
+    return e
+
+
+def commit_pop_cycle(e: Elevator):
+    e.commit_floor(Floor(3), Direction.DOWN)
+    e.commit_floor(Floor(2), Direction.UP)
+    e.commit_floor(Floor(-1), Direction.IDLE)
+    e.pop_target()
+    e.pop_target()
+    e.pop_target()
+
+
+def measure(e: Elevator, cycles: int) -> float:
+    """Cycles per second, best of 5 runs"""
+    return cycles / min(timeit.repeat(lambda: commit_pop_cycle(e), number=cycles, repeat=5))
+
+
+async def run(cycles: int):
+    root = logging.getLogger()
+    root_handlers = root.handlers[:]
+    stream_handler = logging.StreamHandler(io.StringIO())
+    root.handlers = [stream_handler]
+
+    e = make_elevator()
+    e.commit_floor(Floor(2), Direction.UP)  # keep the chains non-trivial
+
+    logger.setLevel(logging.INFO)
+    disabled = measure(e, cycles)
+
+    logger.setLevel(logging.DEBUG)
+    enabled = measure(e, cycles)
+
+    listener = use_queue_handler()
+    queued = measure(e, cycles)
+    listener.stop()
+
+    root.handlers = root_handlers
+    logger.setLevel(logging.INFO)
+
+    print(f"commit/pop cycles per second ({cycles} cycles, 3 commits and 3 pops each)")
+    print(f"  debug disabled       : {disabled:12.0f}")
+    print(f"  debug enabled        : {enabled:12.0f}  (x{disabled / enabled:.1f} slower)")
+    print(f"  debug enabled, queue : {queued:12.0f}  (x{disabled / queued:.1f} slower)")
+
+    chains = e.target_floor_chains
+    eager = min(timeit.repeat(lambda: logger.debug(f"Elevator {e.id}: {chains}"), number=cycles, repeat=5))
+    deferred = min(timeit.repeat(lambda: logger.debug("Elevator %s: %s", e.id, chains), number=cycles, repeat=5))
+    print(f"disabled debug message with the chains repr ({cycles} calls)")
+    print(f"  eager f-string       : {eager * 1e9 / cycles:8.0f} ns/call")
+    print(f"  deferred %-style     : {deferred * 1e9 / cycles:8.0f} ns/call  (x{eager / deferred:.1f} faster)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the logging cost in the elevator hot paths")
+    parser.add_argument("--cycles", type=int, default=20000, help="Number of commit/pop cycles per run")
+    args = parser.parse_args()
+    asyncio.run(run(args.cycles))
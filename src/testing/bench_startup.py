@@ -0,0 +1,66 @@
+"""
+Benchmark of the import time of the entry points
+
+Usage: python bench_startup.py [--runs N] [--budget MS]
+
+Imports `system.__main__` (the headless path, without Qt, rich or ZeroMQ) and `system.gui` in fresh
+interpreters with `-X importtime`, and reports the median cumulative import time of each along with the
+modules costing the most to the headless path. Exits with status 1 when the headless import exceeds the
+budget, so that it can be enforced in CI.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).parent.parent
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """Self and cumulative import time in microseconds of every module imported by `import <module>`"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=SRC, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def run(runs: int, budget: float) -> int:
+    samples = {"system.__main__": [], "system.gui": []}
+    last = {}
+    for _ in range(runs):
+        for module in samples:
+            last[module] = import_times(module)
+            samples[module].append(last[module][module][1] / 1000)
+
+    print(f"median import time ({runs} runs)")
+    for module, times in samples.items():
+        print(f"  {module:<16}: {statistics.median(times):8.1f} ms")
+
+    print("largest self import times of system.__main__")
+    for name, (self_us, _) in sorted(last["system.__main__"].items(), key=lambda item: -item[1][0])[:10]:
+        print(f"  {name:<32}: {self_us / 1000:8.1f} ms")
+
+    heavy = [m for m in last["system.__main__"] if m.split(".")[0] in ("qtpy", "PyQt6", "qasync", "rich", "zmq")]
+    headless = statistics.median(samples["system.__main__"])
+    if heavy:
+        print(f"FAIL: the headless path imports {', '.join(heavy)}")
+        return 1
+    if headless > budget:
+        print(f"FAIL: the headless import takes {headless:.1f} ms, over the budget of {budget:.0f} ms")
+        return 1
+    print(f"OK: within the budget of {budget:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the entry points")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters per entry point")
+    parser.add_argument("--budget", type=float, default=250.0, help="Budget in milliseconds of the headless import")
+    args = parser.parse_args()
+    sys.exit(run(args.runs, args.budget))
@@ -0,0 +1,89 @@
+"""
+Benchmark of the elevator visualizer paint cost
+
+Usage: python bench_visualizer.py [--cars N] [--floors N] [--frames N]
+
+Renders a building of 50 cars × 100 floors offscreen and reports the time per frame for a full paint
+that redraws the building, a full paint over the cached building layer, and the repaint of a single
+moved car. It also reports what constructing the fonts, pens and brushes per car and per paint, as
+the draw loop used to, would add to every full frame. Finally, it renders the same building in a
+window-sized viewport, where only the visible floors and cars are drawn, at full zoom and zoomed
+out to fit (without labels and doors).
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from common import Direction, ElevatorVisualizer, Floor, ThemeManager, main_window
+from qtpy.QtCore import QPoint, Qt
+from qtpy.QtGui import QBrush, QFont, QPen, QPixmap, QRegion
+from qtpy.QtWidgets import QApplication
+
+
+def per_frame(fn, frames: int) -> float:
+    """Milliseconds per call, best of 5 runs"""
+    return min(timeit.repeat(fn, number=frames, repeat=5)) * 1e3 / frames
+
+
+def run(cars: int, floors: int, frames: int):
+    app = QApplication(sys.argv)
+    main_window.theme_manager = ThemeManager(app)
+
+    v = ElevatorVisualizer([Floor.at(i) for i in range(floors)], cars)
+    v.resize(v.BUILDING_WIDTH + 100, v.BUILDING_HEIGHT + 50)
+    for eid in v.elevator_status:
+        floor = Floor.at(random.randrange(floors))
+        v.update_elevator_status(eid, floor, random.random() < 0.2, random.choice(list(Direction)))
+        v.elevator_status[eid]["door_percentage"] = random.random() if v.elevator_status[eid]["door_open"] else 0.0
+
+    target = QPixmap(v.size())
+    v.render(target)  # builds the caches
+
+    def full_rebuild():
+        v._static_layer = None
+        v.render(target)
+
+    def full_cached():
+        v.render(target)
+
+    car = v._elevator_rect(1, v.elevator_status[1]["current_position"])
+
+    def single_car():
+        v.render(target, QPoint(), QRegion(car))
+
+    def resources_per_car():
+        QFont("Arial", 10, QFont.Weight.Bold)
+        QPen(v.light_color, 1, Qt.PenStyle.DashLine)
+        QPen(v.light_color, 1, Qt.PenStyle.SolidLine)
+        for _ in range(cars):
+            {"up": v.up_color, "down": v.down_color}
+            QPen(v.light_color, 2)
+            QBrush(v.idle_color)
+            QFont("Arial", 12, QFont.Weight.Bold)
+
+    print(f"paint time per frame ({cars} cars × {floors} floors, {v.width()}×{v.height()} px, {frames} frames)")
+    print(f"  full paint, building redrawn    : {per_frame(full_rebuild, frames):8.3f} ms")
+    print(f"  full paint, cached building     : {per_frame(full_cached, frames):8.3f} ms")
+    print(f"  one moved car                   : {per_frame(single_car, frames):8.3f} ms")
+    print(f"  per-car fonts, pens and brushes : {per_frame(resources_per_car, frames):8.3f} ms  (no longer paid)")
+
+    v.resize(800, 600)
+    target = QPixmap(v.size())
+    print(f"paint time per frame in a {v.width()}×{v.height()} px viewport, building redrawn")
+    print(f"  {'zoom 1':<32}: {per_frame(full_rebuild, frames):8.3f} ms")
+    v.fit_to_view()
+    print(f"  {f'zoom {v.zoom:.3f} (fit)':<32}: {per_frame(full_rebuild, frames):8.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the elevator visualizer paint cost")
+    parser.add_argument("--cars", type=int, default=50, help="Number of elevators")
+    parser.add_argument("--floors", type=int, default=100, help="Number of floors")
+    parser.add_argument("--frames", type=int, default=20, help="Number of frames per run")
+    args = parser.parse_args()
+    run(args.cars, args.floors, args.frames)
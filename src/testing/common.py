@@ -7,14 +7,16 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from system import gui
-from system.core.controller import Controller
+from system.core.controller import Config, Controller
+from system.core.destinations import DestinationModel
 from system.core.elevator import Elevator, Elevators, TargetFloorChains, TargetFloors, logger
 from system.gui import main_window
 from system.gui.gui_controller import GUIController
 from system.gui.main_window import ElevatorPanel
 from system.gui.theme_manager import ThemeManager
 from system.gui.visualizer import ElevatorVisualizer
-from system.utils.common import Direction, DoorDirection, DoorState, ElevatorId, ElevatorState, Event, Floor, FloorAction, FloorLike, Strategy
+from system.utils.common import Building, DestinationHeuristic, Direction, DoorDirection, DoorState, ElevatorId, ElevatorState, Event, Floor, FloorAction, FloorLike, MotionModel, Strategy
+from system.utils.event_bus import event_bus
 from system.utils.zmq_async import Client, Server
 
 logger.setLevel("CRITICAL")  # Suppress logging during tests
@@ -72,7 +74,9 @@ __all__ = [
     "GUIAsyncioTestCase",
     "message_sender",
     # Core
+    "Config",
     "Controller",
+    "DestinationModel",
     "Elevator",
     "Elevators",
     "TargetFloors",
@@ -85,6 +89,8 @@ __all__ = [
     "ThemeManager",
     "ElevatorVisualizer",
     # Utils
+    "Building",
+    "DestinationHeuristic",
     "Direction",
     "DoorDirection",
     "DoorState",
@@ -94,7 +100,9 @@ __all__ = [
     "Floor",
     "FloorAction",
     "FloorLike",
+    "MotionModel",
     "Strategy",
+    "event_bus",
     # ZMQ
     "Client",
     "Server",
@@ -0,0 +1,62 @@
+import unittest
+from collections import deque
+
+from common import GUIAsyncioTestCase
+
+
+class TestConsoleWidget(GUIAsyncioTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.console = self.window.console_widget
+        self.welcome_lines = self.console.console_output.blockCount()
+
+    def lines(self) -> list[str]:
+        return self.console.console_output.toPlainText().splitlines()[self.welcome_lines :]
+
+    async def test_messages_are_batched(self):
+        self.console.log_message("🡒 call_up@1")
+        self.console.log_message("🡐 up_floor_arrived@1#1")
+        self.assertEqual(self.lines(), [])
+
+        self.console.flush_messages()
+        self.assertEqual(len(self.lines()), 2)
+        self.assertTrue(self.lines()[0].endswith(" 🡒 call_up@1"))
+        self.assertTrue(self.lines()[1].startswith("["))
+
+    async def test_log_is_bounded(self):
+        self.console.MAX_MESSAGES = 10
+        self.console.messages = deque(maxlen=10)
+        self.console.console_output.setMaximumBlockCount(10)
+        for i in range(25):
+            self.console.log_message(f"message {i}")
+            if i % 7 == 0:
+                self.console.flush_messages()
+        self.console.flush_messages()
+
+        self.assertEqual(len(self.console.messages), 10)
+        self.assertEqual(self.console.console_output.blockCount(), 10)
+        self.assertTrue(self.console.console_output.toPlainText().splitlines()[-1].endswith("message 24"))
+
+    async def test_filter(self):
+        self.console.log_message("🡒 call_up@1")
+        self.console.log_message("🡐 door_opened#1")
+        self.console.log_message("🡒 select_floor@2#1")
+        self.console.flush_messages()
+
+        self.console.filter_input.setText("#1")
+        self.assertEqual(len(self.lines()), 2)
+
+        # Messages not matching the filter are kept, but not shown
+        self.console.log_message("🡒 call_down@3")
+        self.console.flush_messages()
+        self.assertEqual(len(self.lines()), 2)
+
+        self.console.filter_input.clear()
+        self.assertEqual(len(self.lines()), 4)
+
+
+if __name__ == "__main__":
+    try:
+        unittest.main()
+    except KeyboardInterrupt:
+        pass
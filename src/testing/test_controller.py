@@ -1,7 +1,8 @@
 import asyncio
 import unittest
+from unittest.mock import patch
 
-from common import Controller, Direction, Floor
+from common import Config, Controller, Direction, Floor, FloorAction
 
 
 class TestController(unittest.IsolatedAsyncioTestCase):
@@ -94,6 +95,42 @@ class TestController(unittest.IsolatedAsyncioTestCase):
         await self.controller.select_floor(Floor("3"), 1)
         self.assertEqual(self.controller.elevators[1].current_floor, Floor("3"))
 
+    async def test_eta(self):
+        self.assertIsNone(self.controller.eta("3", Direction.DOWN))
+        task = asyncio.create_task(self.controller.call_elevator(Floor("3"), Direction.DOWN))
+        await asyncio.sleep(0)
+        self.assertAlmostEqual(self.controller.eta("3", Direction.DOWN), 2 * self.controller.config.floor_travel_duration, delta=0.05)
+        await task
+        self.assertIsNone(self.controller.eta("3", Direction.DOWN))
+
+    async def test_optimal_reassign(self):
+        eid, candidates = self.controller.optimal_reassign(FloorAction(Floor("2"), Direction.UP))
+        self.assertIn(eid, self.controller.elevators)
+        self.assertEqual(candidates, 1)  # nothing is committed yet, the only assignment is the current one
+        self.assertEqual(self.controller.optimal_reassign(), 1)
+
+    async def test_change_floors_when_started(self):
+        e = self.controller.elevators[1]
+        self.controller.set_config(floors=("-2", "-1", "1", "2", "3"), floor_heights=(1.0, 1.0, 1.0, 2.0, 1.0))
+        building = self.controller.building
+        self.assertEqual((int(e.current_floor), str(e.current_floor)), (2, "1"))  # same label, new index
+        self.assertIs(e.target_floor_chains.building, building)
+        self.assertTrue(all(c.building is building for c in e.target_floor_chains.chains))
+
+        # Floor 2 is twice as high as the others now
+        request = FloorAction(building.parse("3"), Direction.UP)
+        self.assertAlmostEqual(e.estimate_total_duration(request), e.calculate_duration(3.0, 1, n_runs=1))
+        await self.controller.call_elevator(Floor("3", building), Direction.UP)
+        self.assertEqual(str(e.current_floor), "3")
+
+        # Not while a stop is committed
+        task = asyncio.create_task(self.controller.select_floor(Floor("1", building), 1))
+        await asyncio.sleep(0)
+        with self.assertRaises(ValueError):
+            self.controller.set_config(floors=("1", "2", "3"))
+        self.assertIs(self.controller.building, building)
+        await task
+
     async def test_open_door(self):
         elevator = self.controller.elevators[1]
         await self.controller.open_door(elevator)
@@ -105,6 +142,36 @@ class TestController(unittest.IsolatedAsyncioTestCase):
         self.assertFalse(elevator.door_open)
 
 
+class TestReoptimize(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.controller = Controller(Config(floor_travel_duration=0.05, door_stay_duration=0.05, door_move_duration=0.05, reoptimize_delay=0.05))
+        await self.controller.start()
+
+    async def asyncTearDown(self):
+        await self.controller.stop()
+
+    async def test_burst_is_solved_once(self):
+        with patch.object(self.controller, "optimal_reassign", wraps=self.controller.optimal_reassign) as optimal_reassign:
+            tasks = [asyncio.create_task(self.controller.call_elevator(Floor(f), d)) for f, d in (("2", Direction.UP), ("3", Direction.DOWN), ("-1", Direction.UP), ("2", Direction.DOWN))]
+            await asyncio.sleep(0)
+            self.assertEqual(len(self.controller.elevators.requests), 4)  # every call got a provisional elevator at once
+            optimal_reassign.assert_not_called()
+
+            await asyncio.sleep(0.1)
+            optimal_reassign.assert_called_once_with()
+            self.assertIsNone(self.controller._reoptimize_handle)
+            await asyncio.gather(*tasks)
+        self.assertEqual(len(self.controller.elevators.requests), 0)
+
+    async def test_stop_cancels_pending_reoptimization(self):
+        self.controller.reoptimize()
+        handle = self.controller._reoptimize_handle
+        self.assertIsNotNone(handle)
+        await self.controller.stop()
+        self.assertTrue(handle.cancelled())
+        await self.controller.start()
+
+
 if __name__ == "__main__":
     try:
         unittest.main()
@@ -0,0 +1,183 @@
+import asyncio
+import random
+import unittest
+from copy import copy
+from unittest.mock import patch
+
+from common import Building, Config, Controller, DestinationHeuristic, DestinationModel, Direction, Floor, FloorAction, TargetFloorChains
+
+
+class TestDestinationModel(unittest.TestCase):
+    def test_prior(self):
+        model = DestinationModel()
+        bucket = model.bucket()
+        self.assertEqual(model.distribution(Floor("1"), Direction.UP, bucket), {Floor("2"): 0.5, Floor("3"): 0.5})
+        self.assertEqual(model.distribution(Floor("1"), Direction.DOWN, bucket), {Floor("-1"): 1.0})
+
+    def test_observe(self):
+        model = DestinationModel()
+        bucket = model.bucket()
+        for _ in range(3):
+            self.assertTrue(model.observe("1", Direction.UP, "3"))
+        self.assertFalse(model.observe("1", Direction.UP, "-1"))  # not in the direction of the call
+        model.observe("1", Direction.UP, "2")
+        self.assertEqual(model.samples("1", Direction.UP, bucket), 4)
+        self.assertEqual(model.distribution(Floor("1"), Direction.UP, bucket), {Floor("2"): 0.5, Floor("3"): 0.5})  # not enough samples yet
+
+        model.observe("1", Direction.UP, "3")
+        self.assertEqual(model.distribution(Floor("1"), Direction.UP, bucket), {Floor("3"): 0.8, Floor("2"): 0.2})
+
+    def test_bounded_counts(self):
+        model = DestinationModel()
+        bucket = model.bucket()
+        for _ in range(model.MAX_SAMPLES * 3):
+            model.observe("-1", Direction.UP, "3")
+        self.assertLess(model.samples("-1", Direction.UP, bucket), model.MAX_SAMPLES)
+        self.assertEqual(model.distribution(Floor("-1"), Direction.UP, bucket), {Floor("3"): 1.0})
+
+    def test_buckets(self):
+        model = DestinationModel(bucket_seconds=6 * 3600)
+        self.assertIn(model.bucket(), range(4))
+        with self.assertRaises(ValueError):
+            DestinationModel(bucket_seconds=0)
+
+    def test_other_building(self):
+        building = Building(("-2", "-1", "1", "2", "5"))
+        model = DestinationModel(building=building)
+        bucket = model.bucket()
+        for _ in range(model.MIN_SAMPLES):
+            self.assertTrue(model.observe("-2", Direction.UP, "5"))  # labels of the building, not of the default one
+        self.assertEqual(model.samples("-2", Direction.UP, bucket), model.MIN_SAMPLES)
+        self.assertEqual(model.distribution(building.parse("-2"), Direction.UP, bucket), {building.parse("5"): 1.0})
+
+        # The observations are kept on a building with the same floors, and forgotten on another geometry
+        same = Building(building.labels, heights=(1.0, 1.0, 2.0, 1.0, 1.0))
+        model.set_building(same)
+        distribution = model.distribution(same.parse("-2"), Direction.UP, bucket)
+        self.assertEqual(distribution, {same.parse("5"): 1.0})
+        self.assertIs(next(iter(distribution)).building, same)
+        model.set_building(Building(("-1", "1", "2", "3")))
+        self.assertEqual(model.samples("-1", Direction.UP, bucket), 0)
+
+
+class TestLearnedHeuristic(unittest.TestCase):
+    def setUp(self):
+        self.chains = TargetFloorChains(event_loop=asyncio.AbstractEventLoop())
+
+    def test_certain_destinations(self):
+        # With a single destination per call, the expected metric is the metric of the plan including the destinations
+        building = Building(("-2", "-1", "1", "2", "3", "4", "5", "6"), heights=(1.5, 1.0, 1.2, 1.0, 1.0, 2.0, 1.0, 1.0))
+        self.chains = TargetFloorChains(event_loop=asyncio.AbstractEventLoop(), building=building)
+        rng = random.Random(49)
+        floors = building.floors
+        for _ in range(200):
+            self.chains.clear()
+            model = DestinationModel()
+            destinations: dict[FloorAction, Floor] = {}
+            start = rng.randrange(len(floors))
+            for _ in range(rng.randrange(8)):
+                action = FloorAction(rng.choice(floors), rng.choice(list(Direction)))
+                if action in self.chains:
+                    continue
+                if action.direction != Direction.IDLE:
+                    reachable = [f for f in floors if action.floor.is_of(action.direction, f)]
+                    if not reachable:
+                        continue
+                    destinations[action] = rng.choice(reachable)
+                    for _ in range(model.MIN_SAMPLES):
+                        model.observe(action.floor, action.direction, destinations[action])
+                direction = int(action.floor) - start
+                self.chains.add(action, target_direction=Direction((direction > 0) - (direction < 0)))
+
+            clone = copy(self.chains)
+            for chain, clone_chain in zip(self.chains.chains, clone.chains):
+                for action in chain:
+                    if action.direction != Direction.IDLE:
+                        clone_chain.add_unique(destinations[action], Direction.IDLE)
+            n_floors, n_stops = self.chains.get_metric(start, DestinationHeuristic.LEARNED, model)
+            expected = clone.get_metric(start)
+            self.assertAlmostEqual(n_floors, expected[0])
+            self.assertAlmostEqual(n_stops, expected[1])
+
+    def test_prior_matches_mean_for_one_call(self):
+        self.chains.add(FloorAction(Floor("1"), Direction.UP), target_direction=Direction.UP)
+        learned = self.chains.get_metric(0, DestinationHeuristic.LEARNED)
+        mean = self.chains.get_metric(0, DestinationHeuristic.MEAN)
+        self.assertAlmostEqual(learned[0], mean[0])
+        self.assertAlmostEqual(learned[1], mean[1])
+
+    def test_expectation(self):
+        # Two independent calls going up from floor -1 and 1, each to floor 2 or 3 with even chances
+        model = DestinationModel()
+        for origin in ("-1", "1"):
+            for destination in ("2", "3") * model.MIN_SAMPLES:
+                model.observe(origin, Direction.UP, destination)
+        self.chains.add(FloorAction(Floor("-1"), Direction.UP), target_direction=Direction.IDLE)
+        self.chains.add(FloorAction(Floor("1"), Direction.UP), target_direction=Direction.UP)
+
+        n_floors, n_stops = self.chains.get_metric(0, DestinationHeuristic.LEARNED, model)
+        self.assertAlmostEqual(n_floors, 1 + 0.25 * 1 + 0.75 * 2)  # the run ends at floor 3 unless both go to floor 2
+        self.assertAlmostEqual(n_stops, 2 + 0.75 + 0.75)  # floor 2 and floor 3 are each skipped with a chance of 1/4
+
+
+class TestControllerLearning(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        config = Config(floor_travel_duration=0.05, door_stay_duration=0.05, door_move_duration=0.05, elevator_count=1, destination_heuristic=DestinationHeuristic.LEARNED)
+        self.controller = Controller(config)
+        await self.controller.start()
+
+    async def asyncTearDown(self):
+        await self.controller.stop()
+
+    async def test_selected_floor_after_call(self):
+        model = self.controller.destination_model
+        await self.controller.call_elevator(Floor("2"), Direction.UP)
+        await self.controller.select_floor(Floor("3"), 1)
+        await self.controller.select_floor(Floor("-1"), 1)  # not a destination of the call, and away from its floor
+        self.assertEqual(model.samples("2", Direction.UP, model.bucket()), 1)
+
+        await self.controller.reset()
+        self.assertIs(self.controller.elevators[1].destination_model, model)  # kept across resets
+
+    async def test_floors_of_the_controller(self):
+        await self.controller.stop()
+        self.controller = Controller(Config(floors=("-2", "-1", "1", "2", "5"), destination_heuristic=DestinationHeuristic.LEARNED))
+        model = self.controller.destination_model
+        self.assertIs(model.building, self.controller.building)
+        self.assertTrue(model.observe("-2", Direction.UP, "5"))
+        self.assertEqual(model.samples("-2", Direction.UP, model.bucket()), 1)
+
+        self.controller.set_config(floors=("-1", "1", "2", "3"))
+        self.assertIs(model.building, self.controller.building)
+        self.assertEqual(model.samples("-1", Direction.UP, model.bucket()), 0)
+        await self.controller.start()
+
+    async def test_one_bucket_per_dispatch(self):
+        await self.controller.set_elevator_count(3)
+        for floor in ("2", "3"):
+            self.controller.elevators.commit_floor(1, FloorAction(Floor(floor), Direction.DOWN))
+        model = self.controller.destination_model
+        with patch.object(model, "bucket", wraps=model.bucket) as bucket:
+            _, candidates = self.controller.optimal_reassign(FloorAction(Floor("1"), Direction.UP))
+        self.assertGreater(candidates, 1)
+        self.assertEqual(bucket.call_count, 1)
+        for request in self.controller.elevators.requests:
+            self.controller.elevators.cancel_commit(request)
+
+    async def test_selection_after_leaving_the_floor(self):
+        model = self.controller.destination_model
+        await self.controller.call_elevator(Floor("2"), Direction.UP)
+        await self.controller.select_floor(Floor("3"), 1)
+        self.assertIsNone(self.controller.elevators[1].last_call)  # the doors closed before leaving floor 2
+
+        # Back at floor 2 for a floor selected in the car, not for a hall call
+        await self.controller.select_floor(Floor("2"), 1)
+        await self.controller.select_floor(Floor("3"), 1)
+        self.assertEqual(model.samples("2", Direction.UP, model.bucket()), 1)
+
+
+if __name__ == "__main__":
+    try:
+        unittest.main()
+    except KeyboardInterrupt:
+        pass
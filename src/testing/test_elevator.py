@@ -1,7 +1,8 @@
 import asyncio
 import unittest
+from unittest.mock import patch
 
-from common import Direction, DoorDirection, Elevator, ElevatorState, FloorAction, TargetFloors
+from common import Direction, DoorDirection, Elevator, ElevatorState, Event, FloorAction, MotionModel, TargetFloors, event_bus
 
 
 class TestElevator(unittest.IsolatedAsyncioTestCase):
@@ -251,6 +252,88 @@ class TestElevator(unittest.IsolatedAsyncioTestCase):
         msg = await self.elevator.queue.get()
         self.assertEqual(msg, "up_floor_arrived@2#1")
 
+    async def test_move_loop_single_timer_per_run(self):
+        self.elevator.current_floor = 1
+        floors = []
+        with patch("system.core.elevator.event_bus.publish", side_effect=lambda event, eid, floor, *args: floors.append(floor) if event == Event.ELEVATOR_FLOOR_CHANGED else None):
+            with patch.object(self.elevator.event_loop, "call_at", wraps=self.elevator.event_loop.call_at) as call_at:
+                event = self.elevator.commit_floor(5, Direction.IDLE)
+                await asyncio.sleep(self.elevator.floor_travel_duration * 1.5)
+                self.assertEqual(self.elevator.current_floor, 2)  # derived from the run when read
+                self.assertAlmostEqual(self.elevator.current_position, 2.5, delta=0.2)
+                await event.wait()
+                self.assertEqual(sum(c.args[1].__name__ == "_resolve" for c in call_at.call_args_list), 1)
+        self.assertEqual(floors, [2, 3, 4, 5])  # every floor passed is published, in order
+
+    async def test_move_loop_publishes_floor_passes_on_time(self):
+        loop = asyncio.get_running_loop()
+        self.elevator.current_floor = 1
+        passes = []
+
+        def on_floor_changed(eid, floor, *args):
+            passes.append((int(floor), loop.time(), self.elevator._moving_timestamp))
+
+        event_bus.subscribe(Event.ELEVATOR_FLOOR_CHANGED, on_floor_changed)
+        try:
+            start = loop.time()
+            await self.elevator.commit_floor(4, Direction.IDLE).wait()
+        finally:
+            event_bus.unsubscribe(Event.ELEVATOR_FLOOR_CHANGED, on_floor_changed)
+
+        self.assertEqual([floor for floor, *_ in passes], [2, 3, 4])
+        for k, (_, published, stamp) in enumerate(passes, 1):
+            self.assertAlmostEqual(stamp - start, k * self.elevator.floor_travel_duration, delta=0.05)
+            self.assertAlmostEqual(published, stamp, delta=0.05)  # published when passed, without anyone reading the state
+
+    async def test_move_loop_target_inserted_ahead(self):
+        self.elevator.current_floor = 1
+        event5 = self.elevator.commit_floor(5, Direction.IDLE)
+        await asyncio.sleep(self.elevator.floor_travel_duration * 1.5)
+        event3 = self.elevator.commit_floor(3, Direction.IDLE)
+        await asyncio.sleep(0)
+        self.assertEqual(len(self.elevator._passes), 2)  # the run now ends at floor 3
+
+        await event3.wait()
+        self.assertEqual(self.elevator.current_floor, 3)
+        self.assertFalse(event5.is_set())
+        await event5.wait()
+        self.assertEqual(self.elevator.current_floor, 5)
+
+    async def test_eta_table(self):
+        loop = asyncio.get_running_loop()
+        self.elevator.current_floor = 1
+        start = loop.time()
+        event3 = self.elevator.commit_floor(3, Direction.IDLE)
+        self.elevator.commit_floor(5, Direction.IDLE)
+        eta = self.elevator.target_floor_eta
+        door_cycle = 2 * self.elevator.door_move_duration + self.elevator.door_stay_duration
+        self.assertAlmostEqual(eta[FloorAction(3, Direction.IDLE)] - start, 2 * self.elevator.floor_travel_duration, delta=0.02)
+        self.assertAlmostEqual(eta[FloorAction(5, Direction.IDLE)] - eta[FloorAction(3, Direction.IDLE)], door_cycle + 2 * self.elevator.floor_travel_duration, delta=0.02)
+
+        expected = eta[FloorAction(3, Direction.IDLE)]
+        await event3.wait()
+        self.assertAlmostEqual(loop.time(), expected, delta=0.05)
+        self.assertEqual(list(self.elevator.target_floor_eta), [FloorAction(5, Direction.IDLE)])
+
+        self.elevator.cancel_commit(5, Direction.IDLE)
+        self.assertEqual(self.elevator.target_floor_eta, {})
+        self.assertFalse(any(self.elevator.queue.get_nowait().partition("@")[0].endswith("eta") for _ in range(self.elevator.queue.qsize())))
+
+    async def test_eta_messages(self):
+        self.elevator.eta_messages = True
+        self.elevator.current_floor = 1
+        self.elevator.commit_floor(3, Direction.IDLE)
+        self.assertEqual(self.elevator.queue.get_nowait(), "eta@3#1:0.2")
+        self.elevator.commit_floor(2, Direction.IDLE)  # the stop at 3 is delayed by the stop at 2
+        self.assertEqual(self.elevator.queue.get_nowait(), "eta@2#1:0.1")
+        self.assertEqual(self.elevator.queue.get_nowait(), "eta@3#1:0.5")
+        self.assertTrue(self.elevator.queue.empty())
+
+        # The call going down from floor 3 is planned after the car stop there, with its own estimate
+        self.elevator.commit_floor(3, Direction.DOWN)
+        self.assertEqual(self.elevator.queue.get_nowait(), "down_eta@3#1:0.8")
+        self.assertTrue(self.elevator.queue.empty())
+
     async def test_door_loop_open(self):
         # TestCase 1
         self.elevator.state = ElevatorState.MOVING_UP
@@ -627,6 +710,110 @@ class TestElevator(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(self.elevator.committed_direction, Direction.UP)
 
 
+class TestTrapezoidalElevator(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.elevator = Elevator(id=1, floor_travel_duration=0.1, accelerate_duration=0.1, door_move_duration=0.05, door_stay_duration=0.05, motion_model=MotionModel.TRAPEZOIDAL)
+        await self.elevator.start()
+
+    async def asyncTearDown(self):
+        await self.elevator.stop()
+
+    def test_run_time(self):
+        e = self.elevator
+        self.assertAlmostEqual(e.accelerate_distance, 0.5)
+        # Long runs reach max speed: one acceleration duration more than at max speed
+        self.assertAlmostEqual(e.run_time(3), 3 * e.floor_travel_duration + e.accelerate_duration)
+        self.assertAlmostEqual(e.run_time(3, 0.5), e.accelerate_duration)
+        self.assertAlmostEqual(e.run_time(3, 2.5), 2 * e.floor_travel_duration + e.accelerate_duration)
+        # Short runs accelerate up to half the run
+        self.assertAlmostEqual(e.run_time(0.5), 2 * (0.5 / e.acceleration) ** 0.5)
+        self.assertAlmostEqual(e.run_time(0.5, 0.25), e.run_time(0.5) / 2)
+        # Passing times grow along the run
+        times = [e.run_time(10, x / 4) for x in range(41)]
+        self.assertEqual(times, sorted(times))
+        # Runs entered at a speed, and their inverse
+        self.assertAlmostEqual(e.run_time(e.accelerate_distance, speed=e.max_speed), e.accelerate_duration)
+        for x in range(41):
+            self.assertAlmostEqual(e._run_state(e.run_time(10, x / 4, speed=5.0), 10, 5.0)[0], x / 4)
+
+        e.motion_model = MotionModel.CONSTANT
+        self.assertAlmostEqual(e.run_time(3), 3 * e.floor_travel_duration)
+
+    def test_calculate_duration(self):
+        e = self.elevator
+        doors = 2 * e.door_move_duration + e.door_stay_duration
+        self.assertAlmostEqual(e.calculate_duration(4, 1), 2 * e.run_time(2) + doors)
+        self.assertAlmostEqual(e.calculate_duration(4, 2, n_runs=2), 2 * e.run_time(2) + 2 * doors)
+        self.assertAlmostEqual(e.calculate_duration(0, 1), doors)
+
+    async def test_run_follows_the_profile(self):
+        loop = asyncio.get_running_loop()
+        event = self.elevator.commit_floor(4, Direction.IDLE)
+        await asyncio.sleep(0.01)
+
+        # One run of 3 floors from floor 1, instead of 3 runs
+        start, origin, step, distance, _, _ = self.elevator._run
+        self.assertEqual((origin, step, distance), (1, Direction.UP, 3))
+        for floor, passing_time in enumerate(self.elevator._passes, start=2):
+            self.assertAlmostEqual(passing_time - start, self.elevator.run_time(3, floor - 1))
+
+        await asyncio.sleep(self.elevator.run_time(3, 1.5))
+        self.assertEqual(self.elevator.current_floor, 2)
+        await event.wait()
+        self.assertAlmostEqual(loop.time() - start, self.elevator.run_time(3), delta=0.1)  # the planned times are checked above, this only bounds the wakeup lag
+
+    async def test_stop_added_ahead_keeps_the_run(self):
+        event = self.elevator.commit_floor(5, Direction.IDLE)
+        await asyncio.sleep(0.02)
+        start, origin, step, distance, _, _ = self.elevator._run
+        self.assertEqual((origin, step, distance), (1, Direction.UP, 4))
+
+        # Floor 4 is beyond the braking distance: the profile is kept, only the run is shortened
+        self.elevator.commit_floor(4, Direction.IDLE)
+        await asyncio.sleep(0)
+        self.assertEqual(self.elevator._run, (start, origin, step, 3, 0.0, 0.0))
+        self.assertAlmostEqual(self.elevator._passes[-1], start + self.elevator.run_time(3))
+
+        # Floor 2 is inside the braking distance once floor 2 is near: the car brakes and the run ends at floor 3, the first one it can stop at
+        while self.elevator.current_position < 1.9:
+            await asyncio.sleep(0.002)
+        self.elevator.commit_floor(2, Direction.IDLE)
+        await asyncio.sleep(0)
+        self.assertEqual(len(self.elevator._passes), 2)
+        await event.wait()
+
+    async def test_target_change_while_braking(self):
+        e = Elevator(id=2, floor_travel_duration=0.1, accelerate_duration=0.3, door_move_duration=0.05, door_stay_duration=0.05, motion_model=MotionModel.TRAPEZOIDAL)
+        await e.start()
+        self.addAsyncCleanup(e.stop)
+        self.assertAlmostEqual(e.accelerate_distance, 1.5)
+
+        e.commit_floor(8, Direction.IDLE)
+        while e.current_position < 2.6:
+            await asyncio.sleep(0.002)
+
+        # Floor 3 is the next floor, the car cruises at max speed and needs 1.5 floors to stop: it brakes down to floor 5
+        e.commit_floor(3, Direction.IDLE)
+        await asyncio.sleep(0)
+        start, origin, step, distance, offset, speed = e._run
+        self.assertEqual((origin + len(e._passes) * step, distance), (5, 4))
+        self.assertAlmostEqual(speed, e.max_speed)
+        self.assertAlmostEqual(e._passes[-1] - start, e.run_time(distance - offset, speed=speed))
+        self.assertGreater(e._passes[3] - e._passes[2], e._passes[2] - e._passes[1])  # slower from floor 4 to 5 than from 3 to 4
+        passes = e._passes.copy()
+
+        # Another change once the car brakes: floor 4 is the next floor, the car still stops at floor 5 on the same profile
+        while e.current_position < 3.6:
+            await asyncio.sleep(0.002)
+        e.commit_floor(4, Direction.IDLE)
+        await asyncio.sleep(0)
+        self.assertEqual(e._run[:4], (start, origin, step, distance))
+        self.assertEqual(e._passes, passes)
+
+        arrived = e.target_floor_arrived[FloorAction(4, Direction.IDLE)]
+        await arrived.wait()
+
+
 if __name__ == "__main__":
     try:
         unittest.main()
@@ -3,7 +3,7 @@ import unittest
 from unittest.mock import patch
 
 from common import Direction, ElevatorVisualizer, Floor, ThemeManager, main_window
-from qtpy.QtCore import QEvent
+from qtpy.QtCore import QEvent, QPointF
 from qtpy.QtGui import QColor
 from qtpy.QtWidgets import QApplication
 
@@ -55,6 +55,18 @@ class TestElevatorVisualizer(unittest.TestCase):
             self.assertEqual(self.visualizer.door_color, QColor(200, 200, 200))
             self.assertEqual(self.visualizer.door_open_color, QColor(50, 50, 50))
 
+    def test_render_resources_follow_theme(self):
+        with patch.object(main_window.theme_manager, "get_current_theme", return_value="light"):
+            self.visualizer._update_theme_colors()
+        brush = self.visualizer._direction_brushes[Direction.UP]
+        self.assertEqual(brush.color(), QColor(0, 200, 0))
+        self.assertIs(self.visualizer._direction_brushes[Direction.UP], brush)
+
+        with patch.object(main_window.theme_manager, "get_current_theme", return_value="dark"):
+            self.visualizer._update_theme_colors()
+        self.assertEqual(self.visualizer._direction_brushes[Direction.UP].color(), QColor(0, 255, 100))
+        self.assertEqual(self.visualizer._elevator_pen.color(), QColor(120, 120, 120))
+
     def test_floor_positions_sorted(self):
         positions = list(self.visualizer.floor_positions.keys())
         self.assertEqual(positions, sorted(self.floors))
@@ -100,6 +112,109 @@ class TestElevatorVisualizer(unittest.TestCase):
             self.visualizer.update_elevator_status(1, Floor(99), False, Direction.IDLE)
             self.assertIn("not found in floor positions", mock_log.call_args[0][0])
 
+    def test_static_layer_cached(self):
+        self.visualizer.resize(400, 500)
+        self.visualizer.grab()
+        layer = self.visualizer._static_layer
+        self.assertIsNotNone(layer)
+
+        self.visualizer.grab()
+        self.assertIs(self.visualizer._static_layer, layer)
+
+        self.visualizer._update_theme_colors()
+        self.assertIsNone(self.visualizer._static_layer)
+        self.visualizer.grab()
+        self.assertIsNot(self.visualizer._static_layer, layer)
+
+        layer = self.visualizer._static_layer
+        self.visualizer.resize(500, 500)
+        self.visualizer.grab()
+        self.assertIsNot(self.visualizer._static_layer, layer)
+
+        layer = self.visualizer._static_layer
+        self.visualizer.set_elevator_count(3)
+        self.visualizer.grab()
+        self.assertIsNot(self.visualizer._static_layer, layer)
+
+    def test_set_elevator_position_repaints_car_only(self):
+        self.visualizer.resize(400, 500)
+        self.visualizer.grab()
+        old_position = self.visualizer.elevator_status[2]["current_position"]
+        with patch.object(self.visualizer, "update") as mock_update:
+            self.visualizer.set_elevator_position(2, old_position - 10, 0.0)
+            (region,) = mock_update.call_args[0]
+            self.assertTrue(region.contains(self.visualizer._elevator_rect(2, old_position)))
+            self.assertTrue(region.contains(self.visualizer._elevator_rect(2, old_position - 10)))
+            self.assertFalse(region.intersects(self.visualizer._elevator_rect(1, self.visualizer.elevator_status[1]["current_position"])))
+            self.assertLess(region.height(), self.visualizer.height())
+
+            # An unchanged car is not repainted
+            mock_update.reset_mock()
+            self.visualizer.set_elevator_position(2, old_position - 10, 0.0)
+            mock_update.assert_not_called()
+
+
+class TestTallBuildingVisualizer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+        main_window.theme_manager = ThemeManager(cls.app)
+
+    def setUp(self):
+        self.visualizer = ElevatorVisualizer([Floor.at(i) for i in range(120)], 24)
+        self.visualizer.resize(400, 400)
+        for eid in self.visualizer.elevator_status:
+            self.visualizer.update_elevator_status(eid, self.visualizer.floors[0], False, Direction.IDLE)
+        self.visualizer.grab()
+
+    def test_only_visible_floors_and_cars_are_drawn(self):
+        floors = self.visualizer._visible_floor_indices()
+        self.assertEqual(floors.start, 0)  # the view starts at the ground floor
+        self.assertLessEqual(len(floors), 400 // self.visualizer.FLOOR_HEIGHT + 3)
+        elevator_ids = self.visualizer._visible_elevator_ids()
+        self.assertEqual(elevator_ids.start, 1)
+        self.assertLessEqual(len(elevator_ids), 400 // (self.visualizer.ELEVATOR_WIDTH + self.visualizer.ELEVATOR_SPACING) + 2)
+
+        with patch.object(self.visualizer, "_draw_single_elevator") as draw:
+            self.visualizer.grab()
+            self.assertEqual({c.args[1] for c in draw.call_args_list}, set(elevator_ids))
+
+        self.visualizer.scroll_by(0, 1e9)
+        self.visualizer.grab()
+        self.assertEqual(self.visualizer._visible_floor_indices().stop, 120)
+
+    def test_zoom_keeps_anchor(self):
+        self.visualizer.scroll_by(0, 50 * self.visualizer.FLOOR_HEIGHT)
+        self.visualizer.grab()
+        anchor = QPointF(100, 300)
+        cache = self.visualizer.cached_dimensions
+        before = (anchor.x() - cache["building_x"], anchor.y() - cache["building_y"])
+
+        self.visualizer.set_zoom(1.5, anchor)
+        self.visualizer.grab()
+        cache = self.visualizer.cached_dimensions
+        after = (anchor.x() / 1.5 - cache["building_x"], anchor.y() / 1.5 - cache["building_y"])
+        self.assertAlmostEqual(before[0], after[0], delta=1)
+        self.assertAlmostEqual(before[1], after[1], delta=1)
+
+        self.visualizer.set_zoom(100)
+        self.assertEqual(self.visualizer.zoom, self.visualizer.MAX_ZOOM)
+
+    def test_fit_to_view_drops_details(self):
+        self.visualizer.set_elevator_position(1, self.visualizer.elevator_status[1]["current_position"], 0.5)
+        with patch.object(self.visualizer, "_draw_elevator_doors") as draw_doors:
+            self.visualizer.grab()
+            draw_doors.assert_called_once()
+
+            self.visualizer.fit_to_view()
+            self.assertFalse(self.visualizer.detailed)
+            draw_doors.reset_mock()
+            self.visualizer.grab()
+            draw_doors.assert_not_called()
+
+        self.assertEqual(self.visualizer._visible_floor_indices(), range(120))
+        self.assertEqual(self.visualizer._visible_elevator_ids(), range(1, 25))
+
 
 if __name__ == "__main__":
     try:
@@ -2,7 +2,7 @@ import asyncio
 import unittest
 from math import comb
 
-from common import Direction, Elevators, FloorAction
+from common import Direction, Elevator, Elevators, ElevatorState, Floor, FloorAction
 
 
 class TestElevators(unittest.IsolatedAsyncioTestCase):
@@ -126,6 +126,78 @@ class TestElevators(unittest.IsolatedAsyncioTestCase):
         for eid in self.elevators.eid2request:
             self.assertEqual(copied_elevators.eid2request[eid], self.elevators.eid2request[eid])
 
+    async def test_shared_state_table(self):
+        """Test that the hot state of all elevators lives in one table, and that copies do not write to it"""
+        self.assertEqual(len(self.elevators.states), self.elevator_count)
+        for elevator in self.elevators.values():
+            self.assertIs(elevator._states, self.elevators.states)
+
+        self.elevators[2].current_floor = 3
+        self.elevators[2]._moving_timestamp = 1.5
+        self.assertEqual(self.elevators[2].current_floor, Floor(3))
+        self.assertEqual(self.elevators[2]._moving_timestamp, 1.5)
+        self.assertEqual(self.elevators[1].current_floor, Floor(1))
+        self.assertIsNone(self.elevators[1]._moving_timestamp)
+
+        copied_elevators = self.elevators.copy()
+        copied_elevators[2]._current_floor = Floor(-1)
+        copied_elevators[2]._state = ElevatorState.MOVING_DOWN
+        self.assertEqual(copied_elevators[2].current_floor, Floor(-1))
+        self.assertEqual(self.elevators[2].current_floor, Floor(3))
+        self.assertEqual(self.elevators[2].state, ElevatorState.STOPPED_DOOR_CLOSED)
+
+        # Removed elevators keep their state, and their row is reused
+        removed = self.elevators.pop(2)
+        await removed.stop()
+        self.assertEqual(removed.current_floor, Floor(3))
+        self.assertEqual(len(self.elevators.states), self.elevator_count - 1)
+
+        self.elevators[2] = added = Elevator(id=2)
+        self.assertIs(added._states, self.elevators.states)
+        self.assertEqual(added.current_floor, Floor(1))
+        self.assertEqual(len(self.elevators.states.data), self.elevator_count * self.elevators.states.STRIDE)
+        await added.start()
+
+    async def test_positions(self):
+        """Test that the fleet-wide positions match the per-elevator properties"""
+        now = self.elevators[1].event_loop.time()
+        e1, e2, e3 = self.elevators[1], self.elevators[2], self.elevators[3]
+
+        e1.current_floor = 2
+        e1._state = ElevatorState.MOVING_UP
+        e1._moving_timestamp = now - 0.25
+        e1._moving_speed = 1.0
+
+        e2.current_floor = 3
+        e2._state = ElevatorState.CLOSING_DOOR
+        e2._door_last_state_change_time = now - 1.0
+
+        e3._state = ElevatorState.STOPPED_DOOR_OPENED
+
+        positions = self.elevators.positions()
+        for eid, e in self.elevators.items():
+            self.assertAlmostEqual(positions[eid][0], e.current_position, places=2)
+            self.assertAlmostEqual(positions[eid][1], e.door_position_percentage, places=2)
+
+        self.assertAlmostEqual(positions[1][0], int(Floor(2)) + 0.25, places=2)
+        self.assertAlmostEqual(positions[2][1], 2 / 3, places=2)
+        self.assertEqual(positions[3], (int(Floor(1)), 1.0))
+
+        # Restore a consistent state for the tear down
+        for e in self.elevators.values():
+            e._state = ElevatorState.STOPPED_DOOR_CLOSED
+
+    async def test_lazy_asyncio_primitives(self):
+        """Test that an elevator which is never started does not allocate its asyncio primitives"""
+        elevator = Elevator(id=1)
+        self.assertFalse(elevator.is_started)
+        self.assertIsNone(elevator._door_action_queue)
+        self.assertIsNone(elevator._door_idle_event)
+
+        copied = self.elevators[1].copy()
+        self.assertIsNone(copied._door_action_queue)
+        self.assertIs(copied.door_idle_event, self.elevators[1].door_idle_event)
+
     async def test_apply_assignment(self):
         """Test applying a new assignment of requests"""
         # Set up initial state
@@ -1,6 +1,8 @@
 import unittest
 
-from common import Direction, Floor
+import pickle
+
+from common import Building, Config, Controller, Direction, Floor, FloorAction, main_window
 
 
 class TestFloor(unittest.TestCase):
@@ -66,6 +68,95 @@ class TestFloor(unittest.TestCase):
         self.assertFalse(Floor(3).is_of(Direction.IDLE, Floor(5)))
 
 
+class TestBuilding(unittest.TestCase):
+    def setUp(self):
+        self.default = Building.default
+
+    def test_default_building(self):
+        self.assertEqual(self.default.labels, ("-1", "1", "2", "3"))
+        self.assertEqual((self.default.lowest, self.default.highest, self.default.ground), (Floor("-1"), Floor("3"), Floor("1")))
+
+    def test_basements_and_tall_building(self):
+        building = Building([str(f) for f in range(85, 0, -1)] + ["-3", "-2", "-1"])
+        self.assertEqual(len(building), 88)
+        self.assertEqual(Floor("-3", building), 0)
+        self.assertEqual(Floor("1", building), 3)
+        self.assertEqual(building.ground, 3)
+        self.assertEqual(Floor("85", building), building.highest)
+        self.assertEqual(str(Floor.at(87, building)), "85")
+        for index in range(-3, 92):
+            self.assertEqual(Floor(str(Floor.at(index, building)), building), index)  # labels outside the building extend it
+        self.assertEqual(str(Floor("1", building) - 4), "-4")
+        with self.assertRaises(ValueError):
+            Floor(0, building)
+
+        # Gaps in the labels are not floors
+        gaps = Building(["-1", "1", "2", "14"])
+        self.assertEqual(Floor("14", gaps) - Floor("2", gaps), 1)
+        with self.assertRaises(ValueError):
+            Floor("13", gaps)
+        self.assertEqual(str(Floor("2")), "2")  # the default building is unchanged
+
+    def test_interned_floors_and_actions(self):
+        floor = Floor("2")
+        self.assertIs(Floor(2), floor)
+        self.assertIs(Floor.at(int(floor)), floor)
+        self.assertIs(Floor("1") + 1, floor)
+        self.assertIs(Floor("3") - 1, floor)
+        self.assertIs(Floor("7"), Floor(7))  # outside the building
+        self.assertIs(Floor(floor, Building(["1", "2"])), floor)
+
+        action = FloorAction(floor, Direction.UP)
+        self.assertIs(FloorAction("2", Direction.UP), action)
+        self.assertEqual(action, (floor, Direction.UP))
+        self.assertIsNot(FloorAction(floor, Direction.DOWN), action)
+        self.assertEqual(FloorAction(9, Direction.IDLE), (Floor(9), Direction.IDLE))
+
+    def test_pickle(self):
+        # Floors unpickle in a building of the same geometry, whatever the default building is
+        building = Building(["-3", "-2", "-1", "1", "2"], [2.0, 1.0, 1.0, 1.0, 1.0])
+        floor, action = pickle.loads(pickle.dumps((Floor("2", building), FloorAction(Floor("-3", building), Direction.UP))))
+        self.assertEqual((floor, str(floor)), (4, "2"))
+        self.assertEqual(floor.building.labels, building.labels)
+        self.assertEqual(floor.building.heights, building.heights)
+        self.assertIs(action.floor.building, floor.building)
+        self.assertIs(action, floor.building.action(floor.building.lowest, Direction.UP))
+
+    def test_invalid_buildings(self):
+        for labels, heights in ((["0", "1"], None), (["1", "1"], None), ([], None), (["1", "2"], [1.0]), (["1", "2"], [1.0, 0.0])):
+            with self.subTest(labels=labels, heights=heights), self.assertRaises(ValueError):
+                Building(labels, heights)
+
+    def test_floor_heights(self):
+        building = Building(["-1", "1", "2", "3"], [1.0, 2.0, 1.0, 1.0])
+        self.assertFalse(building.uniform)
+        self.assertEqual(building.elevations, (0.0, 1.0, 3.0, 4.0, 5.0))
+        self.assertEqual(building.distance(Floor.at(0), Floor.at(3)), 4.0)
+        self.assertEqual(building.distance(1.5, 2), 1.0)
+        self.assertEqual(building.span(1), 2.0)
+        self.assertEqual(Building(["1", "2", "3"], [2.0, 2.0, 2.0]).distance(0, 2.5), 5.0)
+
+    def test_built_from_config(self):
+        controller = Controller(Config(floors=("-2", "-1", "1", "2", "3", "4"), floor_heights=(1.5, 1.0, 1.0, 1.0, 1.0, 1.0)))
+        other = Controller(Config(floors=("1", "2", "3")))
+        self.assertEqual(controller.building.highest, controller.building.parse("4"))
+        self.assertEqual(str(controller.elevators[1].current_floor), "1")
+        self.assertEqual(str(other.elevators[1].current_floor), "1")  # each controller keeps its own building
+        self.assertIs(controller.elevators[1].building, controller.building)
+        self.assertIs(Building.default, self.default)
+
+        controller.set_config(floors=("1", "2"), floor_heights=None)
+        self.assertEqual(controller.building.labels, ("1", "2"))
+        self.assertIs(controller.elevators[2].building, controller.building)
+        self.assertEqual(other.building.labels, ("1", "2", "3"))
+
+    def test_floor_button_grid(self):
+        self.assertEqual(main_window.floor_button_grid(("-1", "1", "2", "3")), {"3": (0, 1), "2": (1, 1), "1": (0, 0), "-1": (1, 0)})
+        grid = main_window.floor_button_grid(tuple(str(f) for f in range(1, 86)))
+        self.assertEqual(len(set(grid.values())), 85)
+        self.assertEqual(max(column for _, column in grid.values()), 9)
+
+
 if __name__ == "__main__":
     try:
         unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from common import GUIController, Direction, ElevatorId, FloorLike
+from common import GUIController, Direction, ElevatorId, ElevatorState, FloorLike
 
 
 class TestGUIController(unittest.IsolatedAsyncioTestCase):
@@ -34,10 +34,28 @@ class TestGUIController(unittest.IsolatedAsyncioTestCase):
         self.controller.window.elevator_panels = {eid: panel}
         self.controller.window.elevator_visualizer = visualizer
 
+        # Queued while the GUI update timer runs, only the latest state is applied
+        self.controller.gui_update_timer = MagicMock()
+        self.controller.gui_update_timer.isActive.return_value = False
+        self.controller._on_elevator_state_changed(eid, 2, door_state, direction)
+        self.controller.gui_update_timer.start.assert_called_once()
+        self.controller.gui_update_timer.isActive.return_value = True
         self.controller._on_elevator_state_changed(eid, floor, door_state, direction)
-        panel.update_elevator_status.assert_called_once()
+        self.controller.gui_update_timer.start.assert_called_once()
+        panel.update_elevator_status.assert_not_called()
+
+        self.controller._flush_gui_updates()
+        panel.update_elevator_status.assert_called_once_with(floor, door_state, direction)
         visualizer.update_elevator_status.assert_called_once()
 
+    def test_flush_gui_updates_reraises(self):
+        panel = MagicMock()
+        panel.update_elevator_status.side_effect = RuntimeError("broken panel")
+        self.controller.window.elevator_panels = {1: panel}
+        self.controller._pending_gui_updates[1] = (2, MagicMock(), Direction.UP)
+        with self.assertRaises(RuntimeError):
+            self.controller._flush_gui_updates()
+
     def test_on_call_completed(self):
         floor: FloorLike = 2
         direction = Direction.DOWN
@@ -123,6 +141,45 @@ class TestGUIController(unittest.IsolatedAsyncioTestCase):
             self.controller.window.set_elevator_count.assert_not_called()
             super_set.assert_not_called()
 
+    def test_animation_runs_only_while_elevators_move(self):
+        timer = MagicMock()
+        timer.isActive.return_value = False
+        self.controller.animation_timer = timer
+        self.controller.frame_interval = 1000 / 60
+        self.controller.window.elevator_visualizer.last_paint_duration = 0.0
+        self.controller.window.elevator_visualizer.elevator_status = {1: {}, 2: {}}
+        self.controller.elevators.positions = MagicMock(return_value={1: (1.5, 0.0), 2: (1.0, 0.0)})
+
+        # All elevators at rest: one frame is rendered, the timer is not started
+        self.controller._wake_animation()
+        timer.start.assert_not_called()
+        self.assertEqual(self.controller.window.elevator_visualizer.set_elevator_position.call_count, 2)
+
+        # An elevator starts moving: the timer runs until it stops
+        self.controller.elevators[1]._state = ElevatorState.MOVING_UP
+        self.controller._wake_animation()
+        timer.start.assert_called_once()
+
+        timer.isActive.return_value = True
+        self.controller._animate_frame()
+        timer.stop.assert_not_called()
+        timer.setInterval.assert_called_with(round(1000 / 60))
+
+        self.controller.elevators[1]._state = ElevatorState.STOPPED_DOOR_CLOSED
+        self.controller._animate_frame()
+        timer.stop.assert_called_once()
+
+    def test_animation_skips_frames_when_painting_is_slow(self):
+        timer = MagicMock()
+        self.controller.animation_timer = timer
+        self.controller.frame_interval = 10.0
+        self.controller.window.elevator_visualizer.last_paint_duration = 0.025
+        self.controller.elevators.positions = MagicMock(return_value={})
+        self.controller.elevators[2]._state = ElevatorState.OPENING_DOOR
+
+        self.controller._animate_frame()
+        timer.setInterval.assert_called_with(30)
+
 
 if __name__ == "__main__":
     try:
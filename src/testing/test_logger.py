@@ -0,0 +1,68 @@
+import io
+import logging
+import unittest
+from logging.handlers import QueueHandler
+
+from common import logger
+from system.core.logger import LazyRichHandler, use_queue_handler
+
+
+class SpyChains:
+    """Stands for a `TargetFloorChains` whose repr is expensive"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __repr__(self) -> str:
+        self.formatted += 1
+        return "chains"
+
+
+class TestLogger(unittest.TestCase):
+    def setUp(self):
+        self.level = logger.level
+        self.root_handlers = logging.getLogger().handlers[:]
+        self.stream = io.StringIO()
+        logging.getLogger().handlers = [logging.StreamHandler(self.stream)]
+
+    def tearDown(self):
+        logging.getLogger().handlers = self.root_handlers
+        logger.setLevel(self.level)
+
+    def test_disabled_messages_are_not_formatted(self):
+        chains = SpyChains()
+        logger.setLevel(logging.INFO)
+        logger.debug("Elevator %s: %s", 1, chains)
+        self.assertEqual(chains.formatted, 0)
+
+        logger.setLevel(logging.DEBUG)
+        logger.debug("Elevator %s: %s", 1, chains)
+        self.assertEqual(chains.formatted, 1)
+        self.assertIn("Elevator 1: chains", self.stream.getvalue())
+
+    def test_queue_handler(self):
+        logger.setLevel(logging.INFO)
+        listener = use_queue_handler()
+        self.assertIsInstance(logging.getLogger().handlers[0], QueueHandler)
+
+        logger.info("Controller: Floor %s already requested %s", 2, "up")
+        listener.stop()  # flushes the queue
+        self.assertIn("Controller: Floor 2 already requested up", self.stream.getvalue())
+
+    def test_lazy_rich_handler(self):
+        handler = LazyRichHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.assertIsNone(handler.handler)
+
+        logging.getLogger().handlers = [handler]
+        logger.setLevel(logging.INFO)
+        logger.info("Elevator %s arrived", 1)
+        self.assertIsNotNone(handler.handler)
+        self.assertIs(handler.handler.formatter, handler.formatter)
+
+
+if __name__ == "__main__":
+    try:
+        unittest.main()
+    except KeyboardInterrupt:
+        pass
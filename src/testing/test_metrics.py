@@ -0,0 +1,104 @@
+import asyncio
+import json
+import unittest
+
+from common import Config, Controller
+from system.utils.metrics import Histogram, Metrics, serve_prometheus, to_prometheus
+
+
+class TestHistogram(unittest.TestCase):
+    def test_observe(self):
+        h = Histogram([0.1, 1.0, 0.5])
+        for v in (0.05, 0.1, 0.3, 2.0):
+            h.observe(v)
+
+        self.assertEqual(h.buckets, (0.1, 0.5, 1.0))
+        self.assertEqual(h.count, 4)
+        self.assertAlmostEqual(h.sum, 2.45)
+        # Upper bounds are inclusive, the last bucket is +Inf
+        self.assertEqual(h.cumulative_counts(), [2, 3, 3, 4])
+
+
+class TestPrometheus(unittest.TestCase):
+    def test_exposition(self):
+        a = Metrics(bank="A")
+        a.describe("dispatch_seconds", "Dispatch time", [0.5])
+        a.observe("dispatch_seconds", 0.25, strategy="OPTIMAL")
+        a.add_collector(lambda m: m.set_gauge("pending_requests", 3))
+
+        b = Metrics(bank='B"')
+        b.describe("dispatch_seconds", "Dispatch time", [0.5])
+        b.observe("dispatch_seconds", 1.0, strategy="GREEDY")
+
+        lines = to_prometheus(a, b).splitlines()
+        self.assertEqual(lines.count("# TYPE dispatch_seconds histogram"), 1)
+        self.assertIn("# HELP dispatch_seconds Dispatch time", lines)
+        self.assertIn('dispatch_seconds_bucket{bank="A",strategy="OPTIMAL",le="0.5"} 1', lines)
+        self.assertIn('dispatch_seconds_bucket{bank="B\\"",strategy="GREEDY",le="0.5"} 0', lines)
+        self.assertIn('dispatch_seconds_bucket{bank="B\\"",strategy="GREEDY",le="+Inf"} 1', lines)
+        self.assertIn('dispatch_seconds_count{bank="A",strategy="OPTIMAL"} 1', lines)
+        self.assertIn("# TYPE pending_requests gauge", lines)
+        self.assertIn('pending_requests{bank="A"} 3', lines)
+
+
+class TestControllerMetrics(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.controller = Controller(Config(floor_travel_duration=0.2, door_move_duration=0.1, door_stay_duration=0.1, metrics_interval=0.05))
+        await self.controller.start()
+
+    async def asyncTearDown(self):
+        await self.controller.stop()
+
+    async def test_dispatch_is_recorded(self):
+        await self.controller.handle_message("call_up@2")
+
+        dispatch = self.controller.metrics.histograms["dispatch_seconds"]
+        self.assertEqual(sum(h.count for h in dispatch.values()), 1)
+        self.assertGreaterEqual(self.controller.metrics.histograms["reassign_candidates"][()].sum, 1)
+
+        # The elevator has moved, let it open its doors: both loops report their wakeup lag
+        await asyncio.sleep(0.15)
+        lag = self.controller.metrics.histograms["event_loop_lag_seconds"]
+        self.assertIn((("loop", "move"),), lag)
+        self.assertIn((("loop", "door"),), lag)
+        self.assertIn("elevator_state_dwell_seconds", self.controller.metrics.histograms)
+
+    async def test_snapshot_messages(self):
+        async with asyncio.timeout(1):
+            async for msg in self.controller.messages():
+                if msg.startswith("metrics@"):
+                    break
+
+        snapshot = json.loads(msg.removeprefix("metrics@"))
+        self.assertEqual(snapshot["gauges"]["pending_requests"][""], 0)
+        self.assertIn("elevator=1", snapshot["gauges"]["committed_stops"])
+
+    async def test_publisher_stops_with_the_controller(self):
+        task = self.controller.metrics_task
+        self.assertIsNotNone(task)
+        await self.controller.stop()
+        self.assertTrue(task.done())
+        self.assertIsNone(self.controller.metrics_task)
+        await self.controller.start()
+
+    async def test_http_endpoint(self):
+        server = await serve_prometheus(lambda: [self.controller.metrics], port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            response = (await reader.read()).decode()
+            writer.close()
+        finally:
+            server.close()
+
+        self.assertTrue(response.startswith("HTTP/1.1 200 OK"))
+        self.assertIn("# TYPE message_tasks gauge", response)
+
+
+if __name__ == "__main__":
+    try:
+        unittest.main()
+    except KeyboardInterrupt:
+        pass
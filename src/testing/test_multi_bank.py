@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import multiprocessing
+import socket
+import unittest
+
+from common import Config, Controller, Floor, Server
+from system.__main__ import main, run_shard, shard
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestMultiBankHosting(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.port = free_port()
+        self.server = Server(server_port=self.port)
+        self.server.start()
+
+        config = dict(floor_travel_duration=0.2, door_move_duration=0.1, door_stay_duration=0.1)
+        self.controllers = {
+            "BankA": Controller(Config(**config)),
+            "BankB": Controller(Config(elevator_count=3, **config)),
+        }
+        self.main_task = asyncio.create_task(main(self.controllers, port=self.port))
+
+        async with asyncio.timeout(5):
+            self.clients = {await self.server.get_next_client() for _ in self.controllers}
+
+    async def asyncTearDown(self):
+        self.main_task.cancel()
+        await self.main_task
+        self.server.stop()
+
+    async def wait_for(self, address: str, message: str):
+        async with asyncio.timeout(5):
+            async for addr, msg, _ in self.server.messages():
+                if addr == address and msg == message:
+                    return
+
+    async def test_all_banks_are_online(self):
+        self.assertEqual(self.clients, set(self.controllers))
+        for controller in self.controllers.values():
+            self.assertTrue(controller.started)
+
+        # Each bank keeps its own configuration
+        self.assertEqual(len(self.controllers["BankA"].elevators), 2)
+        self.assertEqual(len(self.controllers["BankB"].elevators), 3)
+
+    async def test_messages_are_routed_per_identity(self):
+        await self.server.send("BankA", "call_up@2")
+        await self.wait_for("BankA", "up_floor_arrived@2#1")
+
+        self.assertEqual(self.controllers["BankA"].elevators[1].current_floor, Floor(2))
+        for elevator in self.controllers["BankB"].elevators.values():
+            self.assertEqual(elevator.current_floor, Floor(1))
+
+        await self.server.send("BankB", "select_floor@3#2")
+        await self.wait_for("BankB", "floor_arrived@3#2")
+        self.assertEqual(self.controllers["BankB"].elevators[2].current_floor, Floor(3))
+
+
+class TestSharding(unittest.TestCase):
+    def test_shard_is_balanced(self):
+        identities = [f"Bank{i}" for i in range(7)]
+        shards = shard(identities, 3)
+        self.assertEqual(shards, [["Bank0", "Bank3", "Bank6"], ["Bank1", "Bank4"], ["Bank2", "Bank5"]])
+        self.assertEqual(sorted(sum(shards, [])), identities)
+
+    def test_shard_never_empty(self):
+        self.assertEqual(shard(["Bank0", "Bank1"], 4), [["Bank0"], ["Bank1"]])
+        with self.assertRaises(ValueError):
+            shard(["Bank0"], 0)
+
+
+class TestShardedRuntime(unittest.IsolatedAsyncioTestCase):
+    async def test_worker_processes_host_their_banks(self):
+        port = free_port()
+        server = Server(server_port=port)
+        server.start()
+
+        cfg = Config(floor_travel_duration=0.2, door_move_duration=0.1, door_stay_duration=0.1)
+        processes = [multiprocessing.Process(target=run_shard, args=(s, cfg, "127.0.0.1", port, logging.CRITICAL)) for s in shard(["BankA", "BankB", "BankC"], 2)]
+        for p in processes:
+            p.start()
+        try:
+            async with asyncio.timeout(10):
+                clients = {await server.get_next_client() for _ in range(3)}
+            self.assertEqual(clients, {"BankA", "BankB", "BankC"})
+
+            await server.send("BankC", "call_down@3")
+            async with asyncio.timeout(5):
+                async for addr, msg, _ in server.messages():
+                    if addr == "BankC" and msg == "down_floor_arrived@3#1":
+                        break
+        finally:
+            for p in processes:
+                p.terminate()
+                p.join()
+            server.stop()
+
+
+if __name__ == "__main__":
+    try:
+        unittest.main()
+    except KeyboardInterrupt:
+        pass
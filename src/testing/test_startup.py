@@ -0,0 +1,30 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+# Packages the headless path must not import at startup
+GUI_AND_CONSOLE_PACKAGES = ("qtpy", "PyQt6", "qasync", "rich", "zmq")
+
+
+class TestStartup(unittest.TestCase):
+    def imported_packages(self, module: str) -> list[str]:
+        code = f"import sys; import {module}; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent.parent, capture_output=True, text=True, check=True)
+        return result.stdout.split()
+
+    def test_headless_imports_only_the_core(self):
+        for module in ("system.__main__", "system.core.controller"):
+            with self.subTest(module=module):
+                packages = self.imported_packages(module)
+                self.assertEqual([p for p in GUI_AND_CONSOLE_PACKAGES if p in packages], [])
+
+    def test_gui_imports_qt(self):
+        self.assertIn("PyQt6", self.imported_packages("system.gui"))
+
+
+if __name__ == "__main__":
+    try:
+        unittest.main()
+    except KeyboardInterrupt:
+        pass
@@ -209,6 +209,7 @@ class SystemTestOpenDoor(GUIAsyncioTestCase):
 
     async def test_display_info_inside_and_outside(self):
         """UC6: Comprehensive UI display verification during elevator run"""
+        self.assertEqual(self.elevator1_UI.title.text(), "Elevator #1")
         self.elevator1_UI.floor_buttons["3"].click()
         await asyncio.sleep(0.02)
 
@@ -1,6 +1,9 @@
-import unittest
 import asyncio
-from common import Direction, FloorAction, TargetFloorChains
+import random
+import unittest
+from copy import copy
+
+from common import Building, DestinationHeuristic, Direction, FloorAction, TargetFloorChains
 
 
 class TestTargetFloorChains(unittest.TestCase):
@@ -267,6 +270,104 @@ class TestTargetFloorChains(unittest.TestCase):
             ],
         )
 
+    def test_probe(self):
+        rng = random.Random(46)
+        building = Building.default
+        floors = building.floors
+        for _ in range(200):
+            self.chains.clear()
+            start = rng.randrange(len(floors))
+            for _ in range(rng.randrange(6)):
+                action = FloorAction(rng.choice(floors), rng.choice(list(Direction)))
+                if action not in self.chains:
+                    self.chains.add(action, target_direction=Direction(sign(int(action.floor) - start)))
+
+            action = FloorAction(rng.choice(floors), rng.choice(list(Direction)))
+            if action in self.chains:
+                continue
+            target_direction = Direction(sign(int(action.floor) - start))
+            before = list(self.chains), self.chains.direction
+            index, n_floors, n_stops = self.chains.probe(action, target_direction=target_direction, start_pos=start)
+            self.assertEqual((list(self.chains), self.chains.direction), before)  # read-only
+
+            clone = copy(self.chains)
+            clone.add(action, target_direction=target_direction)
+            plan = list(clone)
+            self.assertEqual(index, plan.index(action))
+            self.assertEqual(n_stops, index)
+            positions = [start] + [int(a.floor) for a in plan[: index + 1]]
+            self.assertAlmostEqual(n_floors, sum(building.distance(a, b) for a, b in zip(positions, positions[1:])))
+
+    def test_prefix_sums(self):
+        building = Building(("-2", "-1", "1", "2", "3", "4", "5"), heights=(1.5, 1.0, 1.2, 1.0, 1.0, 2.0, 1.0))
+        self.chains = TargetFloorChains(event_loop=asyncio.AbstractEventLoop(), building=building)
+        rng = random.Random(47)
+        start = 2
+        for _ in range(500):
+            action = FloorAction(rng.choice(building.floors), rng.choice(list(Direction)))
+            target_direction = Direction(sign(int(action.floor) - start))
+            match rng.randrange(3):
+                case 0 if action not in self.chains:
+                    clone = copy(self.chains)
+                    clone.add(action, target_direction=target_direction)
+                    self.assertAlmostEqual(self.chains.get_metric_with(action, target_direction=target_direction, start_pos=start)[0], clone.get_metric(start)[0])
+                    self.chains.add(action, target_direction=target_direction)
+                case 1 if self.chains:
+                    self.chains.remove(rng.choice(list(self.chains)))
+                case 2 if self.chains:
+                    start = int(self.chains.pop().floor)
+
+            for c in self.chains.chains:
+                positions = [int(a.floor) for a in c]
+                self.assertEqual(len(c.prefix), len(c))
+                self.assertAlmostEqual(c.span, sum(building.distance(a, b) for a, b in zip(positions, positions[1:])))
+            positions = [start] + [int(a.floor) for a in self.chains]
+            n_floors, n_stops = self.chains.get_metric(start)
+            self.assertAlmostEqual(n_floors, sum(building.distance(a, b) for a, b in zip(positions, positions[1:])))
+            self.assertEqual(n_stops, len(self.chains))
+
+    def test_destination_heuristics(self):
+        rng = random.Random(48)
+        for building in (Building.default, Building(("-2", "-1", "1", "2", "3", "4", "5", "6"), heights=(1.5, 1.0, 1.2, 1.0, 1.0, 2.0, 1.0, 1.0))):
+            self.chains = TargetFloorChains(event_loop=asyncio.AbstractEventLoop(), building=building)
+            floors = building.floors
+            for _ in range(300):
+                self.chains.clear()
+                start = rng.randrange(len(floors))
+                for _ in range(rng.randrange(10)):
+                    action = FloorAction(rng.choice(floors), rng.choice(list(Direction)))
+                    if action not in self.chains:
+                        self.chains.add(action, target_direction=Direction(sign(int(action.floor) - start)))
+                for heuristic in (DestinationHeuristic.NEAREST, DestinationHeuristic.FURTHEST):
+                    n_floors, n_stops = self.chains.get_metric(start, heuristic)
+                    expected = cloned_metric(self.chains, start, heuristic)
+                    self.assertAlmostEqual(n_floors, expected[0])
+                    self.assertEqual(n_stops, expected[1])
+                nearest, furthest = cloned_metric(self.chains, start, DestinationHeuristic.NEAREST), cloned_metric(self.chains, start, DestinationHeuristic.FURTHEST)
+                n_floors, n_stops = self.chains.get_metric(start, DestinationHeuristic.MEAN)
+                self.assertAlmostEqual(n_floors, (nearest[0] + furthest[0]) / 2)
+                self.assertEqual(n_stops, (nearest[1] + furthest[1]) / 2)
+
+
+def cloned_metric(chains: TargetFloorChains, start: int, heuristic: DestinationHeuristic) -> tuple[float, int]:
+    """Reference: add the guessed destinations to a copy of the chains and walk it"""
+    clone = copy(chains)
+    building = chains.building
+    for chain, clone_chain in zip(chains.chains, clone.chains):
+        for action in chain:
+            if action.direction == Direction.IDLE:
+                continue
+            if heuristic == DestinationHeuristic.NEAREST:
+                clone_chain.add_unique(action.floor + action.direction, Direction.IDLE)
+            else:
+                clone_chain.add_unique(building.highest if action.direction == Direction.UP else building.lowest, Direction.IDLE)
+    positions = [start] + [int(a.floor) for a in clone]
+    return sum(building.distance(a, b) for a, b in zip(positions, positions[1:])), len(clone)
+
+
+def sign(x: int) -> int:
+    return (x > 0) - (x < 0)
+
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from common import Config, Controller
+from system.utils.tracing import Tracer, tracer
+
+
+class TestTracer(unittest.TestCase):
+    def test_disabled_tracer_records_nothing(self):
+        t = Tracer()
+        with t.span("span"):
+            pass
+        t.instant("instant")
+        t.begin("message", "call_up@2")
+        self.assertEqual(len(t.events), 0)
+
+    def test_span_nesting(self):
+        t = Tracer()
+        t.enable()
+        with t.span("outer", floor=1):
+            with t.span("inner"):
+                pass
+
+        inner, outer = [e for e in t.events if e["ph"] == "X"]
+        self.assertEqual((outer["name"], inner["name"]), ("outer", "inner"))
+        self.assertEqual(outer["tid"], inner["tid"])
+        self.assertLessEqual(outer["ts"], inner["ts"])
+        self.assertGreaterEqual(outer["ts"] + outer["dur"], inner["ts"] + inner["dur"])
+        self.assertEqual(outer["args"], {"floor": 1})
+
+    def test_bounded_buffer(self):
+        t = Tracer(max_events=10)
+        t.enable()
+        for i in range(100):
+            t.instant("instant", i=i)
+        self.assertEqual(len(t.events), 10)
+        self.assertEqual(t.events[-1]["args"], {"i": 99})
+
+        # The track names are not evicted with the events
+        self.assertEqual([e["args"]["name"] for e in t.to_json()["traceEvents"] if e["ph"] == "M"], ["MainThread"])
+
+
+class TestCommandLifecycleTrace(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        tracer.clear()
+        tracer.enable()
+        self.controller = Controller(Config(floor_travel_duration=0.1, door_move_duration=0.05, door_stay_duration=0.05))
+        await self.controller.start()
+
+    async def asyncTearDown(self):
+        await self.controller.stop()
+        tracer.disable()
+        tracer.clear()
+
+    async def test_call_up_lifecycle(self):
+        self.controller.handle_message_task("call_up@2")
+        async with asyncio.timeout(2):
+            async for msg in self.controller.messages():
+                if msg == "up_floor_arrived@2#1":
+                    break
+        await asyncio.sleep(0)
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "trace.json")
+            tracer.dump(path)
+            with open(path, encoding="utf-8") as f:
+                events = json.load(f)["traceEvents"]
+
+        def first(name: str, **args) -> dict:
+            return next(e for e in events if e["name"] == name and e["ph"] != "M" and args.items() <= e["args"].items())
+
+        begin = next(e for e in events if e["ph"] == "b" and e["id"] == "call_up@2")
+        end = next(e for e in events if e["ph"] == "e" and e["id"] == "call_up@2")
+        steps = [
+            begin,
+            first("assign_elevators"),
+            first("commit_floor", elevator=1),
+            first("move", elevator=1, floor="1", target="2"),
+            first("pop_target", elevator=1),
+            first("output", message="up_floor_arrived@2#1"),
+        ]
+        timestamps = [e["ts"] for e in steps]
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertLessEqual(steps[-2]["ts"], end["ts"])
+
+        # The move span covers the travel between two floors
+        self.assertGreaterEqual(steps[3]["dur"], 0.1 * 1e6 * 0.9)
+
+
+if __name__ == "__main__":
+    try:
+        unittest.main()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,39 @@
+import unittest
+from unittest.mock import patch
+
+from common import DoorState, Direction, GUIAsyncioTestCase, main_window
+
+
+class TestTranslationManager(GUIAsyncioTestCase):
+    async def test_translations_are_memoized_per_language(self):
+        manager = main_window.translation_manager
+        with patch("system.gui.i18n.QCoreApplication.translate", side_effect=lambda context, source: source.upper()) as translate:
+            manager._translations.clear()
+            self.assertEqual(manager.tr("ElevatorPanel", "Floor"), "FLOOR")
+            self.assertEqual(manager.tr("ElevatorPanel", "Floor"), "FLOOR")
+            self.assertEqual(translate.call_count, 1)
+
+            # Same source in another context is translated on its own
+            manager.tr("MainWindow", "Floor")
+            self.assertEqual(translate.call_count, 2)
+
+        # Changing the language drops the memoized strings
+        manager.current_language = None
+        manager.set_language("English")
+        self.assertEqual(manager.tr("ElevatorPanel", "Floor"), "Floor")
+
+    async def test_status_update_does_not_translate(self):
+        with patch("system.gui.i18n.QCoreApplication.translate") as translate, patch("system.gui.main_window.tr") as tr:
+            self.elevator1_UI.update_elevator_status(3, DoorState.OPENED, Direction.UP)
+            translate.assert_not_called()
+            tr.assert_not_called()
+        self.assertIn("3", self.elevator1_UI.floor_label.text())
+        self.assertIn("Opened", self.elevator1_UI.door_label.text())
+        self.assertIn("Up", self.elevator1_UI.direction_label.text())
+
+
+if __name__ == "__main__":
+    try:
+        unittest.main()
+    except KeyboardInterrupt:
+        pass